@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Load time, memory and lookup latency of the model hash index
+(module/hashindex.py), on a synthetic dump or a real one.
+
+Usage:
+    python -m benchmarks.bench_hashindex [--models 100000] [--format json|sqlite]
+    python -m benchmarks.bench_hashindex --dump models.json
+    python -m benchmarks.bench_hashindex --models 1000 --write sample.json   # dump for MECHA_HASH_INDEX
+
+@author: seesthenight & Circle D5
+"""
+import os
+import gc
+import json
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+import tracemalloc
+from typing import Any, Dict, List
+
+from module.hashindex import HashIndex, load_index
+from benchmarks.bench_hotpath import measure
+
+SEED = 1234
+
+
+# ==================== Synthetic Dump ====================
+def _hex(rng: random.Random, length: int) -> str:
+    return f"{rng.getrandbits(length * 4):0{length}x}"
+
+
+def make_models(rng: random.Random, count: int) -> List[Dict[str, Any]]:
+    """Civitai-like entries: a third LoRAs with an AutoV3, all with SHA256, AutoV1/2 and CRC32."""
+    models = []
+    for number in range(count):
+        sha256 = _hex(rng, 64)
+        hashes = {"SHA256": sha256.upper(), "AutoV1": _hex(rng, 8), "AutoV2": sha256[:10], "CRC32": _hex(rng, 8)}
+        kind = "LORA" if number % 3 == 0 else "Checkpoint"
+        if kind == "LORA":
+            hashes["AutoV3"] = _hex(rng, 12)
+        models.append({"name": f"model_{number}", "version": f"v{number % 7}.0", "type": kind, "hashes": hashes})
+    return models
+
+
+def write_dump(models: List[Dict[str, Any]], path: str, fmt: str) -> None:
+    if fmt == "json":
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(models, f)
+        return
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE hashes (hash TEXT, name TEXT, version TEXT, type TEXT)")
+    connection.executemany(
+        "INSERT INTO hashes VALUES (?, ?, ?, ?)",
+        ((value, model["name"], model["version"], model["type"]) for model in models for value in model["hashes"].values())
+    )
+    connection.commit()
+    connection.close()
+
+
+# ==================== Measurement ====================
+def measure_load(path: str) -> Dict[str, Any]:
+    start = time.perf_counter()
+    index = load_index(path)
+    elapsed = time.perf_counter() - start
+
+    # Memory in a separate pass; tracing slows the load down
+    del index
+    gc.collect()
+    tracemalloc.start()
+    index = load_index(path)
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "index": index,
+        "load_s": round(elapsed, 3),
+        "hashes": len(index),
+        "models": index.models,
+        "packed_kb": round(index.nbytes() / 1024, 1),
+        "retained_kb": round(retained / 1024, 1),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def lookup_cases(index: HashIndex, models: List[Dict[str, Any]], rng: random.Random) -> Dict[str, Any]:
+    """Lookups as images carry them; each case cycles through many hashes."""
+    sample = rng.sample(models, min(1000, len(models)))
+    loras = [model for model in sample if "AutoV3" in model["hashes"]] or sample
+    cases = {
+        "AutoV2 (Model hash)": [model["hashes"]["AutoV2"] for model in sample],
+        "AutoV3 (Lora hashes)": [model["hashes"].get("AutoV3", model["hashes"]["AutoV2"]) for model in loras],
+        "SwarmUI 0x SHA256": ["0x" + model["hashes"]["SHA256"].lower() for model in sample],
+        "miss": [_hex(rng, 10) for _ in sample],
+    }
+    results = {}
+    for name, values in cases.items():
+        position = iter(range(10 ** 9))
+
+        def lookup(values=values, position=position):
+            return index.lookup(values[next(position) % len(values)])
+
+        resolved = sum(index.lookup(value) is not None for value in values)
+        results[name] = dict(measure(lookup, 5000), resolved=f"{resolved}/{len(values)}")
+    return results
+
+
+# ==================== Entry Point ====================
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--models", type=int, default=100000)
+    parser.add_argument("--format", choices=("json", "sqlite"), default="json")
+    parser.add_argument("--dump", help="benchmark this dump instead of a synthetic one")
+    parser.add_argument("--write", metavar="PATH", help="only write the synthetic dump to PATH")
+    args = parser.parse_args()
+
+    rng = random.Random(SEED)
+    if args.write:
+        write_dump(make_models(rng, args.models), args.write, "sqlite" if args.write.endswith((".db", ".sqlite3")) else "json")
+        print(f"Wrote {args.models} models to {args.write}")
+        return
+
+    with tempfile.TemporaryDirectory(prefix="mecha_hashes_") as workdir:
+        if args.dump:
+            path, models = args.dump, None
+        else:
+            models = make_models(rng, args.models)
+            path = os.path.join(workdir, f"models.{args.format}")
+            write_dump(models, path, args.format)
+        print(f"Dump: {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+        load = measure_load(path)
+
+    index = load.pop("index")
+    print(", ".join(f"{key} {value}" for key, value in load.items()))
+    if models is None:
+        return
+    print(f"{'lookup':<24}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'resolved':>12}")
+    for name, result in lookup_cases(index, models, rng).items():
+        print(f"{name:<24}{result['p50_ms']:>10.4f}{result['p99_ms']:>10.4f}{result['max_ms']:>10.4f}{result['resolved']:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite for the parse-and-render hot path.
+
+Usage:
+    python -m benchmarks.bench_hotpath                       # run and print
+    python -m benchmarks.bench_hotpath --save baseline.json  # store a baseline
+    python -m benchmarks.bench_hotpath --compare baseline.json
+
+Embed stages (_detect_tags, create_pnginfo_view) need discord.py installed,
+stealth pnginfo stages need NumPy and Pillow; they are skipped otherwise.
+
+@author: seesthenight & Circle D5
+"""
+import gc
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from module.parser import parse_generation_parameters, parse_swarmui_parameters
+from module.analysis import parse_parameters
+from module.metadata import extract_metadata
+from benchmarks import corpus
+
+SEED = 1234
+
+# ==================== Corpus ====================
+def build_cases(rng: random.Random, png_size: int) -> List[Tuple[str, Callable[[], Any]]]:
+    """Return (stage/case name, zero-argument callable) pairs."""
+    webui_short = corpus.make_webui_parameters(rng, 20)
+    webui_long = corpus.make_webui_parameters(rng, 2000)
+    swarmui = corpus.make_swarmui_parameters(rng, 60)
+    novelai = corpus.make_novelai_comment(rng, 60)
+    comfy_small = corpus.make_comfyui_prompt(rng, 0)
+    comfy_large = corpus.make_comfyui_prompt(rng, 5000)
+    png_webui = corpus.make_png(png_size, png_size, {"parameters": webui_long}, rng=rng)
+    png_comfy = corpus.make_png(png_size, png_size, {"prompt": comfy_large}, rng=rng)
+
+    cases = [
+        ("parse_generation_parameters/webui_short", lambda: parse_generation_parameters(webui_short)),
+        ("parse_generation_parameters/webui_long", lambda: parse_generation_parameters(webui_long)),
+        ("parse_generation_parameters/swarmui", lambda: parse_generation_parameters(swarmui)),
+        ("parse_swarmui_parameters/swarmui", lambda: parse_swarmui_parameters(swarmui)),
+        ("parse_parameters/webui_long", lambda: parse_parameters({"parameters": webui_long})),
+        ("parse_parameters/novelai", lambda: parse_parameters(novelai)),
+        ("parse_parameters/comfyui_small", lambda: parse_parameters({"prompt": comfy_small})),
+        ("parse_parameters/comfyui_large", lambda: parse_parameters({"prompt": comfy_large})),
+        ("extract_metadata/png_webui", lambda: extract_metadata(png_webui)),
+        ("extract_metadata/png_comfyui", lambda: extract_metadata(png_comfy)),
+    ]
+
+    cases.extend(build_stealth_cases(novelai))
+
+    try:
+        from module.cogs.analysis import _detect_tags, create_pnginfo_view
+    except ImportError as err:
+        print(f"Skipping embed stages: {err}", file=sys.stderr)
+        return cases
+
+    parsed = {
+        "webui_long": parse_parameters({"parameters": webui_long}),
+        "comfyui_large": parse_parameters({"prompt": comfy_large}),
+    }
+    for name, kv in parsed.items():
+        cases.append((f"_detect_tags/{name}", lambda kv=kv: _detect_tags(dict(kv))))
+        cases.append((f"create_pnginfo_view/{name}", lambda kv=kv: create_pnginfo_view(dict(kv), b"thumbnail")))
+    return cases
+
+
+def build_stealth_cases(chunks: Dict[str, str], size: int = 2048) -> List[Tuple[str, Callable[[], Any]]]:
+    """NovelAI-style stealth pnginfo in the alpha LSBs of a size x size RGBA PNG."""
+    try:
+        import numpy as np
+        from PIL import Image
+    except ImportError as err:
+        print(f"Skipping stealth stages: {err}", file=sys.stderr)
+        return []
+    import io
+    import gzip
+    from module.stealth import read_stealth_metadata, read_stealth_text
+
+    payload = gzip.compress(json.dumps(chunks).encode("utf-8"))
+    header = b"stealth_pngcomp" + (len(payload) * 8).to_bytes(4, "big")
+    bits = np.unpackbits(np.frombuffer(header + payload, dtype=np.uint8))
+
+    pixels = np.full((size, size, 4), 255, dtype=np.uint8)
+    alpha = pixels[..., 3].T.copy().ravel()  # column-major order
+    alpha[:len(bits)] = 254 | bits
+    pixels[..., 3] = alpha.reshape(size, size).T
+    image = Image.fromarray(pixels, "RGBA")
+    image.load()
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    data = buffer.getvalue()
+
+    return [
+        ("read_stealth_text/decoded_2048", lambda: read_stealth_text(image)),
+        ("read_stealth_metadata/png_2048", lambda: read_stealth_metadata(data)),
+    ]
+
+
+# ==================== Measurement ====================
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(func: Callable[[], Any], iterations: int) -> Dict[str, float]:
+    """Return latency percentiles (ms) and allocation figures for func."""
+    func()  # warm up caches and imports
+
+    gc.disable()
+    try:
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+    finally:
+        gc.enable()
+    timings.sort()
+
+    # Allocations are measured in a separate pass; tracing skews timings
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    allocated = sum(stat.size_diff for stat in stats if stat.size_diff > 0)
+    blocks = sum(stat.count_diff for stat in stats if stat.count_diff > 0)
+
+    return {
+        "p50_ms": round(_percentile(timings, 50), 4),
+        "p90_ms": round(_percentile(timings, 90), 4),
+        "p99_ms": round(_percentile(timings, 99), 4),
+        "max_ms": round(timings[-1], 4),
+        "peak_kb": round(peak / 1024, 1),
+        "retained_kb": round(allocated / 1024, 1),
+        "retained_blocks": blocks,
+    }
+
+
+# ==================== Reporting ====================
+def _print_results(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]]) -> None:
+    header = f"{'case':<45} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'peak KB':>10}"
+    if baseline:
+        header += f" {'p50 vs base':>12}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        line = f"{name:<45} {r['p50_ms']:>10.3f} {r['p90_ms']:>10.3f} {r['p99_ms']:>10.3f} {r['peak_kb']:>10.1f}"
+        base = baseline.get(name)
+        if base and base.get("p50_ms"):
+            change = (r["p50_ms"] - base["p50_ms"]) / base["p50_ms"] * 100
+            line += f" {change:>+11.1f}%"
+        print(line)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the parse-and-render hot path.")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--png-size", type=int, default=1024, help="PNG width/height in pixels")
+    parser.add_argument("--filter", default="", help="only run cases containing this text")
+    parser.add_argument("--save", help="write results to this baseline file")
+    parser.add_argument("--compare", help="compare against this baseline file")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(SEED)
+    cases = [case for case in build_cases(rng, args.png_size) if args.filter in case[0]]
+
+    results = {name: measure(func, args.iterations) for name, func in cases}
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    _print_results(results, baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "iterations": args.iterations,
+                "png_size": args.png_size,
+                "results": results,
+            }, f, indent=2)
+        print(f"Baseline saved to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
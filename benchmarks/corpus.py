@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Synthetic image corpus for benchmarks.
+
+@author: seesthenight & Circle D5
+"""
+import os
+import json
+import zlib
+import struct
+import random
+from typing import Dict, Optional
+
+from module.metadata import PNG_SIGNATURE
+
+
+# ==================== PNG Builder ====================
+def _chunk(chunk_type: bytes, body: bytes) -> bytes:
+    """Encode a single PNG chunk."""
+    crc = zlib.crc32(chunk_type + body)
+    return struct.pack(">I", len(body)) + chunk_type + body + struct.pack(">I", crc)
+
+
+def make_png(
+    width: int,
+    height: int,
+    text: Dict[str, str],
+    noise: bool = True,
+    rng: Optional[random.Random] = None
+) -> bytes:
+    """
+    Build an RGBA PNG of the given size with tEXt chunks before the image data.
+    Noise pixels keep the file close to real-world compressed sizes.
+    """
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    row_size = width * 4
+    if noise:
+        randbytes = rng.randbytes if rng is not None else os.urandom
+        raw = b"".join(b"\x00" + randbytes(row_size) for _ in range(height))
+    else:
+        raw = (b"\x00" + b"\x80" * row_size) * height
+
+    chunks = [_chunk(b"IHDR", ihdr)]
+    for key, value in text.items():
+        chunks.append(_chunk(b"tEXt", key.encode("latin-1") + b"\x00" + value.encode("latin-1", "replace")))
+    chunks.append(_chunk(b"IDAT", zlib.compress(raw, 1)))
+    chunks.append(_chunk(b"IEND", b""))
+    return PNG_SIGNATURE + b"".join(chunks)
+
+
+WEBUI_PARAMETERS = (
+    "masterpiece, best quality, 1girl, solo, looking at viewer\n"
+    "Negative prompt: lowres, bad anatomy\n"
+    "Steps: 28, Sampler: DPM++ 2M Karras, CFG scale: 7, Seed: 1234567890, "
+    "Size: 832x1216, Model hash: 6ce0161689, Model: hassakuXL_v13, Clip skip: 2"
+)
+
+
+# ==================== Metadata Generators ====================
+PROMPT_WORDS = (
+    "masterpiece", "best quality", "1girl", "solo", "looking at viewer", "(smile:1.2)",
+    "<lora:hassakuStyle:0.7>", "outdoors", "cherry blossoms", "detailed background",
+    "BREAK", "long hair", "[blue eyes|green eyes]", "dynamic angle", "sunlight",
+)
+
+
+def make_prompt(rng: random.Random, words: int) -> str:
+    """Return a comma separated prompt of roughly the given word count."""
+    return ", ".join(rng.choice(PROMPT_WORDS) for _ in range(words))
+
+
+def make_webui_parameters(rng: random.Random, words: int) -> str:
+    """A1111 style parameters text with a prompt of the given length."""
+    return (
+        f"{make_prompt(rng, words)}\n"
+        f"Negative prompt: {make_prompt(rng, max(1, words // 4))}\n"
+        f"Steps: {rng.randint(20, 50)}, Sampler: DPM++ 2M, Schedule type: Karras, "
+        f"CFG scale: {rng.randint(4, 9)}, Seed: {rng.randint(0, 2**32)}, Size: 832x1216, "
+        f"Model hash: 6ce0161689, Model: hassakuXL_v13, Denoising strength: 0.4, "
+        f"Hires upscale: 1.5, Hires upscaler: R-ESRGAN 4x+ Anime6B, "
+        f"Lora hashes: \"hassakuStyle: 0a1b2c3d4e5f\", Version: v1.10.1"
+    )
+
+
+def make_swarmui_parameters(rng: random.Random, words: int) -> str:
+    """SwarmUI sui_image_params JSON."""
+    return json.dumps({
+        "sui_image_params": {
+            "prompt": make_prompt(rng, words),
+            "negativeprompt": make_prompt(rng, max(1, words // 4)),
+            "model": "hassakuXL_v13",
+            "seed": rng.randint(0, 2**32),
+            "steps": 30,
+            "cfgscale": 6.5,
+            "width": 1024,
+            "height": 1024,
+            "sampler": "euler_ancestral",
+            "scheduler": "karras",
+            "swarm_version": "0.9.5.0",
+        },
+        "sui_extra_data": {"date": "2025-01-01", "generation_time": "3.2 sec"},
+        "sui_models": [{"name": "hassakuXL_v13.safetensors", "param": "model", "hash": "0x" + "ab" * 32}],
+    })
+
+
+def make_novelai_comment(rng: random.Random, words: int) -> Dict[str, str]:
+    """NovelAI text chunks: Description plus the Comment JSON."""
+    prompt = make_prompt(rng, words)
+    comment = {
+        "prompt": prompt,
+        "uc": make_prompt(rng, max(1, words // 4)),
+        "steps": 28,
+        "scale": 5.0,
+        "seed": rng.randint(0, 2**32),
+        "sampler": "k_euler_ancestral",
+        "width": 832,
+        "height": 1216,
+    }
+    return {"Description": prompt, "Software": "NovelAI", "Comment": json.dumps(comment)}
+
+
+def make_comfyui_prompt(rng: random.Random, extra_nodes: int) -> str:
+    """ComfyUI prompt graph with a LoRA chain and extra unrelated nodes."""
+    nodes = {
+        "3": {"class_type": "KSampler", "inputs": {
+            "seed": rng.randint(0, 2**32), "steps": 25, "cfg": 6.0, "sampler_name": "euler",
+            "scheduler": "normal", "denoise": 1.0, "model": ["10", 0],
+            "positive": ["6", 0], "negative": ["7", 0], "latent_image": ["5", 0]}},
+        "4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "hassakuXL_v13.safetensors"}},
+        "5": {"class_type": "EmptyLatentImage", "inputs": {"width": 832, "height": 1216, "batch_size": 1}},
+        "6": {"class_type": "CLIPTextEncode", "inputs": {"text": make_prompt(rng, 60), "clip": ["10", 1]}},
+        "7": {"class_type": "CLIPTextEncode", "inputs": {"text": make_prompt(rng, 15), "clip": ["10", 1]}},
+        "10": {"class_type": "LoraLoader", "inputs": {
+            "lora_name": "hassakuStyle.safetensors", "strength_model": 0.7, "strength_clip": 0.7,
+            "model": ["4", 0], "clip": ["4", 1]}},
+    }
+    for i in range(extra_nodes):
+        node_id = str(100 + i)
+        nodes[node_id] = {"class_type": "CLIPTextEncode", "inputs": {
+            "text": make_prompt(rng, 20), "clip": [str(100 + i + 1), 0]}}
+    return json.dumps(nodes)
@@ -0,0 +1,446 @@
+# -*- coding: utf-8 -*-
+"""
+Local stand-in for the Discord REST API and gateway, enough for the bot
+(or the cluster launcher) to log in, identify its shards and stay
+connected without a real token.
+
+Usage: python -m benchmarks.fake_gateway [--port 8787]
+           [--guilds 10 --members 5000 --presence-rate 5 --message-rate 1]
+
+Then start the bot against it:
+
+    MECHA_API_BASE=http://127.0.0.1:8787/api/v10 \\
+    MECHA_GATEWAY_URL=ws://127.0.0.1:8787/gateway \\
+    TOKEN=fake python -m module.cluster --shards 4 --processes 2
+
+With --guilds, every shard receives synthetic guilds with members, and the
+traffic a busy server produces: presence updates, typing and messages,
+each only to sessions that identified with the matching intent. Member
+chunk requests are answered, so startup chunking costs what it would.
+
+GET /_fake/stats lists the shards that identified, the REST calls made and
+the events sent.
+
+@author: seesthenight & Circle D5
+"""
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set
+
+from aiohttp import web, WSMsgType
+
+logger = logging.getLogger(__name__)
+
+# ==================== Constants ====================
+BOT_ID = "100000000000000001"
+OWNER_ID = "100000000000000002"
+HEARTBEAT_INTERVAL = 41250
+
+OP_DISPATCH = 0
+OP_HEARTBEAT = 1
+OP_IDENTIFY = 2
+OP_RESUME = 6
+OP_REQUEST_MEMBERS = 8
+OP_HELLO = 10
+OP_HEARTBEAT_ACK = 11
+
+# Gateway intent bits
+INTENT_GUILDS = 1 << 0
+INTENT_GUILD_MEMBERS = 1 << 1
+INTENT_GUILD_PRESENCES = 1 << 8
+INTENT_GUILD_MESSAGES = 1 << 9
+INTENT_GUILD_MESSAGE_TYPING = 1 << 11
+INTENT_MESSAGE_CONTENT = 1 << 15
+
+DISCORD_EPOCH_MS = 1420070400000
+LARGE_THRESHOLD = 250
+CHUNK_SIZE = 1000
+ONLINE_FRACTION = 0.3
+TRAFFIC_TICK = 0.1
+JOINED_AT = "2024-01-01T00:00:00+00:00"
+
+BOT_USER = {
+    "id": BOT_ID,
+    "username": "MechaHassaku",
+    "discriminator": "0000",
+    "global_name": None,
+    "avatar": None,
+    "bot": True,
+    "flags": 0,
+    "verified": True,
+    "mfa_enabled": False,
+}
+OWNER_USER = {"id": OWNER_ID, "username": "owner", "discriminator": "0000", "global_name": None, "avatar": None}
+APPLICATION = {
+    "id": BOT_ID,
+    "name": "MechaHassaku",
+    "description": "",
+    "icon": None,
+    "bot_public": True,
+    "bot_require_code_grant": False,
+    "owner": OWNER_USER,
+    "verify_key": "0" * 64,
+    "flags": 0,
+}
+
+
+def json_response(payload: Any) -> web.Response:
+    # discord.py only decodes bodies whose content type is exactly application/json
+    return web.Response(body=json.dumps(payload).encode(), content_type="application/json")
+
+
+# ==================== Population ====================
+@dataclass
+class Population:
+    """Synthetic guilds; payloads are generated on demand."""
+    guilds: int = 0
+    members: int = 0
+    presence_rate: float = 0.0
+    typing_rate: float = 0.0
+    message_rate: float = 0.0
+
+    def guild_ids(self, shard_id: int, shard_count: int) -> List[int]:
+        ids = [(1000 + index) << 22 for index in range(self.guilds)]
+        return [guild_id for guild_id in ids if (guild_id >> 22) % shard_count == shard_id]
+
+    def member_id(self, guild_id: int, index: int) -> int:
+        return guild_id + 16 + index
+
+    @staticmethod
+    def user(user_id: int) -> Dict[str, Any]:
+        return {"id": str(user_id), "username": f"user{user_id % 1000000}", "discriminator": "0", "global_name": None, "avatar": None}
+
+    def member(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "user": user, "roles": [], "joined_at": JOINED_AT, "nick": None, "avatar": None,
+            "deaf": False, "mute": False, "flags": 0, "pending": False, "premium_since": None,
+        }
+
+    def presence(self, guild_id: int, user_id: int, status: str = "online") -> Dict[str, Any]:
+        return {
+            "user": {"id": str(user_id)}, "guild_id": str(guild_id), "status": status,
+            "activities": [], "client_status": {"desktop": status},
+        }
+
+    def members_of(self, guild_id: int) -> List[Dict[str, Any]]:
+        return [self.member(self.user(self.member_id(guild_id, index))) for index in range(self.members)]
+
+    def online_ids(self, guild_id: int) -> List[int]:
+        return [self.member_id(guild_id, index) for index in range(int(self.members * ONLINE_FRACTION))]
+
+    def guild(self, guild_id: int, intents: int) -> Dict[str, Any]:
+        large = self.members >= LARGE_THRESHOLD
+        bot_member = self.member(BOT_USER)
+        members = [bot_member]
+        presences = []
+        # Large guilds only carry the bot; the rest arrives through chunking
+        if not large and intents & INTENT_GUILD_MEMBERS:
+            members += self.members_of(guild_id)
+        if not large and intents & INTENT_GUILD_PRESENCES:
+            presences = [self.presence(guild_id, user_id) for user_id in self.online_ids(guild_id)]
+        return {
+            "id": str(guild_id),
+            "name": f"guild {guild_id >> 22}",
+            "owner_id": OWNER_ID,
+            "member_count": self.members + 1,
+            "large": large,
+            "roles": [{
+                "id": str(guild_id), "name": "@everyone", "permissions": "0", "position": 0,
+                "color": 0, "hoist": False, "managed": False, "mentionable": False, "flags": 0,
+            }],
+            "channels": [
+                {"id": str(guild_id + 1), "type": 0, "name": "general", "position": 0, "permission_overwrites": []},
+                {"id": str(guild_id + 2), "type": 0, "name": "prompts", "position": 1, "permission_overwrites": []},
+            ],
+            "members": members,
+            "presences": presences,
+            "voice_states": [],
+            "threads": [],
+            "emojis": [],
+            "stickers": [],
+            "features": [],
+            "stage_instances": [],
+            "guild_scheduled_events": [],
+        }
+
+
+def _snowflake_now(counter: int) -> str:
+    return str(((int(time.time() * 1000) - DISCORD_EPOCH_MS) << 22) | (counter & 0x3FFFFF))
+
+
+# ==================== Fake Discord ====================
+class FakeDiscord:
+    """REST routes and gateway sessions of the stand-in."""
+
+    def __init__(self, shard_count: int = 1, population: Optional[Population] = None):
+        self.shard_count = shard_count
+        self.population = population or Population()
+        self.events_sent: Counter = Counter()
+        self.bytes_sent = 0
+        self._rng = random.Random(1234)
+        self.sessions: Dict[str, web.WebSocketResponse] = {}
+        self.shards: Dict[str, List[int]] = {}
+        self.identified: Set[int] = set()
+        self.rest_calls: Counter = Counter()
+        self._session_ids = 0
+        self.base_url = ""
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self._count_calls])
+        app.router.add_get("/api/v10/users/@me", self._json(BOT_USER))
+        app.router.add_get("/api/v10/oauth2/applications/@me", self._json(APPLICATION))
+        app.router.add_get("/api/v10/applications/@me", self._json(APPLICATION))
+        app.router.add_get("/api/v10/gateway", self._gateway)
+        app.router.add_get("/api/v10/gateway/bot", self._gateway)
+        app.router.add_get("/gateway", self._websocket)
+        app.router.add_get("/gateway/", self._websocket)
+        app.router.add_get("/_fake/stats", self._stats)
+        return app
+
+    @web.middleware
+    async def _count_calls(self, request: web.Request, handler) -> web.StreamResponse:
+        if request.path.startswith("/api/"):
+            route = request.match_info.route.resource.canonical if request.match_info.route.resource else request.path
+            self.rest_calls[f"{request.method} {route}"] += 1
+        return await handler(request)
+
+    @staticmethod
+    def _json(payload: Dict[str, Any]):
+        async def handler(request: web.Request) -> web.Response:
+            return json_response(payload)
+        return handler
+
+    async def _gateway(self, request: web.Request) -> web.Response:
+        url = f"ws://{request.host}/gateway"
+        return json_response({
+            "url": url,
+            "shards": self.shard_count,
+            "session_start_limit": {"total": 1000, "remaining": 1000, "reset_after": 0, "max_concurrency": 1},
+        })
+
+    async def _stats(self, request: web.Request) -> web.Response:
+        return json_response({
+            "identified_shards": sorted(self.identified),
+            "sessions": {session: shards for session, shards in self.shards.items()},
+            "rest_calls": dict(self.rest_calls),
+            "events_sent": dict(self.events_sent),
+            "bytes_sent": self.bytes_sent,
+        })
+
+    # ---------- Gateway ----------
+    async def _websocket(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        session = _Session(self, ws)
+        await ws.send_str(json.dumps({"op": OP_HELLO, "d": {"heartbeat_interval": HEARTBEAT_INTERVAL}, "s": None, "t": None}))
+
+        try:
+            async for message in ws:
+                if message.type != WSMsgType.TEXT:
+                    continue
+                payload = json.loads(message.data)
+                op = payload.get("op")
+                if op == OP_HEARTBEAT:
+                    await ws.send_str(json.dumps({"op": OP_HEARTBEAT_ACK, "d": None, "s": None, "t": None}))
+                elif op in (OP_IDENTIFY, OP_RESUME):
+                    await session.identify(payload["d"], request.host)
+                elif op == OP_REQUEST_MEMBERS:
+                    await session.send_member_chunks(payload["d"])
+        finally:
+            session.close()
+        return ws
+
+
+class _Session:
+    """One gateway connection: its shard, intents and synthetic traffic."""
+
+    def __init__(self, fake: FakeDiscord, ws: web.WebSocketResponse):
+        self.fake = fake
+        self.ws = ws
+        self.session_id: Optional[str] = None
+        self.intents = 0
+        self.guild_ids: List[int] = []
+        self.sequence = 0
+        self._traffic: Optional[asyncio.Task] = None
+
+    async def dispatch(self, event: str, data: Any) -> None:
+        self.sequence += 1
+        frame = json.dumps({"op": OP_DISPATCH, "t": event, "s": self.sequence, "d": data})
+        self.fake.events_sent[event] += 1
+        self.fake.bytes_sent += len(frame)
+        await self.ws.send_str(frame)
+
+    async def identify(self, data: Dict[str, Any], host: str) -> None:
+        fake = self.fake
+        shard = data.get("shard") or [0, 1]
+        self.intents = data.get("intents", 0)
+        fake._session_ids += 1
+        self.session_id = f"fake-session-{fake._session_ids}"
+        fake.sessions[self.session_id] = self.ws
+        fake.shards[self.session_id] = shard
+        fake.identified.add(shard[0])
+        logger.info("Shard %d/%d identified (%s, intents %d)", shard[0], shard[1], self.session_id, self.intents)
+
+        self.guild_ids = fake.population.guild_ids(shard[0], shard[1])
+        await self.dispatch("READY", {
+            "v": 10,
+            "user": BOT_USER,
+            "guilds": [{"id": str(guild_id), "unavailable": True} for guild_id in self.guild_ids],
+            "session_id": self.session_id,
+            "resume_gateway_url": f"ws://{host}/gateway",
+            "shard": shard,
+            "application": {"id": BOT_ID, "flags": 0},
+        })
+        if self.intents & INTENT_GUILDS:
+            for guild_id in self.guild_ids:
+                await self.dispatch("GUILD_CREATE", fake.population.guild(guild_id, self.intents))
+        if self.guild_ids and self._traffic is None:
+            self._traffic = asyncio.create_task(self._run_traffic())
+
+    async def send_member_chunks(self, data: Dict[str, Any]) -> None:
+        """Answer a member request; Discord ignores it without the members intent."""
+        if not self.intents & INTENT_GUILD_MEMBERS:
+            return
+        population = self.fake.population
+        guild_id = int(data["guild_id"])
+        members = population.members_of(guild_id)
+        presences = data.get("presences") and self.intents & INTENT_GUILD_PRESENCES
+        online = set(population.online_ids(guild_id)) if presences else set()
+        chunk_count = max(1, -(-len(members) // CHUNK_SIZE))
+        for index in range(chunk_count):
+            chunk = members[index * CHUNK_SIZE:(index + 1) * CHUNK_SIZE]
+            payload = {
+                "guild_id": str(guild_id),
+                "members": chunk,
+                "chunk_index": index,
+                "chunk_count": chunk_count,
+                "nonce": data.get("nonce"),
+            }
+            if presences:
+                payload["presences"] = [
+                    population.presence(guild_id, int(member["user"]["id"]))
+                    for member in chunk if int(member["user"]["id"]) in online
+                ]
+            await self.dispatch("GUILD_MEMBERS_CHUNK", payload)
+
+    async def _run_traffic(self) -> None:
+        """Presence, typing and message events at the configured per-guild rates."""
+        population = self.fake.population
+        rng = self.fake._rng
+        streams = []
+        if self.intents & INTENT_GUILD_PRESENCES:
+            streams.append((population.presence_rate, self._presence))
+        if self.intents & INTENT_GUILD_MESSAGE_TYPING:
+            streams.append((population.typing_rate, self._typing))
+        if self.intents & INTENT_GUILD_MESSAGES:
+            streams.append((population.message_rate, self._message))
+        owed = [0.0] * len(streams)
+
+        while not self.ws.closed:
+            await asyncio.sleep(TRAFFIC_TICK)
+            for index, (rate, send) in enumerate(streams):
+                owed[index] += rate * TRAFFIC_TICK * len(self.guild_ids)
+                while owed[index] >= 1:
+                    owed[index] -= 1
+                    guild_id = rng.choice(self.guild_ids)
+                    user_id = population.member_id(guild_id, rng.randrange(max(1, population.members)))
+                    await send(guild_id, user_id, rng)
+
+    async def _presence(self, guild_id: int, user_id: int, rng: random.Random) -> None:
+        status = rng.choice(("online", "idle", "dnd", "offline"))
+        await self.dispatch("PRESENCE_UPDATE", self.fake.population.presence(guild_id, user_id, status))
+
+    async def _typing(self, guild_id: int, user_id: int, rng: random.Random) -> None:
+        population = self.fake.population
+        await self.dispatch("TYPING_START", {
+            "channel_id": str(guild_id + 1),
+            "guild_id": str(guild_id),
+            "user_id": str(user_id),
+            "timestamp": int(time.time()),
+            "member": population.member(population.user(user_id)),
+        })
+
+    async def _message(self, guild_id: int, user_id: int, rng: random.Random) -> None:
+        population = self.fake.population
+        member = population.member(population.user(user_id))
+        author = member.pop("user")
+        content = "hello there" if self.intents & INTENT_MESSAGE_CONTENT else ""
+        await self.dispatch("MESSAGE_CREATE", {
+            "id": _snowflake_now(self.sequence),
+            "channel_id": str(guild_id + 1),
+            "guild_id": str(guild_id),
+            "author": author,
+            "member": member,
+            "content": content,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime()),
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": [],
+            "pinned": False,
+            "type": 0,
+            "flags": 0,
+        })
+
+    def close(self) -> None:
+        if self._traffic is not None:
+            self._traffic.cancel()
+        if self.session_id is not None:
+            self.fake.sessions.pop(self.session_id, None)
+            logger.info("Session %s closed", self.session_id)
+
+
+# ==================== Entry Point ====================
+async def serve(fake: FakeDiscord, host: str, port: int) -> web.AppRunner:
+    """Start the stand-in on the running loop."""
+    runner = web.AppRunner(fake.app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    fake.base_url = f"http://{host}:{port}"
+    return runner
+
+
+async def _main(host: str, port: int, shards: int, population: Population) -> None:
+    fake = FakeDiscord(shards, population)
+    await serve(fake, host, port)
+    logger.info("Fake Discord on http://%s:%d (API /api/v10, gateway ws://%s:%d/gateway)", host, port, host, port)
+    await asyncio.Event().wait()
+
+
+def add_population_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--guilds", type=int, default=0, help="synthetic guilds across all shards")
+    parser.add_argument("--members", type=int, default=0, help="members per guild")
+    parser.add_argument("--presence-rate", type=float, default=0.0, help="presence updates per guild per second")
+    parser.add_argument("--typing-rate", type=float, default=0.0, help="typing events per guild per second")
+    parser.add_argument("--message-rate", type=float, default=0.0, help="messages per guild per second")
+
+
+def population_from_args(args: argparse.Namespace) -> Population:
+    return Population(args.guilds, args.members, args.presence_rate, args.typing_rate, args.message_rate)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--shards", type=int, default=1, help="shard count advertised by /gateway/bot")
+    add_population_arguments(parser)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)-8s %(name)s: %(message)s")
+    try:
+        asyncio.run(_main(args.host, args.port, args.shards, population_from_args(args)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Footprint of each gateway profile (module/gateway_profile.py): RSS,
+startup-to-ready time and gateway event volume, measured by running the
+bot in measurement mode against the fake gateway and a synthetic guild
+population.
+
+Usage:
+    python -m benchmarks.gateway_profiles [--profiles lean,standard,full]
+        [--guilds 20 --members 5000 --presence-rate 5 --typing-rate 1 --message-rate 1]
+        [--seconds 20] [--save report.json]
+
+Against real Discord, run main.py with MECHA_GATEWAY_PROFILE and
+MECHA_MEASURE_SECONDS set instead; the report is logged on exit.
+
+@author: seesthenight & Circle D5
+"""
+import os
+import sys
+import json
+import asyncio
+import argparse
+import tempfile
+from typing import Any, Dict, List
+
+from benchmarks.fake_gateway import FakeDiscord, add_population_arguments, population_from_args, serve
+
+HOST = "127.0.0.1"
+PORT = 8788
+# On top of the measured window: login, identify and chunking
+STARTUP_TIMEOUT = 120.0
+
+
+async def measure_profile(profile: str, port: int, seconds: float, workdir: str) -> Dict[str, Any]:
+    """Run the bot once with profile and return its measurement report."""
+    report_path = os.path.join(workdir, f"{profile}.json")
+    env = dict(os.environ)
+    env.update({
+        "TOKEN": "fake",
+        "MECHA_API_BASE": f"http://{HOST}:{port}/api/v10",
+        "MECHA_GATEWAY_URL": f"ws://{HOST}:{port}/gateway",
+        "MECHA_GATEWAY_PROFILE": profile,
+        "MECHA_MEASURE_SECONDS": str(seconds),
+        "MECHA_MEASURE_REPORT": report_path,
+        "METRICS_PORT": "0",
+        "INDEX_DB_PATH": os.path.join(workdir, f"{profile}.sqlite3"),
+        "LOG_LEVEL": "WARNING",
+    })
+    for name in ("MECHA_SHARD_COUNT", "MECHA_SHARD_IDS", "MECHA_SHARED_CACHE"):
+        env.pop(name, None)
+
+    process = await asyncio.create_subprocess_exec(sys.executable, "main.py", env=env)
+    try:
+        await asyncio.wait_for(process.wait(), seconds + STARTUP_TIMEOUT)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise RuntimeError(f"profile {profile} did not finish") from None
+
+    if not os.path.exists(report_path):
+        raise RuntimeError(f"profile {profile} exited with {process.returncode} without a report")
+    with open(report_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def print_reports(reports: List[Dict[str, Any]]) -> None:
+    print(f"{'profile':<10}{'RSS MB':>9}{'ready s':>9}{'events':>9}{'events/s':>10}{'members':>10}{'messages':>10}")
+    for report in reports:
+        print(
+            f"{report['profile']:<10}{report['rss_mb']:>9}{report['startup_to_ready_s']:>9}"
+            f"{report['events_total']:>9}{report['events_per_s']:>10}"
+            f"{report['cached_members']:>10}{report['cached_messages']:>10}"
+        )
+    for report in reports:
+        top = ", ".join(f"{event} {count}" for event, count in list(report["events"].items())[:6])
+        print(f"{report['profile']}: intents {', '.join(report['intents'])}")
+        print(f"{' ' * len(report['profile'])}  events {top}")
+
+
+async def _run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    fake = FakeDiscord(population=population_from_args(args))
+    runner = await serve(fake, HOST, args.port)
+    reports = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="mecha_profiles_") as workdir:
+            for profile in args.profiles.split(","):
+                print(f"Measuring {profile}...", flush=True)
+                reports.append(await measure_profile(profile.strip(), args.port, args.seconds, workdir))
+    finally:
+        await runner.cleanup()
+    return reports
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--profiles", default="lean,standard,full")
+    parser.add_argument("--seconds", type=float, default=20.0, help="steady-state window after ready")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--save", metavar="PATH", help="write the reports as JSON")
+    add_population_arguments(parser)
+    parser.set_defaults(guilds=20, members=5000, presence_rate=5.0, typing_rate=1.0, message_rate=1.0)
+    args = parser.parse_args()
+
+    reports = asyncio.run(_run(args))
+    print_reports(reports)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
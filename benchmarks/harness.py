@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+"""
+Local Discord stand-in for running the bot's handlers end to end: fake
+guilds, channels, messages, attachments and interactions that record
+every API call, plus an aiohttp CDN serving the attachments with Range
+support like cdn.discordapp.com.
+
+    async with Harness() as harness:
+        channel = harness.channel(AUTO_CHANNEL_NAME)
+        message = harness.upload(channel, [("a.png", png_bytes)])
+        await harness.on_message(message)
+        print(harness.recorder.calls, harness.cdn.requests)
+
+main is imported on first use with the metrics endpoint disabled and the
+search index in a temporary file, and its extensions are loaded without
+logging in; the handlers are called on the loaded cogs.
+
+@author: seesthenight & Circle D5
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import itertools
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+from module.ingest import read_image_size
+
+# ==================== Constants ====================
+SNOWFLAKE_START = 1200000000000000000
+CONTENT_TYPES = {".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".webp": "image/webp", ".gif": "image/gif"}
+
+_snowflakes = itertools.count(SNOWFLAKE_START)
+
+
+def snowflake() -> int:
+    return next(_snowflakes)
+
+
+def load_main():
+    """Import main without a metrics port or the real search index."""
+    os.environ.setdefault("METRICS_PORT", "0")
+    os.environ.setdefault("INDEX_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="mecha_harness_"), "index.sqlite3"))
+    import main
+    return main
+
+
+# ==================== Recording ====================
+@dataclass
+class SentMessage:
+    kind: str
+    channel_id: int
+    content: Optional[str]
+    embed: Any = None
+    files: List[str] = field(default_factory=list)
+    ephemeral: bool = False
+    at: float = field(default_factory=time.perf_counter)
+
+
+class Recorder:
+    """Discord API calls made by the bot, by kind, and the messages it sent."""
+
+    def __init__(self):
+        self.calls: Counter = Counter()
+        self.sent: List[SentMessage] = []
+
+    def call(self, kind: str) -> None:
+        self.calls[kind] += 1
+
+    def message(self, kind: str, channel_id: int, content: Optional[str] = None, **kwargs) -> SentMessage:
+        self.call(kind)
+        files = kwargs.get("files") or ([kwargs["file"]] if kwargs.get("file") else [])
+        sent = SentMessage(
+            kind=kind,
+            channel_id=channel_id,
+            content=content if content is not None else kwargs.get("content"),
+            embed=kwargs.get("embed"),
+            files=[getattr(file, "filename", str(file)) for file in files],
+            ephemeral=kwargs.get("ephemeral", False),
+        )
+        self.sent.append(sent)
+        return sent
+
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+
+# ==================== CDN ====================
+class FakeCDN:
+    """Serves attachment bytes over HTTP, honouring Range requests."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.files: Dict[str, bytes] = {}
+        self.requests = 0
+        self.bytes_served = 0
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/attachments/{path:.*}", self._serve)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def add(self, path: str, data: bytes) -> str:
+        """Publish data and return its URL."""
+        self.files[path] = data
+        return f"http://{self.host}:{self.port}/attachments/{path}"
+
+    async def _serve(self, request: web.Request) -> web.Response:
+        data = self.files.get(request.match_info["path"])
+        self.requests += 1
+        if data is None:
+            raise web.HTTPNotFound()
+        try:
+            byte_range = request.http_range
+        except ValueError:
+            raise web.HTTPRequestRangeNotSatisfiable()
+        if byte_range.start is None and byte_range.stop is None:
+            self.bytes_served += len(data)
+            return web.Response(body=data, content_type="application/octet-stream")
+
+        start = byte_range.start or 0
+        if start >= len(data):
+            raise web.HTTPRequestRangeNotSatisfiable(headers={"Content-Range": f"bytes */{len(data)}"})
+        body = data[byte_range]
+        self.bytes_served += len(body)
+        return web.Response(
+            status=206,
+            body=body,
+            content_type="application/octet-stream",
+            headers={"Content-Range": f"bytes {start}-{start + len(body) - 1}/{len(data)}"},
+        )
+
+
+# ==================== Discord Objects ====================
+@dataclass(eq=False)
+class FakeUser:
+    id: int
+    name: str
+    bot: bool = False
+
+    def __str__(self) -> str:
+        return self.name
+
+
+@dataclass(eq=False)
+class FakeAttachment:
+    id: int
+    filename: str
+    url: str
+    size: int
+    content_type: Optional[str]
+    width: Optional[int]
+    height: Optional[int]
+    data: bytes = field(repr=False, default=b"")
+    recorder: Optional[Recorder] = field(repr=False, default=None)
+
+    async def read(self) -> bytes:
+        self.recorder.call("attachment_read")
+        return self.data
+
+
+@dataclass
+class FakeReference:
+    message_id: int
+
+
+class FakeGuild:
+    def __init__(self, id: int, name: str = "harness"):
+        self.id = id
+        self.name = name
+        self.channels: Dict[int, "FakeChannel"] = {}
+        self.bot_user = FakeUser(snowflake(), "MechaHassaku", bot=True)
+
+    def get_channel(self, channel_id: int) -> Optional["FakeChannel"]:
+        return self.channels.get(channel_id)
+
+
+class FakeChannel:
+    def __init__(self, id: int, name: str, guild: FakeGuild, recorder: Recorder):
+        self.id = id
+        self.name = name
+        self.guild = guild
+        self.recorder = recorder
+        self.messages: Dict[int, "FakeMessage"] = {}
+        guild.channels[id] = self
+
+    def __str__(self) -> str:
+        return self.name
+
+    async def send(self, content: Optional[str] = None, **kwargs) -> "FakeMessage":
+        self.recorder.message("send", self.id, content, **kwargs)
+        return FakeMessage(snowflake(), self, self.guild.bot_user, content or "")
+
+    async def typing(self) -> None:
+        self.recorder.call("typing")
+
+    async def fetch_message(self, message_id: int) -> "FakeMessage":
+        self.recorder.call("fetch_message")
+        return self.messages[message_id]
+
+
+class FakeMessage:
+    def __init__(
+        self,
+        id: int,
+        channel: FakeChannel,
+        author: FakeUser,
+        content: str = "",
+        attachments: Sequence[FakeAttachment] = (),
+        reference: Optional[FakeReference] = None
+    ):
+        self.id = id
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content
+        self.attachments = list(attachments)
+        self.reference = reference
+        self.jump_url = f"https://discord.com/channels/{channel.guild.id}/{channel.id}/{id}"
+
+    async def reply(self, content: Optional[str] = None, **kwargs) -> "FakeMessage":
+        self.channel.recorder.message("reply", self.channel.id, content, **kwargs)
+        return FakeMessage(snowflake(), self.channel, self.guild.bot_user, content or "")
+
+
+class _FakeResponse:
+    def __init__(self, interaction: "FakeInteraction"):
+        self._interaction = interaction
+
+    async def defer(self, ephemeral: bool = False, **kwargs) -> None:
+        self._interaction.recorder.call("defer")
+
+
+class _FakeFollowup:
+    def __init__(self, interaction: "FakeInteraction"):
+        self._interaction = interaction
+
+    async def send(self, content: Optional[str] = None, **kwargs) -> None:
+        self._interaction.recorder.message("followup", self._interaction.channel_id, content, **kwargs)
+
+
+class FakeInteraction:
+    """The parts of discord.Interaction the slash commands use."""
+
+    def __init__(self, channel: FakeChannel, user: FakeUser, recorder: Recorder):
+        self.id = snowflake()
+        self.channel = channel
+        self.channel_id = channel.id
+        self.guild = channel.guild
+        self.user = user
+        self.recorder = recorder
+        self.response = _FakeResponse(self)
+        self.followup = _FakeFollowup(self)
+
+
+# ==================== Harness ====================
+class Harness:
+    """A fake guild, its CDN, and entry points into the extensions' handlers."""
+
+    def __init__(self):
+        self.main = load_main()
+        self.runtime = None
+        self.analysis = None
+        self.recorder = Recorder()
+        self.cdn = FakeCDN()
+        self.guild = FakeGuild(snowflake())
+        self.user = FakeUser(snowflake(), "uploader")
+
+    async def __aenter__(self) -> "Harness":
+        await self.cdn.start()
+        client = self.main.client
+        for extension in self.main.EXTENSIONS:
+            if extension not in client.extensions:
+                await client.load_extension(extension)
+        from module import runtime
+        self.runtime = runtime
+        self.analysis = client.get_cog("Analysis")
+        # checkparameters resolves message links through the client cache
+        self.main.client.get_guild = lambda guild_id: self.guild if guild_id == self.guild.id else None
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        del self.main.client.get_guild
+        from module.download import close_session
+        await close_session()
+        await self.cdn.stop()
+
+    def channel(self, name: str) -> FakeChannel:
+        for channel in self.guild.channels.values():
+            if channel.name == name:
+                return channel
+        return FakeChannel(snowflake(), name, self.guild, self.recorder)
+
+    def attachment(self, channel: FakeChannel, filename: str, data: bytes) -> FakeAttachment:
+        attachment_id = snowflake()
+        url = self.cdn.add(f"{channel.id}/{attachment_id}/{filename}", data)
+        dimensions = read_image_size(data) or (None, None)
+        return FakeAttachment(
+            id=attachment_id,
+            filename=filename,
+            url=url,
+            size=len(data),
+            content_type=CONTENT_TYPES.get(os.path.splitext(filename)[1].lower()),
+            width=dimensions[0],
+            height=dimensions[1],
+            data=data,
+            recorder=self.recorder,
+        )
+
+    def upload(self, channel: FakeChannel, files: Sequence[Tuple[str, bytes]], content: str = "") -> FakeMessage:
+        """Post a message with attachments as the test user."""
+        attachments = [self.attachment(channel, filename, data) for filename, data in files]
+        message = FakeMessage(snowflake(), channel, self.user, content, attachments)
+        channel.messages[message.id] = message
+        return message
+
+    def reply_to(self, message: FakeMessage, content: str) -> FakeMessage:
+        """Post a reply to message as the test user."""
+        reply = FakeMessage(snowflake(), message.channel, self.user, content, reference=FakeReference(message.id))
+        message.channel.messages[reply.id] = reply
+        return reply
+
+    # ---------- Entry points ----------
+    async def on_message(self, message: FakeMessage) -> None:
+        await self.analysis.on_message(message)
+
+    async def analyze_all_attachments(self, message: FakeMessage) -> None:
+        await self._analysis_module().analyze_all_attachments(message)
+
+    async def model_request_detector(self, message: FakeMessage) -> None:
+        await self._analysis_module().model_request_detector(message)
+
+    async def checkparameters(self, message: FakeMessage, private_mode: bool = False) -> FakeInteraction:
+        """Run /checkparameters on a link to message."""
+        interaction = FakeInteraction(message.channel, self.user, self.recorder)
+        await self.analysis.checkparameters.callback(self.analysis, interaction, private_mode, message.jump_url)
+        return interaction
+
+    async def reload(self):
+        """Reload parsers and extensions in place, as the owner's reload command does."""
+        from module.hotreload import reload_all
+        report = await reload_all(self.main.client)
+        self.analysis = self.main.client.get_cog("Analysis")
+        return report
+
+    def _analysis_module(self):
+        return sys.modules[type(self.analysis).__module__]
+
+    async def drain(self, timeout: float = 30.0) -> None:
+        """Wait until the send scheduler has nothing queued."""
+        deadline = time.monotonic() + timeout
+        while self.runtime.send_scheduler.pending() and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
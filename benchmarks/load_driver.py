@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+End-to-end load test of the message handlers against the local Discord
+stand-in (benchmarks/harness.py): uploads arrive at a fixed rate, some
+followed by "which model?" replies or /checkparameters, and each event is
+timed from its arrival until the bot's last reply to it. --reloads hot
+reloads the parsers and extensions that many times during the run.
+
+Usage:
+    python -m benchmarks.load_driver [--rate 5] [--duration 20] [--channels 1]
+        [--size 512] [--repeat 0.1] [--model-requests 0.1] [--checks 0.1]
+        [--send-rate 1.0] [--reloads 0] [--save report.json]
+
+@author: seesthenight & Circle D5
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from benchmarks import corpus
+from benchmarks.bench_hotpath import _percentile
+from benchmarks.harness import FakeChannel, FakeMessage, Harness, snowflake
+
+SEED = 1234
+MODEL_REQUEST_TEXT = "which model is this?"
+
+
+# ==================== Workload ====================
+def build_images(rng: random.Random, count: int, size: int, repeat: float) -> List[bytes]:
+    """One image per upload; a `repeat` fraction re-posts an earlier one."""
+    images: List[bytes] = []
+    for _ in range(count):
+        if images and rng.random() < repeat:
+            images.append(rng.choice(images))
+            continue
+        text = {"parameters": corpus.make_webui_parameters(rng, rng.randint(20, 120))}
+        images.append(corpus.make_png(size, size, text, rng=rng))
+    return images
+
+
+class LoadDriver:
+    """Replays the workload and collects per-event latencies."""
+
+    def __init__(self, harness: Harness, channels: List[FakeChannel], args: argparse.Namespace):
+        self.harness = harness
+        self.channels = channels
+        self.args = args
+        self.rng = random.Random(SEED)
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.uploads: List[FakeMessage] = []
+        self.reload_ms: List[float] = []
+
+    async def _timed(self, kind: str, arrival: float, handler) -> None:
+        try:
+            await handler
+        except Exception as err:
+            self.errors[kind] += 1
+            print(f"{kind} failed: {type(err).__name__}: {err}", file=sys.stderr)
+        else:
+            self.latencies[kind].append(time.perf_counter() - arrival)
+
+    async def _reload(self, at: float) -> None:
+        await asyncio.sleep(max(0.0, at - time.perf_counter()))
+        start = time.perf_counter()
+        report = await self.harness.reload()
+        self.reload_ms.append((time.perf_counter() - start) * 1000)
+        for name, err in report.failed.items():
+            self.errors["reload"] += 1
+            print(f"reload of {name} failed: {err}", file=sys.stderr)
+
+    async def run(self, images: List[bytes]) -> float:
+        """Fire events on schedule (open loop) and wait for all of them."""
+        interval = 1.0 / self.args.rate
+        tasks = []
+        start = time.perf_counter()
+        span = len(images) * interval
+        for number in range(1, self.args.reloads + 1):
+            tasks.append(asyncio.create_task(self._reload(start + span * number / (self.args.reloads + 1))))
+        for index, data in enumerate(images):
+            arrival = start + index * interval
+            await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+
+            channel = self.channels[index % len(self.channels)]
+            message = self.harness.upload(channel, [(f"upload_{index}.png", data)])
+            self.uploads.append(message)
+            tasks.append(asyncio.create_task(self._timed("upload", arrival, self.harness.on_message(message))))
+
+            if self.rng.random() < self.args.model_requests:
+                reply = self.harness.reply_to(self.rng.choice(self.uploads), MODEL_REQUEST_TEXT)
+                tasks.append(asyncio.create_task(self._timed("model_request", arrival, self.harness.on_message(reply))))
+            if self.rng.random() < self.args.checks:
+                target = self.rng.choice(self.uploads)
+                tasks.append(asyncio.create_task(self._timed("checkparameters", arrival, self.harness.checkparameters(target))))
+
+        await asyncio.gather(*tasks)
+        await self.harness.drain()
+        return time.perf_counter() - start
+
+
+# ==================== Report ====================
+def build_report(driver: LoadDriver, images: List[bytes], elapsed: float) -> Dict[str, Any]:
+    harness = driver.harness
+    uploads = len(images)
+    events = {}
+    for kind, values in sorted(driver.latencies.items()):
+        values_ms = sorted(value * 1000 for value in values)
+        events[kind] = {
+            "count": len(values_ms),
+            "errors": driver.errors.get(kind, 0),
+            "p50_ms": round(_percentile(values_ms, 50), 1),
+            "p90_ms": round(_percentile(values_ms, 90), 1),
+            "p99_ms": round(_percentile(values_ms, 99), 1),
+            "max_ms": round(values_ms[-1], 1),
+        }
+    return {
+        "uploads": uploads,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_per_s": round(uploads / elapsed, 2) if elapsed else 0.0,
+        "events": events,
+        "api_calls": dict(harness.recorder.calls),
+        "api_calls_per_image": round(harness.recorder.total_calls() / uploads, 2),
+        "cdn_requests_per_image": round(harness.cdn.requests / uploads, 2),
+        "cdn_bytes_per_image": round(harness.cdn.bytes_served / uploads),
+        "coalesced_sends": harness.runtime.send_scheduler.coalesced,
+        "reload_ms": [round(value, 1) for value in driver.reload_ms],
+        "reload_errors": driver.errors.get("reload", 0),
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"{report['uploads']} uploads in {report['elapsed_s']}s ({report['throughput_per_s']}/s)")
+    print(f"{'event':<16}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for kind, stats in report["events"].items():
+        print(
+            f"{kind:<16}{stats['count']:>7}{stats['errors']:>8}{stats['p50_ms']:>10}"
+            f"{stats['p90_ms']:>10}{stats['p99_ms']:>10}{stats['max_ms']:>10}"
+        )
+    calls = ", ".join(f"{kind} {count}" for kind, count in sorted(report["api_calls"].items()))
+    print(f"Discord API calls per image: {report['api_calls_per_image']} ({calls})")
+    print(f"CDN requests per image: {report['cdn_requests_per_image']}, {report['cdn_bytes_per_image']} bytes")
+    print(f"Coalesced sends: {report['coalesced_sends']}")
+    if report["reload_ms"]:
+        print(f"Reloads: {report['reload_ms']} ms, {report['reload_errors']} failed")
+
+
+# ==================== Entry Point ====================
+async def _run(args: argparse.Namespace) -> Dict[str, Any]:
+    rng = random.Random(SEED)
+    images = build_images(rng, max(1, int(args.rate * args.duration)), args.size, args.repeat)
+    print(f"{len(images)} uploads at {args.rate}/s over {args.channels} channel(s), "
+          f"{sum(map(len, images)) / len(images) / 1e3:.0f} kB each")
+
+    async with Harness() as harness:
+        if args.send_rate:
+            harness.runtime.send_scheduler.rate = args.send_rate
+        auto_channel = harness.runtime.AUTO_CHANNEL_NAME
+        channels = [FakeChannel(snowflake(), auto_channel, harness.guild, harness.recorder) for _ in range(args.channels)]
+        driver = LoadDriver(harness, channels, args)
+        elapsed = await driver.run(images)
+        return build_report(driver, images, elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rate", type=float, default=5.0, help="uploads per second")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of arrivals")
+    parser.add_argument("--channels", type=int, default=1, help="auto-share channels the uploads are spread over")
+    parser.add_argument("--size", type=int, default=512, help="image side in pixels")
+    parser.add_argument("--repeat", type=float, default=0.1, help="fraction of uploads re-posting an earlier image")
+    parser.add_argument("--model-requests", type=float, default=0.1, help="chance of a 'which model' reply per upload")
+    parser.add_argument("--checks", type=float, default=0.1, help="chance of a /checkparameters per upload")
+    parser.add_argument("--send-rate", type=float, help="messages per second per channel (default: the bot's)")
+    parser.add_argument("--reloads", type=int, default=0, help="hot reloads spread over the run")
+    parser.add_argument("--save", metavar="PATH", help="write the report as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(_run(args))
+    print_report(report)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    from module.worker import shutdown_executor
+    shutdown_executor(wait=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Event loop latency while analysing concurrent uploads, inline vs worker pool.
+
+Usage: python -m benchmarks.loop_latency [--uploads N] [--size PX]
+
+@author: seesthenight & Circle D5
+"""
+import time
+import asyncio
+import argparse
+import statistics
+from typing import List
+
+from module.analysis import analyze_image_bytes
+from module.worker import run_in_worker, shutdown_executor
+from benchmarks.corpus import make_png, WEBUI_PARAMETERS
+
+TICK_INTERVAL = 0.005
+
+
+async def _ticker(lags: List[float], stop: asyncio.Event) -> None:
+    """Record how late each scheduled wake-up of the loop is."""
+    while not stop.is_set():
+        expected = time.perf_counter() + TICK_INTERVAL
+        await asyncio.sleep(TICK_INTERVAL)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def _inline_job(data: bytes, thumbnail: bool) -> None:
+    analyze_image_bytes(data, thumbnail)
+
+
+async def _pool_job(data: bytes, thumbnail: bool) -> None:
+    await run_in_worker(analyze_image_bytes, data, thumbnail)
+
+
+async def _run(mode: str, data: bytes, uploads: int, thumbnail: bool) -> None:
+    job = _inline_job if mode == "inline" else _pool_job
+    lags: List[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(lags, stop))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(job(data, thumbnail) for _ in range(uploads)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await ticker
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    p99 = lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))]
+    print(
+        f"{mode:>7}: total {elapsed:6.2f}s | loop lag mean {statistics.mean(lags_ms):7.2f}ms "
+        f"p99 {p99:7.2f}ms max {lags_ms[-1]:7.2f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--uploads", type=int, default=8)
+    parser.add_argument("--size", type=int, default=2048)
+    args = parser.parse_args()
+
+    try:
+        import PIL  # noqa: F401
+        thumbnail = True
+    except ImportError:
+        print("Pillow not installed: benchmarking metadata extraction only")
+        thumbnail = False
+
+    data = make_png(args.size, args.size, {"parameters": WEBUI_PARAMETERS})
+    print(f"{args.uploads} concurrent uploads of {len(data) / 1e6:.1f} MB")
+
+    for mode in ("inline", "pool"):
+        asyncio.run(_run(mode, data, args.uploads, thumbnail))
+    shutdown_executor(wait=True)
+
+
+if __name__ == "__main__":
+    main()
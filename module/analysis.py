@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+CPU-bound image analysis jobs, safe to run in worker processes.
+
+The parsers are looked up through their modules on every call, so a hot
+reload (module/hotreload.py) takes effect without re-importing this module.
+
+@author: seesthenight & Circle D5
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from module.metadata import extract_metadata
+import module.parser
+import module.comfyui
+from module.report import render_report
+
+# Metadata keys that mark an image as analysable
+REQUIRED_KEYS = ("parameters", "prompt", "Comment")
+
+# ==================== Result Object ====================
+@dataclass
+class AnalysisResult:
+    """Outcome of analysing one image; plain data so it pickles cheaply."""
+    metadata: Dict[str, Any]
+    parameters: Optional[Dict[str, Any]] = None
+    report: bytes = b""
+    report_filename: str = ""
+    thumbnail: Optional[bytes] = None
+    # Seconds spent per stage inside the worker
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def has_parameters(self) -> bool:
+        return self.parameters is not None
+
+
+@dataclass
+class CachedAnalysis:
+    """An analysis together with what was rendered from it for Discord."""
+    result: AnalysisResult
+    thumbnail: Optional[bytes] = None
+    tags: Optional[List[str]] = None
+    embed: Optional[Dict[str, Any]] = None
+
+    def size(self) -> int:
+        """Approximate memory held by the entry, for cache accounting."""
+        return (
+            len(self.result.report)
+            + len(self.thumbnail or b"")
+            + sum(len(str(value)) for value in self.result.metadata.values())
+        )
+
+
+# ==================== Parameter Parsing ====================
+def parse_parameters(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Parse generation parameters from image metadata."""
+    ed = {}
+
+    # WebUI format
+    if "parameters" in data:
+        ed = module.parser.parse_generation_parameters(data["parameters"])
+        ed["ui_type"] = "webui"
+
+    # ComfyUI format
+    elif "prompt" in data:
+        ed["ui_type"] = "comfyui"
+        ed["ComfyUI AI Params"] = data["prompt"]
+        ed.update(module.comfyui.parse_comfyui_prompt(data["prompt"]))
+        # Minimal fields for embed if the graph could not be resolved
+        ed.setdefault("Prompt", "ComfyUI workflow detected. Full metadata attached below :arrow_double_down: ")
+
+    # Novel AI format
+    elif "Comment" in data:
+        ed = module.parser.parse_novelai_parameters(data)
+        ed["Novel AI Params"] = True
+        ed["ui_type"] = "novelai"
+
+    return ed
+
+
+# ==================== Worker Jobs ====================
+def analyze_image_bytes(data: bytes, render_thumbnail: bool = False) -> AnalysisResult:
+    """Extract, parse and report on image bytes. Runs inside the worker pool."""
+    timings = {}
+    start = time.perf_counter()
+    metadata = extract_metadata(data)
+    timings["extract"] = time.perf_counter() - start
+    if not any(key in metadata for key in REQUIRED_KEYS):
+        return AnalysisResult(metadata=metadata, timings=timings)
+
+    start = time.perf_counter()
+    parameters = parse_parameters(metadata)
+    timings["parse"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    report, report_filename = render_report(metadata)
+    timings["report"] = time.perf_counter() - start
+
+    thumbnail = None
+    if render_thumbnail:
+        from module.thumbnail import render_thumbnail as _render
+        start = time.perf_counter()
+        thumbnail = _render(data)
+        timings["thumbnail"] = time.perf_counter() - start
+
+    return AnalysisResult(
+        metadata=metadata,
+        parameters=parameters,
+        report=report,
+        report_filename=report_filename,
+        thumbnail=thumbnail,
+        timings=timings,
+    )
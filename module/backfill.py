@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+Resumable crawl of channel history that indexes past image attachments
+without replying to them.
+
+Messages are read oldest first in pages after a cursor saved in the image
+index, so a restarted crawl continues where the previous one stopped and
+later runs pick up whatever was posted during downtime.
+
+@author: seesthenight & Circle D5
+"""
+import os
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, List, Optional
+
+import discord
+
+from module.MechaHassakuException import MechaHassakuError
+from module.store import BackfillCursor, ImageIndex
+
+logger = logging.getLogger(__name__)
+
+# ==================== Configuration ====================
+BACKFILL_CONCURRENCY = int(os.environ.get("BACKFILL_CONCURRENCY", "2"))
+BACKFILL_PAGE_SIZE = 100
+PROGRESS_INTERVAL = 10.0
+
+# Pause between pages; grows on rate limits and shrinks again on success
+BACKOFF_MIN_DELAY = 0.5
+BACKOFF_MAX_DELAY = 120.0
+# A page where at least this share of downloads failed is treated as throttled
+FAILURE_BACKOFF_RATIO = 0.5
+
+
+# ==================== Progress ====================
+@dataclass
+class BackfillProgress:
+    """Counters of one crawl, reported while it runs."""
+    channel_id: int
+    messages: int = 0
+    images: int = 0
+    indexed: int = 0
+    skipped: int = 0
+    failed: int = 0
+    rate_limited: int = 0
+    done: bool = False
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def images_per_sec(self) -> float:
+        elapsed = self.elapsed
+        return self.images / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        state = "Finished" if self.done else "Running"
+        return (
+            f"{state} backfill of <#{self.channel_id}>: {self.messages} messages, "
+            f"{self.images} images ({self.indexed} indexed, {self.skipped} already indexed, "
+            f"{self.failed} failed), {self.rate_limited} rate limits, "
+            f"{self.images_per_sec:.1f} images/sec over {self.elapsed:.0f}s"
+        )
+
+
+class AdaptiveBackoff:
+    """Delay between pages: doubled on rate limits, halved after clean pages."""
+
+    def __init__(self, min_delay: float = BACKOFF_MIN_DELAY, max_delay: float = BACKOFF_MAX_DELAY):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.delay = min_delay
+
+    def success(self) -> None:
+        self.delay = max(self.min_delay, self.delay / 2)
+
+    def throttled(self, retry_after: float = 0.0) -> None:
+        self.delay = min(self.max_delay, max(self.delay * 2, retry_after))
+
+    async def wait(self) -> None:
+        await asyncio.sleep(self.delay)
+
+
+def _retry_after(err: discord.HTTPException) -> float:
+    """Read Retry-After from a 429 response, if present."""
+    headers = getattr(getattr(err, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+# ==================== Crawler ====================
+AnalyzeFunc = Callable[[discord.Attachment], Awaitable]
+RecordFunc = Callable[[discord.Message, discord.Attachment, object], None]
+ProgressFunc = Callable[[BackfillProgress], Awaitable[None]]
+
+
+class BackfillCrawler:
+    """
+    Index the image attachments of one channel's history.
+
+    analyze and record are the bot's own analyze_attachment and
+    record_analysis, so results share the analysis cache and the index.
+    """
+
+    def __init__(
+        self,
+        channel: discord.abc.Messageable,
+        index: ImageIndex,
+        analyze: AnalyzeFunc,
+        record: RecordFunc,
+        is_image: Callable[[discord.Attachment], bool],
+        concurrency: int = BACKFILL_CONCURRENCY,
+        page_size: int = BACKFILL_PAGE_SIZE,
+        on_progress: Optional[ProgressFunc] = None
+    ):
+        self.channel = channel
+        self.index = index
+        self.analyze = analyze
+        self.record = record
+        self.is_image = is_image
+        self.page_size = page_size
+        self.on_progress = on_progress
+        self.progress = BackfillProgress(channel.id)
+        self.backoff = AdaptiveBackoff()
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._last_report = 0.0
+
+    async def run(self) -> BackfillProgress:
+        """Crawl from the saved cursor up to the newest message."""
+        cursor = await asyncio.to_thread(self.index.load_cursor, self.channel.id)
+        processed = cursor.processed
+        after = discord.Object(id=cursor.cursor_id) if cursor.cursor_id else None
+        logger.info("Backfill of channel %s starting after message %s", self.channel.id, cursor.cursor_id)
+
+        while True:
+            page = await self._fetch_page(after)
+            if not page:
+                break
+
+            failed_before = self.progress.failed
+            attempted = await self._process_page(page)
+            processed += attempted
+            self.progress.messages += len(page)
+            after = page[-1]
+            self.index.save_cursor(BackfillCursor(self.channel.id, page[-1].id, processed))
+
+            if attempted and self.progress.failed - failed_before >= attempted * FAILURE_BACKOFF_RATIO:
+                self.backoff.throttled()
+            else:
+                self.backoff.success()
+
+            await self._report()
+            if len(page) < self.page_size:
+                break
+            await self.backoff.wait()
+
+        self.progress.done = True
+        await self._report(force=True)
+        logger.info("%s", self.progress.summary())
+        return self.progress
+
+    async def _fetch_page(self, after: Optional[discord.abc.Snowflake]) -> List[discord.Message]:
+        """Read one page of history, backing off while Discord rate limits us."""
+        while True:
+            try:
+                return [
+                    message async for message in
+                    self.channel.history(limit=self.page_size, after=after, oldest_first=True)
+                ]
+            except discord.HTTPException as err:
+                if err.status != 429:
+                    raise
+                self.progress.rate_limited += 1
+                self.backoff.throttled(_retry_after(err))
+                logger.warning("Backfill rate limited, waiting %.1fs", self.backoff.delay)
+                await self.backoff.wait()
+
+    async def _process_page(self, page: List[discord.Message]) -> int:
+        """Analyze the page's new image attachments. Returns how many were attempted."""
+        pending = [
+            (message, attachment)
+            for message in page if not message.author.bot
+            for attachment in message.attachments if self.is_image(attachment)
+        ]
+        self.progress.images += len(pending)
+        if not pending:
+            return 0
+
+        indexed = await asyncio.to_thread(self.index.indexed_ids, [attachment.id for _, attachment in pending])
+        pending = [(message, attachment) for message, attachment in pending if attachment.id not in indexed]
+        self.progress.skipped += len(indexed)
+
+        await asyncio.gather(*(self._process_attachment(message, attachment) for message, attachment in pending))
+        return len(pending)
+
+    async def _process_attachment(self, message: discord.Message, attachment: discord.Attachment) -> None:
+        async with self._semaphore:
+            try:
+                entry = await self.analyze(attachment)
+            except MechaHassakuError:
+                self.progress.failed += 1
+                return
+        self.record(message, attachment, entry)
+        if entry.result.has_parameters:
+            self.progress.indexed += 1
+
+    async def _report(self, force: bool = False) -> None:
+        if self.on_progress is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_report < PROGRESS_INTERVAL:
+            return
+        self._last_report = now
+        try:
+            await self.on_progress(self.progress)
+        except discord.HTTPException as err:
+            logger.warning("Could not report backfill progress: %s", err)
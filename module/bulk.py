@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Offline bulk metadata extraction over directories and zip/tar archives.
+
+Usage:
+    python -m module.bulk IMAGES_DIR archive.zip -o results.jsonl
+    python -m module.bulk IMAGES_DIR --format csv -o results.csv --checkpoint done.txt
+
+Does not import discord or need the TOKEN environment variable.
+
+@author: seesthenight & Circle D5
+"""
+import os
+import sys
+import csv
+import json
+import time
+import tarfile
+import zipfile
+import argparse
+import multiprocessing
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+from module.metadata import PARAMETER_KEYS, extract_metadata, metadata_at_front, scan_metadata
+from module.stealth import png_has_alpha
+from module.analysis import REQUIRED_KEYS, parse_parameters
+
+# ==================== Configuration ====================
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+READ_BLOCK_SIZE = 64 * 1024
+CHECKPOINT_FLUSH_EVERY = 100
+
+CSV_FIELDS = [
+    "source", "ui_type", "Prompt", "Negative prompt", "Steps", "Sampler", "Schedule type",
+    "CFG scale", "Seed", "Size-1", "Size-2", "Model", "Model hash", "LoRAs", "error",
+]
+
+# (kind, source id, payload): kind is "file", "zip" or "bytes"
+Item = Tuple[str, str, Any]
+
+# ==================== Input Discovery ====================
+def _is_image_name(name: str) -> bool:
+    return name.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def iter_items(paths, done: Set[str]) -> Iterator[Item]:
+    """Yield work items for every image under paths, skipping sources in done."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    full = os.path.join(root, name)
+                    if _is_image_name(name) and full not in done:
+                        yield "file", full, full
+        elif zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                for name in archive.namelist():
+                    source = f"{path}::{name}"
+                    if _is_image_name(name) and source not in done:
+                        yield "zip", source, (path, name)
+        elif tarfile.is_tarfile(path):
+            # Tar members are only readable in order, so read them here
+            with tarfile.open(path, "r:*") as archive:
+                for member in archive:
+                    source = f"{path}::{member.name}"
+                    if member.isfile() and _is_image_name(member.name) and source not in done:
+                        yield "bytes", source, archive.extractfile(member).read()
+        elif os.path.isfile(path) and path not in done:
+            yield "file", path, path
+
+
+# ==================== Worker ====================
+_open_zips: Dict[str, zipfile.ZipFile] = {}
+
+
+def _read_metadata_prefix(stream) -> bytes:
+    """
+    Read a PNG or JPEG only up to its image data; other formats are read fully,
+    as are alpha PNGs without text chunks, which may hold stealth pnginfo.
+    """
+    data = stream.read(READ_BLOCK_SIZE)
+    block_size = READ_BLOCK_SIZE
+    while True:
+        text, complete = scan_metadata(data)
+        needs_pixels = complete and png_has_alpha(data) and not any(key in text for key in PARAMETER_KEYS)
+        if complete and not needs_pixels:
+            return data
+        if needs_pixels or not metadata_at_front(data):
+            return data + stream.read()
+        block = stream.read(block_size)
+        if not block:
+            return data
+        data += block
+        block_size *= 2
+
+
+def _read_item(item: Item) -> bytes:
+    kind, _, payload = item
+    if kind == "bytes":
+        return payload
+    if kind == "zip":
+        archive_path, name = payload
+        archive = _open_zips.get(archive_path)
+        if archive is None:
+            archive = _open_zips[archive_path] = zipfile.ZipFile(archive_path)
+        with archive.open(name) as stream:
+            return _read_metadata_prefix(stream)
+    with open(payload, "rb") as stream:
+        return _read_metadata_prefix(stream)
+
+
+def process_item(item: Item) -> Dict[str, Any]:
+    """Extract and parse one image. Runs in a worker process."""
+    record: Dict[str, Any] = {"source": item[1]}
+    try:
+        metadata = extract_metadata(_read_item(item))
+        if not any(key in metadata for key in REQUIRED_KEYS):
+            record["ui_type"] = None
+            return record
+        parameters = parse_parameters(metadata)
+        # Raw graphs are large and already summarised by the parsed fields
+        parameters.pop("ComfyUI AI Params", None)
+        record.update(parameters)
+    except Exception as err:
+        record["error"] = f"{type(err).__name__}: {err}"
+    return record
+
+
+# ==================== Output ====================
+class _RecordWriter:
+    """Streams records as JSONL or CSV."""
+
+    def __init__(self, stream, fmt: str, write_header: bool):
+        self.stream = stream
+        self.fmt = fmt
+        if fmt == "csv":
+            self.csv = csv.DictWriter(stream, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            if write_header:
+                self.csv.writeheader()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if self.fmt == "csv":
+            self.csv.writerow(record)
+        else:
+            self.stream.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+
+def _load_checkpoint(path: Optional[str]) -> Set[str]:
+    if not path or not os.path.isfile(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+
+# ==================== Entry Point ====================
+def run(paths, output: Optional[str], fmt: str, checkpoint: Optional[str], workers: int, chunksize: int) -> Dict[str, Any]:
+    """Process all images under paths and return a throughput summary."""
+    done = _load_checkpoint(checkpoint)
+    resuming = bool(done) and output is not None and os.path.isfile(output)
+
+    out = open(output, "a" if resuming else "w", encoding="utf-8", newline="") if output else sys.stdout
+    checkpoint_file = open(checkpoint, "a", encoding="utf-8") if checkpoint else None
+    writer = _RecordWriter(out, fmt, write_header=not resuming)
+
+    processed = errors = 0
+    start = time.perf_counter()
+    try:
+        with multiprocessing.Pool(workers) as pool:
+            for record in pool.imap_unordered(process_item, iter_items(paths, done), chunksize):
+                writer.write(record)
+                processed += 1
+                if "error" in record:
+                    errors += 1
+                if checkpoint_file:
+                    checkpoint_file.write(record["source"] + "\n")
+                    if processed % CHECKPOINT_FLUSH_EVERY == 0:
+                        out.flush()
+                        checkpoint_file.flush()
+    finally:
+        out.flush()
+        if out is not sys.stdout:
+            out.close()
+        if checkpoint_file:
+            checkpoint_file.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "processed": processed,
+        "skipped": len(done),
+        "errors": errors,
+        "seconds": round(elapsed, 2),
+        "images_per_sec": round(processed / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Extract generation parameters from images in bulk.")
+    parser.add_argument("paths", nargs="+", help="image files, directories, zip or tar archives")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    parser.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    parser.add_argument("--checkpoint", help="file recording processed sources, for resuming")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunksize", type=int, default=16)
+    args = parser.parse_args(argv)
+
+    summary = run(args.paths, args.output, args.format, args.checkpoint, args.workers, args.chunksize)
+    print(
+        f"Processed {summary['processed']} images ({summary['errors']} errors, "
+        f"{summary['skipped']} already done) in {summary['seconds']}s: "
+        f"{summary['images_per_sec']} images/sec",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
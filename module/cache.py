@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Size- and TTL-bounded LRU cache with hit/miss counters.
+
+@author: seesthenight & Circle D5
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    LRU cache evicting entries once they are older than ttl seconds, or when
+    the entry count or the total size reported by sizeof exceeds its limits.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda value: 0)
+
+        self._data: "OrderedDict[Hashable, Tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        item = self._data.get(key)
+        return item is not None and not self._expired(item[0])
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.monotonic() - stored_at > self.ttl
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, counting a hit or a miss."""
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+
+        if self._expired(item[0]):
+            self._remove(key)
+            self.evictions += 1
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return item[2]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store value under key, evicting the least recently used entries if needed."""
+        if key in self._data:
+            self._remove(key)
+
+        size = self.sizeof(value)
+        self._data[key] = (time.monotonic(), size, value)
+        self._bytes += size
+
+        while self._data and (
+            len(self._data) > self.max_entries
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove key and return its value."""
+        if key not in self._data:
+            return default
+        value = self._data[key][2]
+        self._remove(key)
+        return value
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return counters describing the cache's effectiveness."""
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+Cluster launcher: runs the bot as several processes, each owning a block
+of shards of one AutoShardedBot deployment, so decoding is spread over
+all cores instead of one event loop.
+
+    python -m module.cluster --shards 4 --processes 2
+
+Every child gets its shard IDs, its own metrics port and the path of the
+shared analysis cache through the environment. Children are started one
+after another to stay within Discord's identify limit and are restarted
+with a backoff if they crash.
+
+For local testing, MECHA_API_BASE and MECHA_GATEWAY_URL point the bot at a
+fake Discord (see benchmarks/fake_gateway.py).
+
+@author: seesthenight & Circle D5
+"""
+import os
+import sys
+import time
+import signal
+import logging
+import argparse
+import subprocess
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# ==================== Configuration ====================
+DEFAULT_SHARED_CACHE = "./mecha_shared_cache.sqlite3"
+DEFAULT_METRICS_PORT = 9108
+# Discord allows one identify per 5 seconds per concurrency bucket
+IDENTIFY_INTERVAL = 5.0
+IDENTIFY_CONCURRENCY = int(os.environ.get("MECHA_IDENTIFY_CONCURRENCY", "1"))
+RESTART_MIN_DELAY = 1.0
+RESTART_MAX_DELAY = 60.0
+# A child that ran this long is considered healthy again
+STABLE_AFTER = 60.0
+POLL_INTERVAL = 0.5
+
+
+# ==================== Endpoint Overrides ====================
+def apply_endpoint_overrides() -> None:
+    """Point discord.py at MECHA_API_BASE / MECHA_GATEWAY_URL when set."""
+    api_base = os.environ.get("MECHA_API_BASE")
+    gateway_url = os.environ.get("MECHA_GATEWAY_URL")
+    if api_base:
+        from discord.http import Route
+        Route.BASE = api_base.rstrip("/")
+        logger.warning("Using Discord API at %s", Route.BASE)
+    if gateway_url:
+        import yarl
+        from discord.gateway import DiscordWebSocket
+        DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(gateway_url)
+        logger.warning("Using Discord gateway at %s", gateway_url)
+
+
+# ==================== Shard Layout ====================
+def split_shards(shard_count: int, processes: int) -> List[List[int]]:
+    """Split shard IDs into contiguous, evenly sized blocks."""
+    processes = max(1, min(processes, shard_count))
+    base, extra = divmod(shard_count, processes)
+    blocks, start = [], 0
+    for index in range(processes):
+        size = base + (1 if index < extra else 0)
+        blocks.append(list(range(start, start + size)))
+        start += size
+    return blocks
+
+
+@dataclass
+class Child:
+    cluster_id: int
+    shard_ids: List[int]
+    env: Dict[str, str]
+    process: Optional[subprocess.Popen] = None
+    started: float = 0.0
+    restarts: int = 0
+    next_start: float = 0.0
+    delay: float = field(default=RESTART_MIN_DELAY)
+
+
+def child_env(cluster_id: int, shard_ids: List[int], shard_count: int, processes: int,
+              shared_cache: str, metrics_port: int) -> Dict[str, str]:
+    env = dict(os.environ)
+    env["MECHA_CLUSTER_ID"] = str(cluster_id)
+    env["MECHA_SHARD_COUNT"] = str(shard_count)
+    env["MECHA_SHARD_IDS"] = ",".join(str(shard) for shard in shard_ids)
+    env["MECHA_SHARED_CACHE"] = shared_cache
+    env["METRICS_PORT"] = str(metrics_port + cluster_id) if metrics_port else "0"
+    # Share the cores between the children's worker pools
+    env.setdefault("MECHA_WORKERS", str(max(1, (os.cpu_count() or 1) // processes)))
+    return env
+
+
+# ==================== Supervisor ====================
+class Cluster:
+    """Starts, watches and stops the bot processes."""
+
+    def __init__(self, children: List[Child], command: List[str]):
+        self.children = children
+        self.command = command
+        self.stopping = False
+
+    def _start(self, child: Child) -> None:
+        logger.info("Starting cluster %d (shards %s)", child.cluster_id, child.env["MECHA_SHARD_IDS"])
+        child.process = subprocess.Popen(self.command, env=child.env)
+        child.started = time.monotonic()
+
+    def _identify_delay(self, child: Child) -> float:
+        # Each shard identifies in turn inside the child; wait them out
+        return IDENTIFY_INTERVAL * len(child.shard_ids) / IDENTIFY_CONCURRENCY
+
+    def stop(self, *_args) -> None:
+        if self.stopping:
+            return
+        self.stopping = True
+        logger.info("Stopping cluster")
+        for child in self.children:
+            if child.process is not None and child.process.poll() is None:
+                child.process.terminate()
+
+    def run(self) -> int:
+        """Run until interrupted; returns the exit code."""
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+
+        for index, child in enumerate(self.children):
+            if self.stopping:
+                break
+            self._start(child)
+            if index < len(self.children) - 1:
+                self._sleep(self._identify_delay(child))
+
+        while not self.stopping:
+            now = time.monotonic()
+            for child in self.children:
+                if child.process is None or child.process.poll() is None:
+                    continue
+                if child.next_start == 0.0:
+                    if now - child.started > STABLE_AFTER:
+                        child.delay = RESTART_MIN_DELAY
+                    logger.warning(
+                        "Cluster %d exited with %s, restarting in %.0fs",
+                        child.cluster_id, child.process.returncode, child.delay
+                    )
+                    child.next_start = now + child.delay
+                    child.delay = min(child.delay * 2, RESTART_MAX_DELAY)
+                elif now >= child.next_start:
+                    child.next_start = 0.0
+                    child.restarts += 1
+                    self._start(child)
+            time.sleep(POLL_INTERVAL)
+
+        for child in self.children:
+            if child.process is not None:
+                try:
+                    child.process.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    child.process.kill()
+        return 0
+
+    def _sleep(self, seconds: float) -> None:
+        deadline = time.monotonic() + seconds
+        while not self.stopping and time.monotonic() < deadline:
+            time.sleep(min(POLL_INTERVAL, deadline - time.monotonic()))
+
+
+# ==================== Entry Point ====================
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run MechaHassaku as a sharded multi-process cluster.")
+    parser.add_argument("--shards", type=int, default=int(os.environ.get("MECHA_SHARD_COUNT", "2")),
+                        help="total shard count of the deployment")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1,
+                        help="number of bot processes the shards are spread over")
+    parser.add_argument("--shared-cache", default=os.environ.get("MECHA_SHARED_CACHE", DEFAULT_SHARED_CACHE),
+                        help="SQLite file holding the analysis cache shared by the processes")
+    parser.add_argument("--metrics-port", type=int, default=int(os.environ.get("METRICS_PORT", DEFAULT_METRICS_PORT)),
+                        help="metrics port of the first process, the others count up (0 disables)")
+    parser.add_argument("--script", default="main.py", help="bot entry point")
+    args = parser.parse_args(argv)
+
+    from module.log import setup_logging
+    setup_logging()
+
+    if args.shards < 1:
+        parser.error("--shards must be at least 1")
+    blocks = split_shards(args.shards, args.processes)
+    children = [
+        Child(index, shard_ids, child_env(index, shard_ids, args.shards, len(blocks), args.shared_cache, args.metrics_port))
+        for index, shard_ids in enumerate(blocks)
+    ]
+    return Cluster(children, [sys.executable, args.script]).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Owner-only maintenance commands.
+
+`$reload` or `/reload` swaps in new parser and command code without
+touching the gateway connection (module/hotreload.py). Handlers and
+worker jobs already running finish on the code they started with.
+`$hashindex` rebuilds the model hash index from its dump the same way.
+
+@author: seesthenight & Circle D5
+"""
+import time
+import logging
+
+from discord import app_commands
+from discord.ext import commands
+
+from module.hotreload import reload_all
+from module.runtime import invalidate_rendered, model_hashes
+
+
+logger = logging.getLogger(__name__)
+
+
+# ==================== Cog ====================
+class Admin(commands.Cog):
+    """Commands for the bot owner."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @commands.hybrid_command(name="reload", description="Reload parsers and commands without reconnecting")
+    @app_commands.default_permissions()
+    @commands.is_owner()
+    async def reload(self, ctx: commands.Context) -> None:
+        """Re-import the parsers, recycle the workers and reload every extension."""
+        start_time = time.perf_counter()
+        try:
+            report = await reload_all(self.bot)
+        except Exception as err:
+            logger.exception("Parser reload failed")
+            await ctx.send(f">>> Parser reload failed, nothing was changed:\n`{type(err).__name__}: {err}`", ephemeral=True)
+            return
+
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        logger.info("Reloaded %s and %s in %.0f ms", report.parsers, report.extensions, elapsed_ms)
+        lines = [
+            f">>> Reloaded {len(report.parsers)} parser modules and "
+            f"{len(report.extensions)} extensions in `{elapsed_ms:.0f}ms`."
+        ]
+        if report.failed:
+            lines.append("Kept the previous version of:")
+            lines.extend(f"`{name}`: {type(err).__name__}: {err}" for name, err in report.failed.items())
+        await ctx.send("\n".join(lines), ephemeral=True)
+
+    @commands.hybrid_command(name="hashindex", description="Reload the model and LoRA hash index from its dump")
+    @app_commands.default_permissions()
+    @commands.is_owner()
+    async def hashindex(self, ctx: commands.Context) -> None:
+        """Rebuild the hash index from MECHA_HASH_INDEX and swap it in."""
+        if not model_hashes.path:
+            await ctx.send("No hash index is configured (MECHA_HASH_INDEX).", ephemeral=True)
+            return
+        start_time = time.perf_counter()
+        try:
+            index = await model_hashes.refresh()
+        except Exception as err:
+            logger.exception("Hash index refresh failed")
+            await ctx.send(f">>> Hash index refresh failed, the old index stays:\n`{type(err).__name__}: {err}`", ephemeral=True)
+            return
+        invalidate_rendered()
+
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        await ctx.send(
+            f">>> Hash index: `{len(index)}` hashes of `{index.models}` models, loaded in `{elapsed_ms:.0f}ms`.",
+            ephemeral=True
+        )
+
+    async def cog_command_error(self, ctx: commands.Context, error: commands.CommandError) -> None:
+        if isinstance(error, commands.NotOwner):
+            await ctx.send("Only the bot owner can do that.", ephemeral=True)
+            return
+        logger.error("Admin command failed: %s", error)
+
+
+async def setup(bot: commands.Bot) -> None:
+    await bot.add_cog(Admin(bot))
@@ -0,0 +1,788 @@
+# -*- coding: utf-8 -*-
+"""
+Analysis extension: embeds, attachment analysis, the auto-share channel,
+model questions, /checkparameters and /backfill.
+
+Reloadable with the owner-only reload command; its state lives in
+module/runtime.py, so a reload keeps caches and queued sends.
+
+@author: seesthenight & Circle D5
+"""
+import io
+import os
+import time
+import asyncio
+import logging
+import math
+import re
+import functools
+from typing import Optional, Tuple, Dict, Any, Callable, List
+
+import discord
+from discord.ext import commands
+from discord import app_commands
+from discord import File, Embed, Interaction, Attachment
+
+from module.MechaHassakuException import MechaHassakuError
+from module.thumbnail import THUMBNAIL_FILENAME, content_hash, get_cached_thumbnail, cache_thumbnail
+from module.download import read_attachment_metadata
+from module.ingest import ImageRejected, check_attachment, check_image_header, memory_budget
+from module.analysis import CachedAnalysis, analyze_image_bytes
+from module.worker import run_in_worker
+from module.store import ImageRecord
+from module.backfill import BackfillCrawler, BackfillProgress
+from module.hashindex import parse_hash_list
+from module.sender import PRIORITY_INTERACTIVE, PRIORITY_REPLY, PRIORITY_STATUS
+from module.metrics import ANALYSIS_FAILURES, ANALYSIS_QUEUE_DEPTH, observe_stage, stage_timer
+from module.runtime import (
+    ASSET_SORRY,
+    AUTO_CHANNEL_NAME,
+    analysis_cache,
+    analysis_semaphore,
+    backfills,
+    detector_stats,
+    image_index,
+    model_answer_cache,
+    model_hashes,
+    send_scheduler,
+    shared_cache,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# ==================== Configuration ====================
+EMBED_FIELD_LIMIT = 1000
+
+# Model request detection: keywords are a cheap prefilter for the regex
+MODEL_REQUEST_KEYWORDS = ("model", "which")
+MODEL_REQUEST_PATTERN = re.compile(
+    r"(which\s+one|which\s+model|the\s+model|what\s+model|model\s+pls|model\s+please)",
+    re.IGNORECASE
+)
+
+# How long to wait for another process analysing the same image
+SHARED_CACHE_WAIT = 15.0
+SHARED_CACHE_POLL = 0.25
+
+# History backfill of the auto channel after downtime
+BACKFILL_ON_START = os.environ.get("BACKFILL_ON_START", "0") == "1"
+
+NO_PARAMETERS_MESSAGE = "No parameters detected. Upload the image instead of pasting it."
+
+
+# ==================== Embed Creation ====================
+def add_big_field(embed: Embed, name: str, txt: str, inline: bool = False) -> None:
+    """Add a field to embed, splitting into multiple fields if text exceeds limit."""
+    if len(txt) < EMBED_FIELD_LIMIT:
+        embed.add_field(name=name, value=txt, inline=inline)
+    else:
+        chunks = math.ceil(len(txt) / EMBED_FIELD_LIMIT)
+        for i in range(chunks):
+            start = i * EMBED_FIELD_LIMIT
+            end = (i + 1) * EMBED_FIELD_LIMIT
+            text_value = txt[start:end]
+            embed.add_field(name=f"{name}({i})", value=text_value, inline=inline)
+
+
+def create_pnginfo_view(
+    pnginfo_kv: Dict[str, Any],
+    thumbnail: Optional[bytes] = None,
+    thumbnail_url: Optional[str] = None,
+    tags: Optional[List[str]] = None
+) -> tuple[Embed, Optional[File]]:
+    """
+    Create an embed displaying PNG generation parameters.
+    The thumbnail is either uploaded from bytes or linked from thumbnail_url.
+    """
+    if tags is None:
+        tags = _detect_tags(pnginfo_kv)
+    title_tags = "   ".join(f"` {tag} `" for tag in tags) if tags else "FAILED TO GET TAGS"
+    
+    embed = Embed(
+        title=f"Image Prompt & Settings :tools:\n{title_tags}",
+        color=0x7101fa
+    )
+    
+    # Only add embed fields for ComfyUI if its node graph could be resolved
+    is_comfyui = pnginfo_kv.get("ui_type") == "comfyui"
+    if not is_comfyui or any(key in pnginfo_kv for key in ("Seed", "Model", "Steps")):
+        _add_prompt_fields(embed, pnginfo_kv)
+        _add_generation_fields(embed, pnginfo_kv)
+        _add_hires_fields(embed, pnginfo_kv)
+        _add_model_fields(embed, pnginfo_kv)
+    
+    if is_comfyui:
+        embed.description = "ComfyUI workflow detected. Full metadata attached below :arrow_double_down:"
+    
+    # Remove metadata keys not needed in embed
+    for key in ['ComfyUI AI Params', 'Novel AI Params', 'Generation date', 'Generation time', 'SwarmUI version', 'Aspect ratio']:
+        pnginfo_kv.pop(key, None)
+    
+    ifile = None
+    if thumbnail is not None:
+        ifile = File(io.BytesIO(thumbnail), filename=THUMBNAIL_FILENAME)
+        embed.set_thumbnail(url=f"attachment://{THUMBNAIL_FILENAME}")
+    elif thumbnail_url:
+        embed.set_thumbnail(url=thumbnail_url)
+    
+    return embed, ifile
+
+
+def _detect_tags(pnginfo_kv: Dict[str, Any]) -> list[str]:
+    """Detect and return tags based on image metadata."""
+    tags = []
+    logger.debug("Detecting tags for %s", pnginfo_kv)
+    
+    # Detect UI type
+    prompt_val = str(pnginfo_kv.get('Prompt', ''))
+    
+    if 'sui_image_params' in prompt_val or 'SwarmUI version' in pnginfo_kv:
+        tags.append('SWARM UI')
+    elif 'ComfyUI AI Params' in pnginfo_kv:
+        tags.append('COMFY UI')
+    elif 'Novel AI Params' in pnginfo_kv:
+        tags.append('NOVEL AI')
+    elif 'Prompt' in pnginfo_kv:
+        tags.append('WEBUI')
+
+    # Detect model type
+    model = pnginfo_kv.get('Model', '').lower()
+    if model:
+        if any(keyword in model for keyword in ['illustrious', 'noob', 'wai']):
+            tags.append('ILLUSTRIOUS')
+        elif 'xl' in model or 'sdxl' in model:
+            tags.append('SDXL')
+        elif 'pony' in model:
+            tags.append('PONY')
+        elif 'flux' in model:
+            tags.append('FLUX')
+    
+    # Detect LoRA type
+    prompt = pnginfo_kv.get('Prompt', '').lower()
+    if 'lora' in prompt or '<lora:' in prompt or 'LoRAs' in pnginfo_kv:
+        tags.append('LORA')
+    elif 'locon' in prompt:
+        tags.append('LOCON')
+    elif 'loha' in prompt:
+        tags.append('LOHA')
+    
+    # Detect upscaling
+    if 'Hires upscaler' in pnginfo_kv or 'Refiner steps' in pnginfo_kv:
+        tags.append('HIRES')
+    
+    return tags
+
+
+
+def _add_prompt_fields(embed: Embed, kv: Dict[str, Any]) -> None:
+    """Add prompt-related fields to embed."""
+    if 'Prompt' in kv:
+        add_big_field(embed, '__Prompt__ :keyboard:', kv['Prompt'], False)
+    if 'Negative prompt' in kv:
+        add_big_field(embed, '__Negative Prompt__ :no_entry_sign:', kv['Negative prompt'], False)
+
+
+def _add_generation_fields(embed: Embed, kv: Dict[str, Any]) -> None:
+    """Add generation parameter fields to embed."""
+    fields = [
+        ('Seed', '__Seed__ :game_die:', True),
+        ('Sampler', '__Sampler__ :cyclone:', True),
+        ('CFG scale', '__CFG Scale__ :level_slider:', True),
+        ('Steps', '__Steps__ :person_walking:', True),
+        ('Clip skip', '__Clip Skip__ :paperclip:', True),
+    ]
+    
+    for key, name, inline in fields:
+        if key in kv:
+            embed.add_field(name=name, value=kv[key], inline=inline)
+    # Add scheduler if present (SwarmUI/ComfyUI)
+    if 'Schedule type' in kv and kv['Schedule type'] != 'Automatic':
+        embed.add_field(name='__Scheduler__ :calendar:', value=kv['Schedule type'], inline=True)
+    # Image size (special handling)
+    if 'Size-1' in kv and 'Size-2' in kv:
+        size = f"{kv['Size-1']}x{kv['Size-2']}"
+        embed.add_field(name='__Image Size__ :straight_ruler:', value=size, inline=True)
+
+
+def _add_hires_fields(embed: Embed, kv: Dict[str, Any]) -> None:
+    """Add hires fix fields to embed."""
+    if 'Hires upscaler' not in kv:
+        return
+    
+    embed.add_field(name='__Hires. Upscaler__ :arrow_double_up:', value=kv['Hires upscaler'], inline=True)
+    
+    if 'Hires upscale' in kv:
+        embed.add_field(name='__Hires. Upscale__ :eight_spoked_asterisk:', value=kv['Hires upscale'], inline=True)
+    
+    if 'Denoising strength' in kv:
+        embed.add_field(name='__Denoising Strength__ :muscle:', value=kv['Denoising strength'], inline=True)
+
+
+def _add_model_fields(embed: Embed, kv: Dict[str, Any]) -> None:
+    """Add model-related fields to embed."""
+    model = kv.get('Model')
+    if model:
+        is_xl = any(tag in model.upper() for tag in ['XL', 'SDXL'])
+        name = '__Model__ :regional_indicator_x::regional_indicator_l:' if is_xl else '__Model__ :art:'
+        embed.add_field(name=name, value=model, inline=True)
+    
+    if 'Model hash' in kv:
+        embed.add_field(name='__Model Hash__ :key:', value=_describe_hash(kv['Model hash']), inline=True)
+    
+    # Add VAE if present
+    if 'VAE' in kv:
+        embed.add_field(name='__VAE__ :file_folder:', value=kv['VAE'], inline=True)
+    
+    # Add LoRAs if present (ComfyUI specific)
+    if 'LoRAs' in kv:
+        add_big_field(embed, '__LoRAs__ :jigsaw:', kv['LoRAs'], inline=False)
+    
+    # WebUI lists the LoRAs it applied as "name: hash, ..."
+    lora_hashes = parse_hash_list(kv.get('Lora hashes', ''))
+    if lora_hashes:
+        lines = [f"{name}: {_describe_hash(value)}" for name, value in lora_hashes]
+        add_big_field(embed, '__LoRA Hashes__ :jigsaw:', "\n".join(lines), inline=False)
+
+
+def _describe_hash(value: str) -> str:
+    """The hash, followed by the model it names in the hash index if known."""
+    info = model_hashes.resolve(value)
+    return f"{value} ({info.label()})" if info else value
+    
+
+
+# ==================== Image Analysis ====================
+def _is_image(attachment: Attachment) -> bool:
+    """Return True if the attachment is an image."""
+    return bool(attachment.content_type) and attachment.content_type.startswith("image")
+
+
+async def analyze_attachment(attachment: Attachment) -> CachedAnalysis:
+    """
+    Download and analyze a single image attachment.
+    Results are cached by attachment ID and content hash, so repeated
+    lookups of the same attachment skip the download entirely. In cluster
+    mode the other processes' results are reused through the shared cache.
+    Raises MechaHassakuError on failure.
+    """
+    attachment_key = ("attachment", attachment.id)
+    entry = analysis_cache.get(attachment_key)
+    if entry is None:
+        entry = await shared_get(f"attachment:{attachment.id}")
+    if entry is not None:
+        analysis_cache.set(attachment_key, entry)
+        return entry
+    
+    ANALYSIS_QUEUE_DEPTH.inc()
+    claimed_key = None
+    try:
+        # Reject oversized uploads from Discord's declared size before downloading
+        reserved = check_attachment(attachment)
+        async with analysis_semaphore, memory_budget.reserve(reserved):
+            with stage_timer("download"):
+                downloaded_byte, is_full_file = await read_attachment_metadata(attachment)
+            check_image_header(downloaded_byte)
+            
+            # Same bytes seen under another attachment (e.g. a repost)
+            hash_key = ("content", content_hash(downloaded_byte))
+            shared_key = f"content:{hash_key[1]}"
+            entry = analysis_cache.get(hash_key)
+            if entry is None:
+                entry, claimed = await shared_claim_or_wait(shared_key)
+                if entry is not None:
+                    await shared_alias(f"attachment:{attachment.id}", shared_key)
+                elif claimed:
+                    claimed_key = shared_key
+            if entry is not None:
+                analysis_cache.set(attachment_key, entry)
+                return entry
+            
+            # Only render a thumbnail if we already hold the whole image,
+            # otherwise let Discord show the original attachment
+            thumbnail = get_cached_thumbnail(hash_key[1]) if is_full_file else None
+            
+            # Extract and parse off the event loop
+            result = await run_in_worker(
+                analyze_image_bytes,
+                downloaded_byte,
+                is_full_file and thumbnail is None
+            )
+        
+        for stage, seconds in result.timings.items():
+            observe_stage(stage, seconds)
+        
+        if result.thumbnail is not None:
+            thumbnail = result.thumbnail
+            result.thumbnail = None
+            cache_thumbnail(hash_key[1], thumbnail)
+        
+        entry = CachedAnalysis(result=result, thumbnail=thumbnail)
+        analysis_cache.set(attachment_key, entry)
+        analysis_cache.set(hash_key, entry)
+        if await shared_put(shared_key, entry, [f"attachment:{attachment.id}"]):
+            claimed_key = None
+        return entry
+    
+    except Exception as err:
+        _handle_analysis_error(err)
+    
+    finally:
+        ANALYSIS_QUEUE_DEPTH.dec()
+        if claimed_key is not None:
+            await shared_release(claimed_key)
+
+
+# ==================== Shared Cache ====================
+async def shared_get(key: str) -> Optional[CachedAnalysis]:
+    """Return a result stored by any process of the cluster."""
+    if shared_cache is None:
+        return None
+    try:
+        return await asyncio.to_thread(shared_cache.get, key)
+    except Exception as err:
+        logger.warning("Shared cache read failed: %s", err)
+        return None
+
+
+async def shared_claim_or_wait(key: str) -> Tuple[Optional[CachedAnalysis], bool]:
+    """
+    Claim key for this process, or wait while another process analyses it.
+    Returns (its result, claimed); (None, False) means analyse unclaimed.
+    """
+    if shared_cache is None:
+        return None, False
+    
+    entry = await shared_get(key)
+    if entry is not None:
+        return entry, False
+    
+    deadline = time.monotonic() + SHARED_CACHE_WAIT
+    try:
+        while not await asyncio.to_thread(shared_cache.claim, key):
+            await asyncio.sleep(SHARED_CACHE_POLL)
+            entry = await shared_get(key)
+            if entry is not None or time.monotonic() > deadline:
+                return entry, False
+    except Exception as err:
+        logger.warning("Shared cache claim failed: %s", err)
+        return None, False
+    
+    # The previous holder may have finished just before the claim
+    entry = await shared_get(key)
+    if entry is not None:
+        await shared_release(key)
+        return entry, False
+    return None, True
+
+
+async def shared_put(key: str, entry: CachedAnalysis, aliases: List[str]) -> bool:
+    """Publish a result to the cluster; this also releases the claim on key."""
+    if shared_cache is None:
+        return False
+    try:
+        await asyncio.to_thread(shared_cache.set, key, entry, aliases)
+        return True
+    except Exception as err:
+        logger.warning("Shared cache write failed: %s", err)
+        return False
+
+
+async def shared_alias(alias: str, key: str) -> None:
+    if shared_cache is None:
+        return
+    try:
+        await asyncio.to_thread(shared_cache.alias, alias, key)
+    except Exception as err:
+        logger.warning("Shared cache write failed: %s", err)
+
+
+async def shared_release(key: str) -> None:
+    try:
+        await asyncio.to_thread(shared_cache.release, key)
+    except Exception as err:
+        logger.warning("Shared cache release failed: %s", err)
+
+
+async def send_analysis(
+    attachment: Attachment,
+    entry: CachedAnalysis,
+    response_destination: Callable,
+    channel_id: int,
+    ephemeral: bool = False,
+    priority: int = PRIORITY_REPLY
+) -> None:
+    """
+    Reply with the parameters of an analyzed attachment. Embed, thumbnail
+    and report go out as one message through the send scheduler.
+    """
+    result = entry.result
+    message_kwargs: Dict[str, Any] = {"ephemeral": True} if ephemeral else {}
+    
+    try:
+        if not result.has_parameters:
+            message_kwargs["content"] = NO_PARAMETERS_MESSAGE
+        else:
+            # Create embed, or rebuild it from the cached payload
+            with stage_timer("embed"):
+                if entry.embed is None:
+                    ed = dict(result.parameters)
+                    logger.debug("Parsed parameters: %s", ed)
+                    entry.tags = _detect_tags(ed)
+                    embed, ifile = create_pnginfo_view(ed, entry.thumbnail, attachment.url, entry.tags)
+                    entry.embed = embed.to_dict()
+                else:
+                    embed = Embed.from_dict(entry.embed)
+                    ifile = None
+                    if entry.thumbnail is not None:
+                        ifile = File(io.BytesIO(entry.thumbnail), filename=THUMBNAIL_FILENAME)
+                    else:
+                        # The cached payload links the attachment it was first built for
+                        embed.set_thumbnail(url=attachment.url)
+            
+            files = [File(io.BytesIO(result.report), filename=result.report_filename)]
+            if ifile is not None:
+                files.insert(0, ifile)
+            message_kwargs["embed"] = embed
+            message_kwargs["files"] = files
+        
+        with stage_timer("send_analysis"):
+            await send_scheduler.send(channel_id, lambda: response_destination(**message_kwargs), priority)
+            
+    except Exception as err:
+        _handle_analysis_error(err)
+
+
+def _handle_analysis_error(err: Exception) -> None:
+    """Handle errors during image analysis."""
+    error_messages = {
+        KeyError: ">>> > Sorry, but I couldn't retrieve parameters from the shared image; it seems the EXIF data is either missing or in an incorrect format.",
+        AttributeError: ">>> > Sorry, the linked message is too old for me to access.",
+        asyncio.TimeoutError: ">>> > Sorry, that image took too long for me to analyze.",
+    }
+    
+    if isinstance(err, ImageRejected):
+        message = f">>> > Sorry, {err}"
+    else:
+        message = error_messages.get(type(err), ">>> > Some error due to my stupid masters' incompetence.")
+    logger.warning("Analysis failed: %s: %s", type(err).__name__, err)
+    ANALYSIS_FAILURES.inc(type(err).__name__)
+    
+    sorry_image = File(ASSET_SORRY)
+    raise MechaHassakuError(message, sorry_image) from None
+
+
+def record_analysis(message: discord.Message, attachment: Attachment, entry: CachedAnalysis) -> None:
+    """Queue an analysed attachment for the search index."""
+    if not entry.result.has_parameters:
+        return
+    try:
+        image_index.add(ImageRecord.from_parameters(
+            entry.result.parameters,
+            attachment_id=attachment.id,
+            message_id=message.id,
+            channel_id=message.channel.id,
+            guild_id=message.guild.id if message.guild else None,
+            jump_url=message.jump_url,
+            filename=attachment.filename,
+        ))
+    except Exception as err:
+        logger.warning("Could not index attachment %s: %s", attachment.id, err)
+
+
+def start_analyses(attachments: List[Attachment]) -> List[asyncio.Task]:
+    """Start analyzing attachments concurrently, bounded by the analysis semaphore."""
+    return [asyncio.create_task(analyze_attachment(attachment)) for attachment in attachments]
+
+
+def _cancel_pending(tasks: List[asyncio.Task]) -> None:
+    """Cancel analyses whose replies will never be sent."""
+    for task in tasks:
+        if not task.done():
+            task.cancel()
+
+
+async def analyze_all_attachments(message: discord.Message) -> None:
+    """
+    Analyze all image attachments in a message, replying in attachment order.
+    A typing indicator stands in for a placeholder message while analyses run.
+    """
+    attachments = [attachment for attachment in message.attachments if _is_image(attachment)]
+    if not attachments:
+        return
+    
+    channel_id = message.channel.id
+    tasks = start_analyses(attachments)
+    send_scheduler.post(channel_id, message.channel.typing, key="typing")
+    reply = functools.partial(message.reply, mention_author=False)
+    
+    try:
+        for attachment, task in zip(attachments, tasks):
+            try:
+                entry = await task
+                record_analysis(message, attachment, entry)
+                await send_analysis(attachment, entry, reply, channel_id)
+            except MechaHassakuError as err:
+                logger.info("Replying with error: %s", err)
+                with stage_timer("send_error"):
+                    await send_scheduler.send(channel_id, functools.partial(reply, err.message, file=err.file))
+    finally:
+        _cancel_pending(tasks)
+
+
+# ==================== History Backfill ====================
+def start_backfill(channel: discord.TextChannel, on_progress: Optional[Callable] = None) -> Optional[asyncio.Task]:
+    """Start indexing a channel's history in the background. Returns None if already running."""
+    running = backfills.get(channel.id)
+    if running is not None and not running.done():
+        return None
+    
+    crawler = BackfillCrawler(
+        channel,
+        image_index,
+        analyze=analyze_attachment,
+        record=record_analysis,
+        is_image=_is_image,
+        on_progress=on_progress
+    )
+    task = asyncio.create_task(crawler.run())
+    task.add_done_callback(lambda done: _backfill_finished(channel.id, done))
+    backfills[channel.id] = task
+    return task
+
+
+def _backfill_finished(channel_id: int, task: asyncio.Task) -> None:
+    backfills.pop(channel_id, None)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Backfill of channel %s failed: %s", channel_id, task.exception())
+
+
+# ==================== Model Request Detection ====================
+async def model_request_detector(message: discord.Message) -> None:
+    """Detect if a message is asking about a model and respond."""
+    detector_stats["checked"] += 1
+    
+    # Cheap checks first: only replies can point at an image
+    if message.reference is None or message.author.bot or not message.content:
+        return
+    
+    content = message.content.lower()
+    if not any(keyword in content for keyword in MODEL_REQUEST_KEYWORDS):
+        return
+    
+    if not MODEL_REQUEST_PATTERN.search(content):
+        return
+    
+    detector_stats["matched"] += 1
+    logger.debug("Model request detected in message %s", message.id)
+    
+    referenced_id = message.reference.message_id
+    cached_responses = model_answer_cache.get(referenced_id)
+    if cached_responses is not None:
+        await send_scheduler.send(message.channel.id, functools.partial(message.channel.send, "\n".join(cached_responses)))
+        return
+    
+    try:
+        referenced_message = await message.channel.fetch_message(referenced_id)
+        responses = await model_request_handler(referenced_message, referenced_message.channel.send)
+        if responses:
+            model_answer_cache.set(referenced_id, responses)
+    except Exception as e:
+        logger.warning("Error in model request detector: %s", e)
+
+
+async def model_request_handler(message: discord.Message, response_destination: Callable) -> List[str]:
+    """
+    Handle model information request for a message. Answers for all
+    attachments are sent as one message. Returns the responses sent.
+    """
+    attachments = [attachment for attachment in message.attachments if _is_image(attachment)]
+    if not attachments:
+        return []
+    
+    send_scheduler.post(message.channel.id, message.channel.typing, key="typing")
+    responses = []
+    
+    for attachment in attachments:
+        try:
+            entry = await analyze_attachment(attachment)
+            ed = entry.result.parameters or {}
+            
+            response = (
+                f"The model used appears to be `{ed['Model']}` with the hash "
+                f"`{ed['Model hash']}` according to the image's metadata."
+            )
+            info = model_hashes.resolve(ed['Model hash'])
+            if info is not None:
+                response += f" That hash belongs to `{info.label()}`."
+            loras = []
+            for name, value in parse_hash_list(ed.get('Lora hashes', '')):
+                lora = model_hashes.resolve(value)
+                loras.append(f"`{name}` ({lora.label()})" if lora else f"`{name}`")
+            if loras:
+                response += f" LoRAs: {', '.join(loras)}."
+            responses.append(response)
+        except Exception as err:
+            logger.warning("Model request handler error: %s", err)
+    
+    if not responses:
+        return []
+    
+    response_text = (
+        ">>> " + "\n".join(responses) + "\n"
+        "Tip: If you want all the gen parameters, run /checkparameters with "
+        "a link to the message containing this image!"
+    )
+    await send_scheduler.send(message.channel.id, functools.partial(response_destination, response_text))
+    return [response_text]
+
+
+# ==================== Cog ====================
+class Analysis(commands.Cog):
+    """Listeners and slash commands built on attachment analysis."""
+    
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+    
+    async def cog_load(self) -> None:
+        # Loaded once per process; reloading the extension keeps the index
+        if model_hashes.path and model_hashes.loaded_at is None:
+            try:
+                await model_hashes.refresh()
+            except Exception as err:
+                logger.error("Could not load the hash index %s: %s", model_hashes.path, err)
+    
+    @commands.Cog.listener()
+    async def on_ready(self) -> None:
+        """Index what the auto channel received while the bot was away."""
+        if BACKFILL_ON_START:
+            for channel in self.bot.get_all_channels():
+                if str(channel) == AUTO_CHANNEL_NAME and isinstance(channel, discord.TextChannel):
+                    start_backfill(channel)
+    
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message) -> None:
+        """Handle incoming messages."""
+        if message.author == self.bot.user:
+            return
+        
+        await model_request_detector(message)
+        
+        # Auto-analyze images in specific channel
+        if str(message.channel) != AUTO_CHANNEL_NAME or not message.attachments:
+            return
+        
+        start_time = time.time()
+        logger.debug("Attachments: %s", message.attachments)
+        await analyze_all_attachments(message)
+        elapsed_time = time.time() - start_time
+        observe_stage("message_total", elapsed_time)
+        logger.info("Execution time: %.2f seconds", elapsed_time)
+    
+    @app_commands.command(
+        name="checkparameters",
+        description="Get Stable Diffusion generation settings and prompts used of an image from a linked message"
+    )
+    async def checkparameters(self, interaction: Interaction, private_mode: bool, link: str) -> None:
+        """Check parameters from a linked message."""
+        try:
+            await interaction.response.defer(ephemeral=private_mode)
+            start_time = time.time()
+            
+            # Parse message link
+            parts = link.split('/')
+            guild_id = int(parts[-3])
+            channel_id = int(parts[-2])
+            message_id = int(parts[-1])
+            
+            logger.debug("checkparameters guild=%s channel=%s message=%s", guild_id, channel_id, message_id)
+            
+            # Fetch message
+            guild = self.bot.get_guild(guild_id)
+            channel = guild.get_channel(channel_id)
+            message = await channel.fetch_message(message_id)
+            
+            logger.debug("Number of attachments: %d", len(message.attachments))
+            
+            if not message.attachments:
+                await interaction.followup.send(
+                    "There's nothing attached, you know<:TeriDerp:1104059514501746689>?",
+                    ephemeral=private_mode
+                )
+                return
+            
+            # Process all attachments concurrently, reply in order
+            attachments = [attachment for attachment in message.attachments if _is_image(attachment)]
+            tasks = start_analyses(attachments)
+            try:
+                for attachment, task in zip(attachments, tasks):
+                    try:
+                        entry = await task
+                        record_analysis(message, attachment, entry)
+                        await send_analysis(
+                            attachment,
+                            entry,
+                            interaction.followup.send,
+                            interaction.channel_id,
+                            ephemeral=private_mode,
+                            priority=PRIORITY_INTERACTIVE
+                        )
+                    except MechaHassakuError as err:
+                        logger.info("Replying with error: %s", err)
+                        await send_scheduler.send(
+                            interaction.channel_id,
+                            functools.partial(interaction.followup.send, err.message, file=err.file, ephemeral=private_mode),
+                            PRIORITY_INTERACTIVE
+                        )
+            finally:
+                _cancel_pending(tasks)
+            
+            elapsed_time = time.time() - start_time
+            logger.info("Execution time: %.2f seconds", elapsed_time)
+        
+        except Exception as err:
+            logger.exception("checkparameters failed: %s", err)
+            await interaction.followup.send(
+                ">>> > Some error due to my stupid masters' incompetence.",
+                file=File(ASSET_SORRY),
+                ephemeral=private_mode
+            )
+    
+    @app_commands.command(name="backfill", description="Index images posted in a channel while I was away")
+    @app_commands.default_permissions(manage_guild=True)
+    @app_commands.checks.has_permissions(manage_guild=True)
+    async def backfill(self, interaction: Interaction, channel: Optional[discord.TextChannel] = None, stop: bool = False) -> None:
+        """Start or stop a history backfill, reporting progress in the invoking channel."""
+        channel = channel or interaction.channel
+        
+        if stop:
+            task = backfills.get(channel.id)
+            if task is None:
+                await interaction.response.send_message(f"No backfill is running in {channel.mention}.", ephemeral=True)
+                return
+            task.cancel()
+            await interaction.response.send_message(
+                f"Stopped the backfill of {channel.mention}; it will resume from here next time.", ephemeral=True
+            )
+            return
+        
+        await interaction.response.send_message(f"Starting the backfill of {channel.mention}.", ephemeral=True)
+        # Interaction tokens expire after 15 minutes, so report through a normal message
+        status = await interaction.channel.send(f"Backfill of {channel.mention} queued...")
+        
+        async def report(progress: BackfillProgress) -> None:
+            # Pending edits of this status collapse into one, showing the latest counts
+            await send_scheduler.send(
+                status.channel.id,
+                lambda: status.edit(content=progress.summary()),
+                PRIORITY_STATUS,
+                key=f"status:{status.id}"
+            )
+        
+        if start_backfill(channel, on_progress=report) is None:
+            await status.edit(content=f"A backfill of {channel.mention} is already running.")
+
+
+async def setup(bot: commands.Bot) -> None:
+    await bot.add_cog(Analysis(bot))
@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+"""
+General slash commands: /ping, /search, /anonsend and /help.
+
+@author: seesthenight & Circle D5
+"""
+import io
+import asyncio
+import logging
+import math
+from typing import Optional, Dict, Any, List
+
+import discord
+from discord.ext import commands
+from discord import app_commands
+from discord import File, Embed, Interaction, Attachment
+
+from module.ingest import ImageRejected, check_attachment, memory_budget, reencode_image
+from module.worker import run_in_worker
+from module.runtime import (
+    ASSET_CONFUSED,
+    ASSET_SORRY,
+    BOT_LOG_CHANNEL_ID,
+    detector_match_rate,
+    detector_stats,
+    image_index,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# ==================== Configuration ====================
+SEARCH_PAGE_SIZE = 5
+SEARCH_SNIPPET_LENGTH = 200
+
+
+# ==================== Cog ====================
+class General(commands.Cog):
+    """Commands that do not analyse images."""
+    
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+    
+    @app_commands.command(name="ping", description="Check the latency of the bot")
+    async def ping(self, interaction: Interaction) -> None:
+        """Respond with bot latency."""
+        latency_ms = round(self.bot.latency * 1000)
+        await interaction.response.send_message(
+            f'>>> \U0001f3d3 Pong! Client Latency : `{latency_ms}ms`\n'
+            f'Model questions detected : `{detector_stats["matched"]}/{detector_stats["checked"]}` '
+            f'messages (`{detector_match_rate():.2%}`)'
+        )
+    
+    @app_commands.command(name="search", description="Search analysed images by prompt, model, seed or sampler")
+    async def search(
+        self,
+        interaction: Interaction,
+        query: str = "",
+        model: Optional[str] = None,
+        seed: Optional[str] = None,
+        sampler: Optional[str] = None,
+        page: int = 1
+    ) -> None:
+        """Search the index of analysed images."""
+        page = max(1, page)
+        try:
+            rows, total = await asyncio.to_thread(
+                image_index.search,
+                query,
+                model=model,
+                seed=seed,
+                sampler=sampler,
+                limit=SEARCH_PAGE_SIZE,
+                offset=(page - 1) * SEARCH_PAGE_SIZE
+            )
+        except Exception as err:
+            logger.warning("Search failed: %s", err)
+            await interaction.response.send_message(
+                "That search confused me. Try plain words without special characters.",
+                ephemeral=True,
+                file=File(ASSET_CONFUSED)
+            )
+            return
+        
+        await interaction.response.send_message(embed=_create_search_embed(query, rows, total, page))
+    
+    @app_commands.command(name="anonsend", description="Send images anonymously, if you're shy")
+    async def anonsend(self, interaction: Interaction, file: Attachment) -> None:
+        """Send an image anonymously."""
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        
+        try:
+            user_id = interaction.user.id
+            channel = await self.bot.fetch_channel(BOT_LOG_CHANNEL_ID)
+            
+            # Re-encode without metadata, bounded by the shared memory budget
+            reserved = check_attachment(file) * 2
+            async with memory_budget.reserve(reserved):
+                download_byte = await file.read()
+                image_bytes = await run_in_worker(reencode_image, download_byte)
+            
+            await interaction.followup.send(
+                "Image sent anonymously!\n Only you can see this message :man_detective:",
+                ephemeral=True
+            )
+            m = await interaction.followup.send(file=File(io.BytesIO(image_bytes), filename="aimage.png"))
+            
+            # Log for security
+            await channel.send(
+                f"User ID {user_id} sent an image anonymously! Jump to message: {m.jump_url}"
+            )
+        
+        except ImageRejected as err:
+            await interaction.followup.send(f"Sorry, {err}", ephemeral=True, file=File(ASSET_SORRY))
+        
+        except Exception as e:
+            logger.warning("anonsend failed: %s", e)
+            await interaction.followup.send(
+                "That file's not an image, or is it?",
+                ephemeral=True,
+                file=File(ASSET_CONFUSED)
+            )
+    
+    @app_commands.command(
+        name="help",
+        description="Help on how to use the bot and Stable Diffusion guides"
+    )
+    async def help_command(self, interaction: Interaction) -> None:
+        """Display help information."""
+        embed = _create_help_embed(self.bot.user)
+        view = HelpButtonView()
+        await interaction.response.send_message(embed=embed, view=view)
+
+
+def _create_search_embed(query: str, rows: List[Dict[str, Any]], total: int, page: int) -> Embed:
+    """Create the embed listing one page of search results."""
+    pages = max(1, math.ceil(total / SEARCH_PAGE_SIZE))
+    embed = Embed(
+        title=f"Search results :mag: {query}" if query else "Search results :mag:",
+        color=0x7101fa
+    )
+    
+    if not rows:
+        embed.description = "No analysed images match that search."
+    
+    for row in rows:
+        prompt = (row["prompt"] or "")[:SEARCH_SNIPPET_LENGTH]
+        details = " | ".join(
+            value for value in (
+                row["model"],
+                f"Seed {row['seed']}" if row["seed"] else None,
+                row["sampler"],
+            ) if value
+        )
+        embed.add_field(
+            name=details or "Unknown settings",
+            value=f"{prompt or '*no prompt*'}\n[Jump to image]({row['jump_url']})",
+            inline=False
+        )
+    
+    embed.set_footer(text=f"Page {page}/{pages} · {total} results")
+    return embed
+
+
+# ==================== Help System ====================
+def _create_help_embed(bot_user: discord.ClientUser) -> Embed:
+    """Create the main help embed."""
+    embed = Embed(
+        title="MechaHassaku Helpdesk",
+        url="https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=PL45I7czocaVJmE4FQrV4r6R5SL47hIs-O&index=92",
+        color=0xf74e0d
+    )
+    embed.set_thumbnail(url=bot_user.avatar.url)
+    
+    embed.add_field(
+        name=":one:  Beginners Guide to Stable Diffusion :rocket:",
+        value="Guides to go from setting up till image generation ",
+        inline=False
+    )
+    embed.add_field(
+        name=":two:  Utility - Helpful Resources :wrench:",
+        value="Compilation of helpful tools, resources, models etc.",
+        inline=False
+    )
+    embed.add_field(
+        name="See an image you like and want to generate similar images?",
+        value=(
+            "Use my flagship feature to find out the prompt and generation settings used from "
+            "an SD AI generated image! Just type `/imageparameters` in the text box and you will "
+            "be prompted to upload the image."
+        ),
+        inline=False
+    )
+    embed.add_field(
+        name="Check out Ikena's Stable Diffusion models for all your needs: Anime, Hentai & Semi-Realistic",
+        value=(
+            "https://civitai.com/user/Ikena/models \n"
+            "If you like his work, consider donating on Patreon\n"
+            "**Still have questions? Ask away at <#1072336225496739970>**"
+        ),
+        inline=False
+    )
+    embed.set_footer(
+        text=(
+            "This is an early version of the bot. If you find something wrong or have "
+            "suggestions, feel free to contact me (manofculture#0644)"
+        )
+    )
+    
+    return embed
+
+
+class HelpButtonView(discord.ui.View):
+    """View containing help navigation buttons."""
+    
+    def __init__(self):
+        super().__init__(timeout=300)
+        
+        # Add Patreon button
+        patreon_button = discord.ui.Button(
+            label="Ikena's Patreon",
+            style=discord.ButtonStyle.url,
+            url='https://www.patreon.com/user?u=27247323',
+            emoji="🧡"
+        )
+        self.add_item(patreon_button)
+    
+    @discord.ui.button(label="Get Started", emoji="🚀", style=discord.ButtonStyle.blurple)
+    async def get_started_button(self, interaction: Interaction, button: discord.ui.Button) -> None:
+        """Show getting started guide."""
+        embed = Embed(
+            title="Requirements and Setting Up Stable Diffusion",
+            url="https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=PL45I7czocaVJmE4FQrV4r6R5SL47hIs-O&index=92",
+            color=0x0062ff
+        )
+        embed.set_author(name="Mecha Hassaku - Helpdesk", icon_url=interaction.client.user.avatar.url)
+        
+        embed.add_field(
+            name=":one:  Requirements  :notepad_spiral:",
+            value=(
+                "Minimum Requirements:\n"
+                "⊛ A > 4/6GB  VRAM GPU (Preferably Nvidia)\n"
+                "⊛ Atleast 15GB of free disk space\n"
+                "⊛ Windows 8, preferably 10/11"
+            ),
+            inline=False
+        )
+        embed.add_field(
+            name="Don't meet the requirements? Dont Worry!",
+            value="You can use these (for free pretty much): https://github.com/AUTOMATIC1111/stable-diffusion-webui/wiki/Online-Services",
+            inline=False
+        )
+        embed.add_field(
+            name=":two:  Installation  :gear:",
+            value=(
+                "Follow these:\n"
+                "⊛ Windows: https://github.com/AUTOMATIC1111/stable-diffusion-webui#automatic-installation-on-windows\n"
+                "Video guide: https://www.youtube.com/watch?v=3cvP7yJotUM"
+            ),
+            inline=False
+        )
+        embed.add_field(
+            name="Too Lazy? Use this unofficial .exe installer for Windows",
+            value="https://github.com/EmpireMediaScience/A1111-Web-UI-Installer",
+            inline=False
+        )
+        embed.add_field(
+            name="Done. Now what?",
+            value=(
+                "By default the SD 1.5 model is installed but you can use many other models like "
+                "Ikena's Hassaku from civitai.com. Save them to the "
+                "`stable-diffusion-webui/models/Stable-diffusion` path in your computer"
+            ),
+            inline=False
+        )
+        
+        await interaction.response.defer()
+        await interaction.edit_original_response(embed=embed)
+    
+    @discord.ui.button(label="Utility", emoji="🔧", style=discord.ButtonStyle.blurple)
+    async def utility_button(self, interaction: Interaction, button: discord.ui.Button) -> None:
+        """Show utility resources."""
+        embed = Embed(
+            title="Utility Tools & Resources",
+            url="https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=PL45I7czocaVJmE4FQrV4r6R5SL47hIs-O&index=92",
+            color=0x0062ff
+        )
+        embed.set_author(name="Mecha Hassaku - Helpdesk", icon_url=interaction.client.user.avatar.url)
+        
+        embed.add_field(
+            name=":two: Helpful Stuff :toolbox:",
+            value="Links to helpful resources and tools ",
+            inline=False
+        )
+        embed.add_field(
+            name="StableDiffusion Wiki",
+            value="https://www.reddit.com/r/StableDiffusion/wiki/index/",
+            inline=False
+        )
+        embed.add_field(
+            name="Download Models, LoRAs, VAEs and More",
+            value="CivitAI: https://civitai.com\nHuggingFace:https://huggingface.co ",
+            inline=False
+        )
+        embed.add_field(
+            name="Training tools",
+            value=(
+                "Kohya GUI: https://github.com/bmaltais/kohya_ss\n"
+                "Image/Dataset Captioning tool: https://github.com/toriato/stable-diffusion-webui-wd14-tagger "
+            ),
+            inline=False
+        )
+        
+        await interaction.response.defer()
+        await interaction.edit_original_response(embed=embed)
+    
+    @discord.ui.button(label="Back", emoji="◀️", style=discord.ButtonStyle.danger)
+    async def back_button(self, interaction: Interaction, button: discord.ui.Button) -> None:
+        """Return to main help menu."""
+        embed = _create_help_embed(interaction.client.user)
+        view = HelpButtonView()
+        
+        await interaction.response.defer()
+        await interaction.edit_original_response(embed=embed, view=view)
+
+
+async def setup(bot: commands.Bot) -> None:
+    await bot.add_cog(General(bot))
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+ComfyUI workflow graph extraction.
+
+The "prompt" metadata of a ComfyUI image is the executed node graph:
+{node_id: {"class_type": ..., "inputs": {name: value | [node_id, output]}}}.
+Links are resolved lazily from the sampler node and memoized, so only the
+part of the graph feeding the sampler is ever visited.
+
+@author: seesthenight & Circle D5
+"""
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+# ==================== Configuration ====================
+SAMPLER_TYPES = ("KSampler", "KSamplerAdvanced", "SamplerCustom", "SamplerCustomAdvanced")
+CHECKPOINT_KEYS = ("ckpt_name", "unet_name", "model_name")
+TEXT_KEYS = ("text", "text_g", "text_l")
+# Inputs holding the literal value of primitive/helper nodes
+PRIMITIVE_KEYS = ("value", "seed", "noise_seed", "int", "float", "string", "text", "Text")
+# Inputs followed when searching sampler settings through helper nodes
+SETTING_LINKS = ("noise", "guider", "sampler", "sigmas")
+LATENT_LINKS = ("latent_image", "samples", "latent")
+MAX_DEPTH = 64
+
+_MISSING = object()
+
+
+def _is_link(value: Any) -> bool:
+    """Return True if an input value is a [node_id, output_index] link."""
+    return (
+        isinstance(value, list)
+        and len(value) == 2
+        and isinstance(value[0], (str, int))
+        and isinstance(value[1], int)
+    )
+
+
+# ==================== Graph ====================
+class ComfyGraph:
+    """Node graph indexed once by node ID, with memoized link resolution."""
+
+    def __init__(self, nodes: Dict[str, Any]):
+        self.nodes = {
+            str(node_id): node
+            for node_id, node in nodes.items()
+            if isinstance(node, dict) and isinstance(node.get("inputs"), dict)
+        }
+        self._memo: Dict[Tuple, Any] = {}
+        # Times MAX_DEPTH cut a resolution short
+        self._truncations = 0
+
+    def _recall(self, key: Tuple, depth: int) -> Any:
+        """Memoized result for key at depth, or _MISSING."""
+        cached = self._memo.get(key, _MISSING)
+        if cached is _MISSING:
+            cached = self._memo.get(key + (depth,), _MISSING)
+            if cached is not _MISSING:
+                # Cut short by the depth cap, so is whatever builds on it
+                self._truncations += 1
+        return cached
+
+    def _store(self, key: Tuple, depth: int, result: Any, truncations: int) -> None:
+        """
+        Memoize result for every depth, or only for this one if the depth cap
+        was hit while computing it: from a shallower node the search goes further.
+        """
+        if self._truncations == truncations:
+            self._memo[key] = result
+        else:
+            del self._memo[key]
+            self._memo[key + (depth,)] = result
+
+    def inputs(self, node_id: str) -> Dict[str, Any]:
+        node = self.nodes.get(str(node_id))
+        return node["inputs"] if node else {}
+
+    def class_type(self, node_id: str) -> str:
+        node = self.nodes.get(str(node_id))
+        return str(node.get("class_type", "")) if node else ""
+
+    def samplers(self) -> List[str]:
+        """Return sampler node IDs, first-pass samplers (full denoise) first."""
+        found = [node_id for node_id in self.nodes if self.class_type(node_id) in SAMPLER_TYPES]
+
+        def sort_key(node_id: str) -> Tuple:
+            denoise = self.inputs(node_id).get("denoise", 1)
+            full = not isinstance(denoise, (int, float)) or denoise >= 1
+            return (not full, int(node_id) if node_id.isdigit() else float("inf"), node_id)
+
+        return sorted(found, key=sort_key)
+
+    # ---------- Scalar resolution ----------
+    def scalar(self, value: Any, depth: int = 0) -> Any:
+        """Resolve an input to a literal, following links into primitive nodes."""
+        if not _is_link(value):
+            return value
+        if depth > MAX_DEPTH:
+            self._truncations += 1
+            return None
+
+        key = ("scalar", str(value[0]))
+        cached = self._recall(key, depth)
+        if cached is not _MISSING:
+            return cached
+
+        # Mark as in progress so cycles resolve to None
+        self._memo[key] = None
+        truncations = self._truncations
+        inputs = self.inputs(value[0])
+        result = None
+        for name in PRIMITIVE_KEYS:
+            if name in inputs:
+                result = self.scalar(inputs[name], depth + 1)
+                if result is not None:
+                    break
+        self._store(key, depth, result, truncations)
+        return result
+
+    def find_value(self, node_id: str, names: Tuple[str, ...], follow: Tuple[str, ...], depth: int = 0) -> Any:
+        """
+        Return the first of names found on node_id, searching linked nodes
+        through the inputs listed in follow.
+        """
+        if depth > MAX_DEPTH:
+            self._truncations += 1
+            return None
+
+        key = ("find", str(node_id), names, follow)
+        cached = self._recall(key, depth)
+        if cached is not _MISSING:
+            return cached
+
+        self._memo[key] = None
+        truncations = self._truncations
+        inputs = self.inputs(node_id)
+        result = None
+        for name in names:
+            if name in inputs:
+                result = self.scalar(inputs[name], depth + 1)
+                if result is not None:
+                    break
+        else:
+            for name in follow:
+                link = inputs.get(name)
+                if _is_link(link):
+                    result = self.find_value(str(link[0]), names, follow, depth + 1)
+                    if result is not None:
+                        break
+        self._store(key, depth, result, truncations)
+        return result
+
+    # ---------- Conditioning text ----------
+    def text(self, link: Any, depth: int = 0) -> str:
+        """Return the prompt text feeding a conditioning link."""
+        if not _is_link(link):
+            return ""
+        if depth > MAX_DEPTH:
+            self._truncations += 1
+            return ""
+
+        node_id = str(link[0])
+        key = ("text", node_id)
+        cached = self._recall(key, depth)
+        if cached is not _MISSING:
+            return cached
+
+        self._memo[key] = ""
+        truncations = self._truncations
+        inputs = self.inputs(node_id)
+        parts = []
+        for name in TEXT_KEYS:
+            if name in inputs:
+                value = self.scalar(inputs[name], depth + 1)
+                if isinstance(value, str) and value and value not in parts:
+                    parts.append(value)
+
+        if not parts:
+            # Conditioning combiners and ControlNet style nodes
+            for name, value in inputs.items():
+                if name.startswith("conditioning") or name in ("positive", "guider"):
+                    text = self.text(value, depth + 1)
+                    if text and text not in parts:
+                        parts.append(text)
+
+        result = "\n".join(parts)
+        self._store(key, depth, result, truncations)
+        return result
+
+    # ---------- Model chain ----------
+    def model_chain(self, link: Any) -> Tuple[Optional[str], List[Tuple[str, Any]]]:
+        """Walk model links back to the checkpoint, collecting LoRAs on the way."""
+        checkpoint = None
+        loras = []
+        visited = set()
+
+        while _is_link(link) and str(link[0]) not in visited and len(visited) < MAX_DEPTH:
+            node_id = str(link[0])
+            visited.add(node_id)
+            inputs = self.inputs(node_id)
+
+            if "lora_name" in inputs:
+                strength = inputs.get("strength_model", inputs.get("strength", 1.0))
+                loras.append((self.scalar(inputs["lora_name"]), self.scalar(strength)))
+
+            for name in CHECKPOINT_KEYS:
+                if name in inputs:
+                    checkpoint = self.scalar(inputs[name])
+                    break
+            if checkpoint is not None:
+                break
+
+            link = inputs.get("model")
+
+        loras.reverse()
+        return checkpoint, loras
+
+
+# ==================== Field Mapping ====================
+def _model_name(name: Any) -> str:
+    """Strip directories and extensions from a model file name."""
+    name = str(name).replace("\\", "/").rsplit("/", 1)[-1]
+    for ext in (".safetensors", ".ckpt", ".pt", ".pth", ".gguf"):
+        if name.endswith(ext):
+            return name[:-len(ext)]
+    return name
+
+
+def parse_comfyui_graph(nodes: Dict[str, Any]) -> dict:
+    """Extract standard WebUI-style fields from a ComfyUI node graph."""
+    graph = ComfyGraph(nodes)
+    samplers = graph.samplers()
+    if not samplers:
+        return {}
+
+    sampler = samplers[0]
+    inputs = graph.inputs(sampler)
+    settings_follow = SETTING_LINKS
+    res = {}
+
+    # Prompts: directly on the sampler, or through a CFG guider
+    guider = inputs.get("guider")
+    guider_inputs = graph.inputs(guider[0]) if _is_link(guider) else {}
+    positive = inputs.get("positive", guider_inputs.get("positive", guider_inputs.get("conditioning")))
+    negative = inputs.get("negative", guider_inputs.get("negative"))
+
+    prompt = graph.text(positive)
+    if prompt:
+        res["Prompt"] = prompt
+    negative_prompt = graph.text(negative)
+    if negative_prompt:
+        res["Negative prompt"] = negative_prompt
+
+    fields = [
+        ("Seed", ("seed", "noise_seed")),
+        ("Steps", ("steps",)),
+        ("CFG scale", ("cfg",)),
+        ("Sampler", ("sampler_name",)),
+        ("Schedule type", ("scheduler",)),
+    ]
+    for key, names in fields:
+        value = graph.find_value(sampler, names, settings_follow)
+        if value is not None:
+            res[key] = str(value)
+
+    if "Schedule type" in res:
+        res["Schedule type"] = res["Schedule type"].capitalize()
+
+    width = graph.find_value(sampler, ("width",), LATENT_LINKS)
+    height = graph.find_value(sampler, ("height",), LATENT_LINKS)
+    if width is not None and height is not None:
+        res["Size-1"] = str(width)
+        res["Size-2"] = str(height)
+
+    model_link = inputs.get("model", guider_inputs.get("model"))
+    checkpoint, loras = graph.model_chain(model_link)
+    if checkpoint is not None:
+        res["Model"] = _model_name(checkpoint)
+    if loras:
+        res["LoRAs"] = ", ".join(f"{_model_name(name)} ({strength})" for name, strength in loras)
+
+    return res
+
+
+def parse_comfyui_prompt(prompt_str: str) -> dict:
+    """Parse the ComfyUI "prompt" metadata string; returns {} if unusable."""
+    try:
+        nodes = json.loads(prompt_str)
+    except (TypeError, ValueError):
+        return {}
+    if not isinstance(nodes, dict):
+        return {}
+    return parse_comfyui_graph(nodes)
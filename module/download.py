@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Partial attachment downloads for metadata extraction.
+
+@author: seesthenight & Circle D5
+"""
+from typing import Optional, Tuple
+
+import aiohttp
+
+from module.metadata import PARAMETER_KEYS, metadata_at_front, scan_metadata
+from module.stealth import png_has_alpha
+from module.ingest import ImageRejected
+
+# ==================== Configuration ====================
+RANGE_INITIAL_SIZE = 64 * 1024
+RANGE_GROWTH_FACTOR = 4
+# Stop growing the range if the metadata area is still incomplete past this
+MAX_METADATA_BYTES = 32 * 1024 * 1024
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=60)
+
+_session: Optional[aiohttp.ClientSession] = None
+
+# ==================== Session Handling ====================
+def _get_session() -> aiohttp.ClientSession:
+    """Return the shared HTTP session, creating it on first use."""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(timeout=REQUEST_TIMEOUT)
+    return _session
+
+
+async def close_session() -> None:
+    """Close the shared HTTP session."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+# ==================== Range Download ====================
+async def _fetch_range(session: aiohttp.ClientSession, url: str, start: int, end: Optional[int]) -> Tuple[bytes, bool]:
+    """
+    Request bytes [start, end] of url.
+    Returns (body, partial) where partial is False if the server ignored the
+    Range header and sent the whole file.
+    """
+    byte_range = f"bytes={start}-" if end is None else f"bytes={start}-{end}"
+    async with session.get(url, headers={"Range": byte_range}) as resp:
+        if resp.status == 416:
+            return b"", True
+        resp.raise_for_status()
+        return await resp.read(), resp.status == 206
+
+
+async def read_metadata_bytes(url: str, size: Optional[int] = None) -> Tuple[bytes, bool]:
+    """
+    Download just enough of url to read its metadata.
+    The requested range grows while the PNG or JPEG header area is still
+    incomplete.
+    Returns (data, is_complete_file).
+    """
+    session = _get_session()
+    buffer = bytearray()
+    want = RANGE_INITIAL_SIZE
+
+    while True:
+        start = len(buffer)
+        end = want - 1
+        if size is not None and end >= size - 1:
+            end = None
+
+        body, partial = await _fetch_range(session, url, start, end)
+        if not partial:
+            # Server does not support ranges: we got the whole file
+            return body, True
+
+        buffer += body
+        if end is None or len(body) < end - start + 1:
+            return bytes(buffer), True
+
+        text, complete = scan_metadata(bytes(buffer))
+        # Stealth pnginfo lives in the pixels of alpha PNGs without text chunks
+        needs_pixels = complete and png_has_alpha(buffer) and not any(key in text for key in PARAMETER_KEYS)
+        if complete and not needs_pixels:
+            return bytes(buffer), False
+
+        if needs_pixels or not metadata_at_front(buffer):
+            # WebP keeps EXIF/XMP after the image data, other formats anywhere:
+            # fetch the remainder
+            rest, partial = await _fetch_range(session, url, len(buffer), None)
+            return (bytes(buffer) + rest, True) if partial else (rest, True)
+
+        if want >= MAX_METADATA_BYTES:
+            raise ImageRejected("that image carries more metadata than I'm willing to read.")
+        want = min(want * RANGE_GROWTH_FACTOR, MAX_METADATA_BYTES)
+
+
+async def read_attachment_metadata(attachment) -> Tuple[bytes, bool]:
+    """
+    Read the metadata portion of a Discord attachment.
+    Falls back to a full attachment.read() if the ranged download fails.
+    """
+    try:
+        return await read_metadata_bytes(attachment.url, attachment.size)
+    except aiohttp.ClientError:
+        return await attachment.read(), True
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+EXIF (TIFF) and XMP payload decoding for generation parameters.
+
+A1111/Forge store parameters in the EXIF UserComment; ComfyUI stores its
+prompt and workflow as "prompt:{...}" and "workflow:{...}" strings in the
+IFD0 Make/Model tags. Only the tags needed here are read.
+
+@author: seesthenight & Circle D5
+"""
+import struct
+import xml.etree.ElementTree as ET
+from typing import Dict, Optional, Tuple
+
+# ==================== Constants ====================
+EXIF_HEADER = b"Exif\x00\x00"
+
+TAG_EXIF_IFD = 0x8769
+TAG_USER_COMMENT = 0x9286
+TAG_IMAGE_DESCRIPTION = 0x010E
+# ComfyUI writes Model = "prompt:..." and Make, Make - 1, ... = "workflow:..."
+COMFYUI_TAGS = range(0x0100, 0x0111)
+COMFYUI_KEYS = ("prompt", "workflow")
+
+# Bytes per value of each TIFF field type
+TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8, 11: 4, 12: 8}
+TYPE_LONG = 4
+MAX_IFD_ENTRIES = 512
+
+# Marks free text as A1111-style parameters rather than a photo caption
+PARAMETERS_MARKER = "Steps: "
+
+XMP_PARAMETER_FIELDS = ("parameters",)
+XMP_CANDIDATE_FIELDS = ("UserComment", "description")
+
+IFDEntry = Tuple[int, bytes]
+
+
+# ==================== TIFF ====================
+def _read_ifd(tiff: bytes, offset: int, order: str) -> Dict[int, IFDEntry]:
+    """Read one IFD into {tag: (type, raw value bytes)}."""
+    entries = {}
+    if offset + 2 > len(tiff):
+        return entries
+    count = struct.unpack_from(order + "H", tiff, offset)[0]
+    for index in range(min(count, MAX_IFD_ENTRIES)):
+        pos = offset + 2 + index * 12
+        if pos + 12 > len(tiff):
+            break
+        tag, field_type, n = struct.unpack_from(order + "HHI", tiff, pos)
+        size = TYPE_SIZES.get(field_type, 1) * n
+        if size <= 4:
+            value = tiff[pos + 8:pos + 8 + size]
+        else:
+            value_offset = struct.unpack_from(order + "I", tiff, pos + 8)[0]
+            if value_offset + size > len(tiff):
+                continue
+            value = tiff[value_offset:value_offset + size]
+        entries[tag] = (field_type, value)
+    return entries
+
+
+def _ascii(value: bytes) -> str:
+    return value.rstrip(b"\x00").decode("utf-8", errors="replace")
+
+
+def decode_user_comment(value: bytes) -> str:
+    """Decode an EXIF UserComment: an 8-byte charset prefix followed by text."""
+    prefix, payload = value[:8], value[8:]
+    if prefix == b"UNICODE\x00":
+        if payload[:2] in (b"\xfe\xff", b"\xff\xfe"):
+            text = payload.decode("utf-16", errors="replace")
+        else:
+            # piexif (A1111) writes UTF-16BE regardless of the TIFF byte order;
+            # for mostly-ASCII text the zero bytes reveal the actual order
+            sample = payload[:64]
+            little = sample[1::2].count(0) > sample[0::2].count(0)
+            text = payload[:len(payload) & ~1].decode("utf-16-le" if little else "utf-16-be", errors="replace")
+    elif prefix.startswith(b"ASCII"):
+        text = payload.decode("utf-8", errors="replace")
+    else:
+        # Undefined (eight NULs) or JIS: read as UTF-8
+        text = payload.decode("utf-8", errors="replace")
+    return text.strip("\x00").strip()
+
+
+def parse_exif(tiff: bytes) -> Dict[str, str]:
+    """Extract parameter text from an EXIF block (with or without the Exif header)."""
+    if tiff.startswith(EXIF_HEADER):
+        tiff = tiff[len(EXIF_HEADER):]
+    if tiff[:4] == b"II*\x00":
+        order = "<"
+    elif tiff[:4] == b"MM\x00*":
+        order = ">"
+    else:
+        return {}
+
+    text: Dict[str, str] = {}
+    ifd0 = _read_ifd(tiff, struct.unpack_from(order + "I", tiff, 4)[0], order)
+
+    for tag in COMFYUI_TAGS:
+        entry = ifd0.get(tag)
+        if entry is None:
+            continue
+        key, sep, value = _ascii(entry[1]).partition(":")
+        if sep and key in COMFYUI_KEYS:
+            text.setdefault(key, value)
+
+    exif_ifd = ifd0.get(TAG_EXIF_IFD)
+    if exif_ifd is not None and exif_ifd[0] == TYPE_LONG and len(exif_ifd[1]) == 4:
+        entries = _read_ifd(tiff, struct.unpack(order + "I", exif_ifd[1])[0], order)
+        comment = entries.get(TAG_USER_COMMENT)
+        if comment is not None:
+            decoded = decode_user_comment(comment[1])
+            if decoded:
+                text["parameters"] = decoded
+
+    description = ifd0.get(TAG_IMAGE_DESCRIPTION)
+    if description is not None and "parameters" not in text:
+        decoded = _ascii(description[1])
+        if PARAMETERS_MARKER in decoded:
+            text["parameters"] = decoded
+
+    return text
+
+
+# ==================== XMP ====================
+def _local_name(name: str) -> str:
+    return name.rsplit("}", 1)[-1]
+
+
+def parse_xmp(packet: bytes) -> Dict[str, str]:
+    """Extract parameter text from an XMP packet."""
+    try:
+        root = ET.fromstring(packet.strip(b"\x00 \r\n\t"))
+    except ET.ParseError:
+        return {}
+
+    found: Dict[str, str] = {}
+    for element in root.iter():
+        name = _local_name(element.tag) if isinstance(element.tag, str) else ""
+        if name in XMP_PARAMETER_FIELDS or name in XMP_CANDIDATE_FIELDS:
+            value = "".join(element.itertext()).strip()
+            if value:
+                found.setdefault(name, value)
+        for attribute, value in element.attrib.items():
+            name = _local_name(attribute)
+            if (name in XMP_PARAMETER_FIELDS or name in XMP_CANDIDATE_FIELDS) and value.strip():
+                found.setdefault(name, value.strip())
+
+    for name in XMP_PARAMETER_FIELDS:
+        if name in found:
+            return {"parameters": found[name]}
+    for name in XMP_CANDIDATE_FIELDS:
+        if PARAMETERS_MARKER in found.get(name, ""):
+            return {"parameters": found[name]}
+    return {}
+
+
+def parameters_from_comment(comment: bytes) -> Optional[str]:
+    """Return a JPEG COM segment if it holds A1111-style parameters."""
+    text = comment.rstrip(b"\x00").decode("utf-8", errors="replace").strip()
+    return text if PARAMETERS_MARKER in text else None
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+Gateway profiles: which intents the bot connects with and what discord.py
+keeps in memory (members, messages, startup chunking).
+
+The bot only reads guild messages and their attachments, so the default
+"lean" profile drops the member and presence intents whose events and
+caches dominate memory on large guilds. "full" is the previous setup.
+
+Environment:
+    MECHA_GATEWAY_PROFILE   lean (default), standard or full
+    MECHA_INTENTS           comma separated intents replacing the profile's
+    MECHA_MAX_MESSAGES      message cache size, or "none"
+    MECHA_CHUNK_GUILDS      1/0, request all members at startup
+    MECHA_MEASURE_SECONDS   measurement mode: report and exit this long after ready
+    MECHA_MEASURE_REPORT    file the measurement report is written to (JSON)
+
+@author: seesthenight & Circle D5
+"""
+import os
+import gc
+import sys
+import json
+import time
+import asyncio
+import logging
+import dataclasses
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# ==================== Configuration ====================
+PROFILE_NAME = os.environ.get("MECHA_GATEWAY_PROFILE", "lean")
+MEASURE_SECONDS = float(os.environ.get("MECHA_MEASURE_SECONDS", "0"))
+MEASURE_REPORT = os.environ.get("MECHA_MEASURE_REPORT")
+
+# Taken at import, i.e. close to process start
+_STARTED = time.monotonic()
+
+
+# ==================== Profiles ====================
+@dataclass(frozen=True)
+class GatewayProfile:
+    """Client options for one footprint. member_cache None derives it from the intents."""
+    name: str
+    intents: Tuple[str, ...]
+    member_cache: Optional[Tuple[str, ...]]
+    max_messages: Optional[int]
+    chunk_guilds_at_startup: bool
+
+    def build_intents(self) -> discord.Intents:
+        """Intent names, where "all" and "default" stand for discord.py's presets."""
+        intents = discord.Intents.none()
+        for name in self.intents:
+            if name in ("all", "default"):
+                intents.value |= getattr(discord.Intents, name)().value
+            elif name in discord.Intents.VALID_FLAGS:
+                setattr(intents, name, True)
+            else:
+                raise ValueError(f"Unknown intent {name!r}")
+        return intents
+
+    def client_options(self) -> Dict[str, Any]:
+        """Keyword arguments for commands.Bot / AutoShardedBot."""
+        intents = self.build_intents()
+        if self.member_cache is None:
+            member_cache_flags = discord.MemberCacheFlags.from_intents(intents)
+        else:
+            member_cache_flags = discord.MemberCacheFlags.none()
+            for name in self.member_cache:
+                setattr(member_cache_flags, name, True)
+        return {
+            "intents": intents,
+            "member_cache_flags": member_cache_flags,
+            "max_messages": self.max_messages,
+            # discord.py refuses to chunk without the members intent
+            "chunk_guilds_at_startup": self.chunk_guilds_at_startup and intents.members,
+        }
+
+
+# Guild and channel cache (auto-share channel, message links) plus message content
+LEAN_INTENTS = ("guilds", "guild_messages", "message_content")
+
+PROFILES = {
+    "lean": GatewayProfile("lean", LEAN_INTENTS, (), None, False),
+    # discord.py's defaults: everything but members and presences
+    "standard": GatewayProfile("standard", ("default", "message_content"), None, 1000, False),
+    "full": GatewayProfile("full", ("all",), None, 1000, True),
+}
+
+
+def load_profile(name: str = PROFILE_NAME) -> GatewayProfile:
+    """Return the named profile with the MECHA_* environment overrides applied."""
+    if name not in PROFILES:
+        raise ValueError(f"Unknown gateway profile {name!r}, expected one of: {', '.join(PROFILES)}")
+    profile = PROFILES[name]
+
+    overrides: Dict[str, Any] = {}
+    intents = os.environ.get("MECHA_INTENTS")
+    if intents:
+        overrides["intents"] = tuple(intent.strip() for intent in intents.split(",") if intent.strip())
+    max_messages = os.environ.get("MECHA_MAX_MESSAGES")
+    if max_messages:
+        overrides["max_messages"] = None if max_messages.lower() == "none" else int(max_messages)
+    chunk = os.environ.get("MECHA_CHUNK_GUILDS")
+    if chunk:
+        overrides["chunk_guilds_at_startup"] = chunk == "1"
+    return dataclasses.replace(profile, **overrides) if overrides else profile
+
+
+# ==================== Measurement ====================
+def rss_bytes() -> int:
+    """Current resident set size, or the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kB on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class GatewayMeter:
+    """Counts gateway events by type and reports the footprint of a profile."""
+
+    def __init__(self, profile: GatewayProfile):
+        self.profile = profile
+        self.events: Counter = Counter()
+        self.ready_after: Optional[float] = None
+        self._ready_at: Optional[float] = None
+        self._client: Optional[discord.Client] = None
+        self._measuring: Optional[asyncio.Task] = None
+
+    def attach(self, client: discord.Client) -> None:
+        client.add_listener(self.on_socket_event_type)
+        client.add_listener(self.on_ready)
+        self._client = client
+
+    async def on_socket_event_type(self, event_type: str) -> None:
+        self.events[event_type] += 1
+
+    async def on_ready(self) -> None:
+        if self._ready_at is not None:
+            return
+        self._ready_at = time.monotonic()
+        self.ready_after = self._ready_at - _STARTED
+        logger.info("Gateway profile %s ready after %.2fs", self.profile.name, self.ready_after)
+        if MEASURE_SECONDS > 0:
+            self._measuring = asyncio.create_task(self._measure(MEASURE_SECONDS))
+
+    def report(self) -> Dict[str, Any]:
+        client = self._client
+        gc.collect()
+        since_ready = time.monotonic() - self._ready_at if self._ready_at is not None else 0.0
+        options = self.profile.client_options()
+        return {
+            "profile": self.profile.name,
+            "intents": sorted(name for name, enabled in options["intents"] if enabled),
+            "member_cache_flags": sorted(name for name, enabled in options["member_cache_flags"] if enabled),
+            "max_messages": options["max_messages"],
+            "chunk_guilds_at_startup": options["chunk_guilds_at_startup"],
+            "startup_to_ready_s": round(self.ready_after, 3) if self.ready_after is not None else None,
+            "rss_mb": round(rss_bytes() / 1024 / 1024, 1),
+            "events_total": sum(self.events.values()),
+            "events_per_s": round(sum(self.events.values()) / since_ready, 1) if since_ready else 0.0,
+            "events": dict(self.events.most_common()),
+            "guilds": len(client.guilds),
+            "cached_members": sum(len(guild.members) for guild in client.guilds),
+            "cached_users": len(client.users),
+            "cached_messages": len(client.cached_messages),
+        }
+
+    async def _measure(self, seconds: float) -> None:
+        """Measurement mode: report after seconds of steady state, then log out."""
+        await asyncio.sleep(seconds)
+        report = self.report()
+        logger.info("Gateway profile report: %s", json.dumps(report))
+        if MEASURE_REPORT:
+            with open(MEASURE_REPORT, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        try:
+            await self._client.close()
+        finally:
+            # Closing the gateway ends client.run, which cancels this task
+            # before Client.close reaches the HTTP session
+            await self._client.http.close()
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+Offline index of model and LoRA hashes, for naming the `Model hash` and
+`Lora hashes` an image was generated with.
+
+Images carry short hashes: AutoV2 (first 10 hex of the file's SHA256) for
+checkpoints, AutoV3 (12 hex) for LoRAs, sometimes AutoV1 (8 hex). Every
+hash of the dump is cut to KEY_LENGTH characters and packed into one
+sorted, fixed-width string, so a lookup is a bisect over it and the index
+costs KEY_LENGTH + 4 bytes per hash instead of a str object each.
+
+Dump formats (MECHA_HASH_INDEX):
+    JSON    [{"name": ..., "version": ..., "type": ..., "hashes": {kind: hex} or [hex, ...]}, ...]
+    SQLite  table hashes(hash TEXT, name TEXT, version TEXT, type TEXT), one row per hash
+
+@author: seesthenight & Circle D5
+"""
+import re
+import json
+import time
+import asyncio
+import bisect
+import logging
+import sqlite3
+from array import array
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ==================== Configuration ====================
+# Long enough for AutoV3; SHA256 and AutoV2 share their first characters
+KEY_LENGTH = 12
+# Shorter prefixes match too many models to name one
+MIN_PREFIX = 8
+# Sorts before every hex digit, so a short key precedes its extensions
+PAD = " "
+SQLITE_MAGIC = b"SQLite format 3\x00"
+
+RE_HEX = re.compile(r"^[0-9a-f]+$")
+
+
+# ==================== Index ====================
+class ModelInfo(NamedTuple):
+    """A tuple, so the index holds one small object per model."""
+    name: str
+    version: Optional[str] = None
+    kind: Optional[str] = None
+
+    def label(self) -> str:
+        return f"{self.name} {self.version}" if self.version else self.name
+
+
+def normalize_hash(value: str) -> Optional[str]:
+    """Lower-case hex without a 0x prefix, or None if value is not a hash."""
+    value = value.strip().lower()
+    if value.startswith("0x"):
+        value = value[2:]
+    return value if value and RE_HEX.match(value) else None
+
+
+class _Keys:
+    """Read-only sequence view of the packed keys, for bisect."""
+
+    def __init__(self, packed: str):
+        self._packed = packed
+
+    def __len__(self) -> int:
+        return len(self._packed) // KEY_LENGTH
+
+    def __getitem__(self, index: int) -> str:
+        start = index * KEY_LENGTH
+        return self._packed[start:start + KEY_LENGTH]
+
+
+class HashIndex:
+    """Immutable prefix index from hash to model."""
+
+    def __init__(self, rows: Iterable[Tuple[str, ModelInfo]] = ()):
+        entries: Dict[ModelInfo, int] = {}
+        pairs = set()
+        for value, info in rows:
+            key = normalize_hash(value or "")
+            if key is None or len(key) < MIN_PREFIX:
+                continue
+            pairs.add((key[:KEY_LENGTH].ljust(KEY_LENGTH, PAD), entries.setdefault(info, len(entries))))
+
+        ordered = sorted(pairs)
+        self._packed = "".join(key for key, _ in ordered)
+        self._keys = _Keys(self._packed)
+        self._refs = array("I", (ref for _, ref in ordered))
+        self._entries: List[ModelInfo] = list(entries)
+
+    def __len__(self) -> int:
+        return len(self._refs)
+
+    @property
+    def models(self) -> int:
+        return len(self._entries)
+
+    def nbytes(self) -> int:
+        """Approximate size of the packed keys and references."""
+        return len(self._packed) + self._refs.itemsize * len(self._refs)
+
+    def matches(self, value: str, limit: int = 5) -> List[ModelInfo]:
+        """Distinct models with a hash starting with value, at most limit."""
+        prefix = normalize_hash(value)
+        if prefix is None or len(prefix) < MIN_PREFIX:
+            return []
+        prefix = prefix[:KEY_LENGTH]
+
+        found: List[ModelInfo] = []
+        index = bisect.bisect_left(self._keys, prefix)
+        while index < len(self._refs) and self._keys[index].startswith(prefix):
+            info = self._entries[self._refs[index]]
+            if info not in found:
+                found.append(info)
+                if len(found) >= limit:
+                    break
+            index += 1
+        return found
+
+    def lookup(self, value: str) -> Optional[ModelInfo]:
+        """The model value identifies, or None if it is unknown or ambiguous."""
+        found = self.matches(value, limit=2)
+        return found[0] if len(found) == 1 else None
+
+
+# ==================== Loading ====================
+def _json_rows(data) -> Iterator[Tuple[str, ModelInfo]]:
+    # Versions and types repeat across models; share one string each
+    strings: Dict[str, str] = {}
+    for item in data:
+        version, kind = item.get("version") or None, item.get("type") or None
+        info = ModelInfo(
+            str(item["name"]),
+            strings.setdefault(version, version) if version else None,
+            strings.setdefault(kind, kind) if kind else None,
+        )
+        hashes = item.get("hashes") or []
+        if isinstance(hashes, dict):
+            hashes = hashes.values()
+        for value in hashes:
+            if isinstance(value, str):
+                yield value, info
+
+
+def _sqlite_rows(path: str) -> Iterator[Tuple[str, ModelInfo]]:
+    strings: Dict[str, str] = {}
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        for value, name, version, kind in connection.execute("SELECT hash, name, version, type FROM hashes"):
+            if value and name:
+                yield value, ModelInfo(
+                    strings.setdefault(name, name),
+                    strings.setdefault(version, version) if version else None,
+                    strings.setdefault(kind, kind) if kind else None,
+                )
+    finally:
+        connection.close()
+
+
+def load_index(path: str) -> HashIndex:
+    """Build an index from a JSON or SQLite dump."""
+    with open(path, "rb") as f:
+        is_sqlite = f.read(len(SQLITE_MAGIC)) == SQLITE_MAGIC
+    if is_sqlite:
+        return HashIndex(_sqlite_rows(path))
+    with open(path, encoding="utf-8") as f:
+        return HashIndex(_json_rows(json.load(f)))
+
+
+def parse_hash_list(text: str) -> List[Tuple[str, str]]:
+    """Split WebUI's "name: hash, name: hash" (Lora hashes, TI hashes) into pairs."""
+    pairs = []
+    for item in text.split(","):
+        name, _, value = item.rpartition(":")
+        if name.strip() and value.strip():
+            pairs.append((name.strip(), value.strip()))
+    return pairs
+
+
+# ==================== Refreshable Index ====================
+class ModelHashes:
+    """The index loaded from path, replaced as a whole by refresh()."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.index = HashIndex()
+        self.loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def refresh(self) -> HashIndex:
+        """Rebuild the index from the dump off the event loop, then swap it in."""
+        if not self.path:
+            return self.index
+        async with self._lock:
+            start = time.perf_counter()
+            index = await asyncio.to_thread(load_index, self.path)
+            self.index = index
+            self.loaded_at = time.time()
+        logger.info(
+            "Hash index: %d hashes of %d models from %s in %.2fs (%d kB)",
+            len(index), index.models, self.path, time.perf_counter() - start, index.nbytes() // 1024
+        )
+        return index
+
+    def resolve(self, value: str) -> Optional[ModelInfo]:
+        return self.index.lookup(value)
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+In-place reload of the parsers and extensions for the owner-only reload
+command (module/cogs/admin.py), without reconnecting to the gateway.
+
+Every module in PARSER_MODULES is executed fresh from its source; only
+when all of them import cleanly are they published, otherwise the old
+modules stay in place untouched. Calls already running keep the module
+they started in, so work in flight finishes on the old code, while
+module.analysis looks the parsers up per call and picks up the new one.
+
+@author: seesthenight & Circle D5
+"""
+import sys
+import logging
+import importlib.util
+from dataclasses import dataclass, field
+from types import ModuleType
+from typing import Dict, List, Sequence
+
+from discord.ext import commands
+
+from module.runtime import invalidate_rendered
+from module.worker import recycle_executor
+
+logger = logging.getLogger(__name__)
+
+# Pure parsing code, safe to replace while the bot is running
+PARSER_MODULES = ("module.parser", "module.comfyui")
+
+
+# ==================== Parsers ====================
+def _publish(name: str, module: ModuleType) -> None:
+    """Make module the one found by imports and by attribute lookups on its package."""
+    sys.modules[name] = module
+    parent, _, child = name.rpartition(".")
+    if parent in sys.modules:
+        setattr(sys.modules[parent], child, module)
+
+
+def reload_parsers(names: Sequence[str] = PARSER_MODULES) -> List[str]:
+    """
+    Re-import names from disk as a unit and return them.
+    Raises whatever the import raised (e.g. SyntaxError) after restoring the old modules.
+    """
+    old: Dict[str, ModuleType] = {name: sys.modules[name] for name in names if name in sys.modules}
+    fresh: Dict[str, ModuleType] = {}
+    try:
+        for name in names:
+            spec = importlib.util.find_spec(name)
+            if spec is None or spec.loader is None:
+                raise ImportError(f"No module named {name!r}", name=name)
+            module = importlib.util.module_from_spec(spec)
+            # Visible to imports between the new modules, not yet to their package
+            sys.modules[name] = module
+            spec.loader.exec_module(module)
+            fresh[name] = module
+    except BaseException:
+        for name in names:
+            if name in old:
+                sys.modules[name] = old[name]
+            else:
+                sys.modules.pop(name, None)
+        raise
+
+    for name, module in fresh.items():
+        _publish(name, module)
+    logger.info("Reloaded %s", ", ".join(fresh))
+    return list(fresh)
+
+
+# ==================== Extensions ====================
+@dataclass
+class ReloadReport:
+    parsers: List[str] = field(default_factory=list)
+    extensions: List[str] = field(default_factory=list)
+    # Extension name -> error; discord.py keeps the old version loaded
+    failed: Dict[str, BaseException] = field(default_factory=dict)
+
+
+async def reload_all(bot: commands.Bot) -> ReloadReport:
+    """
+    Reload the parsers, recycle the worker pool so its processes run them,
+    then reload every extension. A parser that fails to import aborts
+    before anything is swapped.
+    """
+    report = ReloadReport(parsers=reload_parsers())
+    recycle_executor()
+
+    for name in list(bot.extensions):
+        try:
+            await bot.reload_extension(name)
+            report.extensions.append(name)
+        except commands.ExtensionError as err:
+            logger.exception("Reloading %s failed", name)
+            report.failed[name] = err.__cause__ or err
+
+    # Cached embeds and answers were rendered by the old code
+    invalidate_rendered()
+    return report
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Admission checks for incoming images: declared file size and dimensions
+are validated from Discord's attachment data or the image header before
+anything is decoded, and concurrent jobs share a global memory budget.
+
+@author: seesthenight & Circle D5
+"""
+import io
+import os
+import struct
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional, Tuple
+
+# ==================== Configuration ====================
+MB = 1024 * 1024
+MAX_FILE_BYTES = int(os.environ.get("INGEST_MAX_FILE_BYTES", str(50 * MB)))
+# 8K (7680x4320) is about 33 megapixels
+MAX_IMAGE_PIXELS = int(os.environ.get("INGEST_MAX_PIXELS", str(64 * 1000 * 1000)))
+MAX_IMAGE_SIDE = 16384
+# Decoded RGBA bitmap
+BYTES_PER_PIXEL = 4
+MEMORY_BUDGET_BYTES = int(os.environ.get("INGEST_MEMORY_BUDGET", str(512 * MB)))
+# How long a job may wait for budget before it is turned away
+BUDGET_WAIT_TIMEOUT = 30.0
+
+
+class ImageRejected(ValueError):
+    """An image refused before processing; the message is shown to the user."""
+
+
+# ==================== Header Dimensions ====================
+def _jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    pos = 2
+    while pos + 9 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            pos += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            pos += 2
+            continue
+        length = struct.unpack_from(">H", data, pos + 2)[0]
+        # SOF markers, except DHT (C4), JPG (C8) and DAC (CC)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack_from(">HH", data, pos + 5)
+            return width, height
+        pos += 2 + length
+    return None
+
+
+def _webp_size(data: bytes) -> Optional[Tuple[int, int]]:
+    chunk = data[12:16]
+    if chunk == b"VP8X" and len(data) >= 30:
+        width = int.from_bytes(data[24:27], "little") + 1
+        height = int.from_bytes(data[27:30], "little") + 1
+        return width, height
+    if chunk == b"VP8L" and len(data) >= 25 and data[20] == 0x2F:
+        bits = int.from_bytes(data[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8 " and len(data) >= 30 and data[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack_from("<HH", data, 26)
+        return width & 0x3FFF, height & 0x3FFF
+    return None
+
+
+def read_image_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """Return (width, height) declared in the header of PNG, JPEG, WebP or GIF data."""
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and data[12:16] == b"IHDR" and len(data) >= 24:
+        return struct.unpack_from(">II", data, 16)
+    if data[:2] == b"\xff\xd8":
+        return _jpeg_size(data)
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return _webp_size(data)
+    if data[:4] == b"GIF8" and len(data) >= 10:
+        return struct.unpack_from("<HH", data, 6)
+    return None
+
+
+# ==================== Admission Checks ====================
+def check_dimensions(width: int, height: int) -> None:
+    """Reject images whose decoded bitmap would be unreasonably large."""
+    if width > MAX_IMAGE_SIDE or height > MAX_IMAGE_SIDE or width * height > MAX_IMAGE_PIXELS:
+        raise ImageRejected(
+            f"that image is {width}x{height}; I only process images up to "
+            f"{MAX_IMAGE_PIXELS // 1000000} megapixels."
+        )
+
+
+def check_attachment(attachment) -> int:
+    """
+    Validate a Discord attachment from its declared size and dimensions,
+    before downloading it. Returns the memory to reserve for processing it.
+    """
+    size = attachment.size or 0
+    if size > MAX_FILE_BYTES:
+        raise ImageRejected(
+            f"that file is {size / MB:.1f} MB; I only read images up to {MAX_FILE_BYTES // MB} MB."
+        )
+    width = attachment.width or 0
+    height = attachment.height or 0
+    check_dimensions(width, height)
+    return size + width * height * BYTES_PER_PIXEL
+
+
+def check_image_header(data: bytes) -> None:
+    """Validate the dimensions declared in downloaded bytes."""
+    size = read_image_size(data)
+    if size is not None:
+        check_dimensions(*size)
+
+
+# ==================== Memory Budget ====================
+class MemoryBudget:
+    """Bytes shared by concurrent jobs; reservations wait until enough is free."""
+
+    def __init__(self, limit: int = MEMORY_BUDGET_BYTES, timeout: float = BUDGET_WAIT_TIMEOUT):
+        self.limit = limit
+        self.timeout = timeout
+        self.used = 0
+        self._condition: Optional[asyncio.Condition] = None
+
+    @asynccontextmanager
+    async def reserve(self, nbytes: int) -> AsyncIterator[None]:
+        """Hold nbytes of the budget for the duration of the block."""
+        if nbytes > self.limit:
+            raise ImageRejected("that image is too large for me to process.")
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        condition = self._condition
+
+        async with condition:
+            try:
+                await asyncio.wait_for(condition.wait_for(lambda: self.used + nbytes <= self.limit), self.timeout)
+            except asyncio.TimeoutError:
+                raise ImageRejected("I'm busy with too many large images right now, try again in a minute.") from None
+            self.used += nbytes
+        try:
+            yield
+        finally:
+            async with condition:
+                self.used -= nbytes
+                condition.notify_all()
+
+
+memory_budget = MemoryBudget()
+
+
+# ==================== Re-encoding ====================
+def reencode_image(data: bytes) -> bytes:
+    """Re-encode image bytes as PNG without their metadata. Runs in a worker."""
+    check_image_header(data)
+    from PIL import Image
+    with Image.open(io.BytesIO(data)) as image:
+        # The header check misses formats read_image_size does not know
+        check_dimensions(*image.size)
+        output = io.BytesIO()
+        image.save(output, "PNG")
+        return output.getvalue()
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Non-blocking logging: records are queued on the event loop thread and
+written by a background listener thread.
+
+Environment:
+    LOG_LEVEL           root level (default INFO)
+    LOG_LEVELS          per-logger levels, e.g. "module.parser=DEBUG,discord=WARNING"
+    LOG_MAX_LENGTH      maximum characters per message (default 2000)
+    LOG_DEBUG_RATE      DEBUG records allowed per second per call site (default 5)
+
+@author: seesthenight & Circle D5
+"""
+import os
+import sys
+import time
+import queue
+import atexit
+import logging
+import reprlib
+import logging.handlers
+from typing import Dict, Optional, Tuple
+
+LOG_FORMAT = "%(asctime)s %(levelname)-8s %(name)s: %(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+# ==================== Filters ====================
+class TruncatingFilter(logging.Filter):
+    """
+    Bound the size of log messages. Large arguments (e.g. ComfyUI parameter
+    dicts) are shortened with reprlib before they are ever formatted.
+    """
+
+    def __init__(self, max_length: int):
+        super().__init__()
+        self.max_length = max_length
+        self._repr = reprlib.Repr()
+        self._repr.maxstring = 200
+        self._repr.maxother = 200
+        self._repr.maxdict = 20
+        self._repr.maxlist = 20
+        self._repr.maxlevel = 3
+
+    def _truncate(self, text: str) -> str:
+        return text if len(text) <= self.max_length else text[:self.max_length] + "...[truncated]"
+
+    def _shorten(self, arg):
+        if isinstance(arg, (int, float, bool)) or arg is None:
+            return arg
+        if isinstance(arg, str):
+            return self._truncate(arg)
+        return self._truncate(self._repr.repr(arg))
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.args:
+            if isinstance(record.args, tuple):
+                record.args = tuple(self._shorten(arg) for arg in record.args)
+            elif isinstance(record.args, dict):
+                record.args = {key: self._shorten(value) for key, value in record.args.items()}
+        if isinstance(record.msg, str):
+            record.msg = self._truncate(record.msg)
+        else:
+            record.msg = self._shorten(record.msg)
+        return True
+
+
+class DebugRateLimitFilter(logging.Filter):
+    """Let at most `rate` DEBUG records per second through for each call site."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+        # call site -> (tokens, last refill, suppressed count)
+        self._buckets: Dict[Tuple[str, int], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+
+        now = time.monotonic()
+        key = (record.pathname, record.lineno)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.rate, now, 0]
+
+        tokens = min(self.rate, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            bucket[2] += 1
+            return False
+
+        bucket[0] = tokens - 1
+        if bucket[2]:
+            record.msg = f"{record.msg} ({bucket[2]} similar messages suppressed)"
+            bucket[2] = 0
+        return True
+
+
+# ==================== Setup ====================
+def _parse_levels(spec: str) -> Dict[str, str]:
+    levels = {}
+    for item in spec.split(","):
+        name, sep, level = item.partition("=")
+        if sep and name.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(level: Optional[str] = None, levels: Optional[str] = None) -> None:
+    """Route all logging through a queue drained by a background thread."""
+    global _listener
+    if _listener is not None:
+        return
+
+    max_length = int(os.environ.get("LOG_MAX_LENGTH", "2000"))
+    debug_rate = float(os.environ.get("LOG_DEBUG_RATE", "5"))
+
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(DebugRateLimitFilter(debug_rate))
+    queue_handler.addFilter(TruncatingFilter(max_length))
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel((level or os.environ.get("LOG_LEVEL", "INFO")).upper())
+
+    for name, logger_level in _parse_levels(levels or os.environ.get("LOG_LEVELS", "")).items():
+        logging.getLogger(name).setLevel(logger_level)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""
+Image metadata extraction without decoding pixel data.
+
+@author: seesthenight & Circle D5
+"""
+import io
+import zlib
+import struct
+from typing import Dict, Optional, Tuple
+
+from module.exif import EXIF_HEADER, parameters_from_comment, parse_exif, parse_xmp
+from module.stealth import png_has_alpha, read_stealth_metadata
+
+# ==================== Constants ====================
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_TEXT_CHUNKS = (b"tEXt", b"zTXt", b"iTXt")
+PNG_STOP_CHUNKS = (b"IDAT", b"IEND")
+
+JPEG_SOI = b"\xff\xd8"
+JPEG_APP1 = 0xE1
+JPEG_COM = 0xFE
+# Start of scan / end of image: no metadata segments follow
+JPEG_STOP_MARKERS = (0xDA, 0xD9)
+XMP_HEADER = b"http://ns.adobe.com/xap/1.0/\x00"
+
+WEBP_EXIF_FLAG = 0x08
+WEBP_XMP_FLAG = 0x04
+
+# Keys the analysis path looks for; any other text chunk is kept as well
+PARAMETER_KEYS = ("parameters", "prompt", "workflow", "Comment")
+
+# Text chunks larger than this, stored or inflated, are skipped
+MAX_TEXT_CHUNK_BYTES = 8 * 1024 * 1024
+
+# ==================== PNG Chunk Scanner ====================
+def _inflate(data: bytes) -> bytes:
+    """zlib-decompress at most MAX_TEXT_CHUNK_BYTES, refusing compression bombs."""
+    inflater = zlib.decompressobj()
+    text = inflater.decompress(data, MAX_TEXT_CHUNK_BYTES)
+    if inflater.unconsumed_tail:
+        raise ValueError("text chunk inflates beyond MAX_TEXT_CHUNK_BYTES")
+    return text
+
+
+def _decode_text_chunk(chunk_type: bytes, body: bytes) -> Optional[Tuple[str, str]]:
+    """Decode a tEXt/zTXt/iTXt chunk body into a (key, value) pair."""
+    key, sep, rest = body.partition(b"\x00")
+    if not sep:
+        return None
+    keyword = key.decode("latin-1")
+
+    if chunk_type == b"tEXt":
+        return keyword, rest.decode("latin-1")
+
+    if chunk_type == b"zTXt":
+        # rest = compression method (1 byte) + zlib stream
+        if not rest or rest[0] != 0:
+            return None
+        return keyword, _inflate(rest[1:]).decode("latin-1")
+
+    # iTXt: flag, method, language\0, translated keyword\0, text
+    if len(rest) < 2:
+        return None
+    compressed, method = rest[0], rest[1]
+    _lang, _, rest = rest[2:].partition(b"\x00")
+    _translated, _, text = rest.partition(b"\x00")
+    if compressed:
+        if method != 0:
+            return None
+        text = _inflate(text)
+    return keyword, text.decode("utf-8")
+
+
+def scan_png_text(data: bytes) -> Tuple[Dict[str, str], bool]:
+    """
+    Walk PNG chunk headers and decode text chunks up to the first IDAT.
+    Returns (text chunks, complete) where complete is True once image data
+    or the end of the file was reached, i.e. no further text can precede it.
+    """
+    text = {}
+    if not data.startswith(PNG_SIGNATURE):
+        return text, False
+
+    view = memoryview(data)
+    pos = len(PNG_SIGNATURE)
+    end = len(data)
+
+    while pos + 8 <= end:
+        length, chunk_type = struct.unpack_from(">I4s", view, pos)
+        if chunk_type in PNG_STOP_CHUNKS:
+            return text, True
+
+        body_start = pos + 8
+        body_end = body_start + length
+        if body_end + 4 > end:
+            # Truncated chunk: more data is needed
+            return text, False
+
+        if chunk_type in PNG_TEXT_CHUNKS and length <= MAX_TEXT_CHUNK_BYTES:
+            try:
+                item = _decode_text_chunk(chunk_type, bytes(view[body_start:body_end]))
+            except (zlib.error, ValueError):
+                item = None
+            if item is not None:
+                text.setdefault(item[0], item[1])
+
+        pos = body_end + 4  # skip CRC
+
+    return text, False
+
+
+def read_png_text(data: bytes) -> Optional[Dict[str, str]]:
+    """Return the PNG text chunks of data, or None if data is not a PNG."""
+    if not data.startswith(PNG_SIGNATURE):
+        return None
+    text, _ = scan_png_text(data)
+    return text
+
+
+# ==================== JPEG / WebP Scanners ====================
+def _merge(text: Dict[str, str], found: Dict[str, str]) -> None:
+    for key, value in found.items():
+        text.setdefault(key, value)
+
+
+def scan_jpeg_segments(data: bytes) -> Tuple[Dict[str, str], bool]:
+    """
+    Walk JPEG marker segments up to the start of scan, decoding EXIF and XMP
+    from APP1 and parameters from COM. Returns (text, complete) like
+    scan_png_text.
+    """
+    text: Dict[str, str] = {}
+    if not data.startswith(JPEG_SOI):
+        return text, False
+
+    pos = 2
+    end = len(data)
+    while pos + 4 <= end:
+        if data[pos] != 0xFF:
+            # Not a marker: corrupt stream, nothing more to read
+            return text, True
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            pos += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            pos += 2
+            continue
+        if marker in JPEG_STOP_MARKERS:
+            return text, True
+
+        length = struct.unpack_from(">H", data, pos + 2)[0]
+        segment_end = pos + 2 + length
+        if segment_end > end:
+            return text, False
+
+        if length - 2 <= MAX_TEXT_CHUNK_BYTES and marker in (JPEG_APP1, JPEG_COM):
+            body = data[pos + 4:segment_end]
+            try:
+                if marker == JPEG_COM:
+                    comment = parameters_from_comment(body)
+                    if comment:
+                        text.setdefault("parameters", comment)
+                elif body.startswith(EXIF_HEADER):
+                    _merge(text, parse_exif(body))
+                elif body.startswith(XMP_HEADER):
+                    _merge(text, parse_xmp(body[len(XMP_HEADER):]))
+            except (struct.error, ValueError):
+                pass
+        pos = segment_end
+
+    return text, False
+
+
+def scan_webp_chunks(data: bytes) -> Tuple[Dict[str, str], bool]:
+    """
+    Walk WebP RIFF chunks, decoding EXIF and XMP. These chunks follow the
+    image data, so complete is only True early when the VP8X header shows
+    the file has none.
+    """
+    text: Dict[str, str] = {}
+    if data[:4] != b"RIFF" or data[8:12] != b"WEBP":
+        return text, False
+
+    riff_end = 8 + struct.unpack_from("<I", data, 4)[0]
+    pos = 12
+    while pos + 8 <= len(data) and pos < riff_end:
+        fourcc = data[pos:pos + 4]
+        size = struct.unpack_from("<I", data, pos + 4)[0]
+        if pos == 12:
+            # Simple (lossy/lossless) files cannot carry metadata
+            if fourcc in (b"VP8 ", b"VP8L"):
+                return text, True
+            if fourcc == b"VP8X" and len(data) > 20 and not data[20] & (WEBP_EXIF_FLAG | WEBP_XMP_FLAG):
+                return text, True
+
+        chunk_end = pos + 8 + size
+        if chunk_end > len(data):
+            return text, False
+        if size <= MAX_TEXT_CHUNK_BYTES and fourcc in (b"EXIF", b"XMP "):
+            body = data[pos + 8:chunk_end]
+            try:
+                _merge(text, parse_exif(body) if fourcc == b"EXIF" else parse_xmp(body))
+            except (struct.error, ValueError):
+                pass
+        pos = chunk_end + (size & 1)
+
+    return text, pos >= riff_end
+
+
+def scan_metadata(data: bytes) -> Tuple[Dict[str, str], bool]:
+    """Scan PNG, JPEG or WebP bytes. Returns (text, complete); unknown formats give ({}, False)."""
+    if data.startswith(PNG_SIGNATURE):
+        return scan_png_text(data)
+    if data.startswith(JPEG_SOI):
+        return scan_jpeg_segments(data)
+    return scan_webp_chunks(data)
+
+
+def metadata_at_front(data: bytes) -> bool:
+    """True for formats whose metadata precedes the image data (PNG, JPEG)."""
+    return data.startswith(PNG_SIGNATURE) or data.startswith(JPEG_SOI)
+
+
+def read_metadata_text(data: bytes) -> Optional[Dict[str, str]]:
+    """Return the text metadata of PNG, JPEG or WebP data, or None for other formats."""
+    if not (metadata_at_front(data) or data[:4] == b"RIFF"):
+        return None
+    text, _ = scan_metadata(data)
+    return text
+
+
+# ==================== Main Extraction Function ====================
+def extract_metadata(data: bytes) -> Dict[str, str]:
+    """
+    Extract generation metadata from raw image bytes.
+    PNG, JPEG and WebP files are read with the chunk and segment scanners;
+    anything else, or a file without recognised keys, falls back to Pillow's
+    lazy header parsing. PNGs with an alpha channel and no text chunks are
+    checked for stealth pnginfo, which needs the whole file.
+    """
+    text = read_metadata_text(data)
+    if text is not None and any(key in text for key in PARAMETER_KEYS):
+        return text
+
+    if png_has_alpha(data):
+        stealth = read_stealth_metadata(data)
+        if stealth:
+            return {**(text or {}), **stealth}
+
+    try:
+        from PIL import Image
+        with Image.open(io.BytesIO(data)) as image:
+            info = dict(image.info)
+    except Exception:
+        return text or {}
+
+    if text:
+        info.update(text)
+    return info
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+Minimal Prometheus-style metrics and a local /metrics endpoint.
+
+@author: seesthenight & Circle D5
+"""
+import time
+import bisect
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# ==================== Metric Types ====================
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._function: Optional[Callable[[], object]] = None
+
+    def set_function(self, function: Callable[[], object]) -> None:
+        """Read values from function at scrape time: a number, or {label values: number}."""
+        self._function = function
+
+    def _key(self, labels: Sequence[str]) -> LabelValues:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(str(label) for label in labels)
+
+    def _samples(self) -> Dict[LabelValues, float]:
+        if self._function is None:
+            return self._values
+        values = self._function()
+        return values if isinstance(values, dict) else {(): values}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in self._samples().items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing value."""
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    """Distribution of observations in cumulative buckets."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [bucket counts..., sum, count]
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for labels, series in self._series.items():
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                bucket_labels = _format_labels(self.labelnames, labels, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            bucket_labels = _format_labels(self.labelnames, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{bucket_labels} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+
+# ==================== Registry ====================
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "mecha_stage_seconds", "Time spent per analysis stage", ("stage",)
+))
+ANALYSIS_FAILURES = REGISTRY.register(Counter(
+    "mecha_analysis_failures_total", "Failed analyses by exception type", ("exception",)
+))
+ANALYSIS_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "mecha_analysis_queue_depth", "Analyses waiting for or holding an analysis slot"
+))
+CACHE_EVENTS = REGISTRY.register(Counter(
+    "mecha_cache_events_total", "Cache lookups by cache and result", ("cache", "result")
+))
+DETECTOR_MESSAGES = REGISTRY.register(Counter(
+    "mecha_model_detector_messages_total", "Messages seen by the model request detector", ("result",)
+))
+
+SEND_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "mecha_send_queue_depth", "Outbound Discord calls waiting in the send scheduler"
+))
+DISCORD_SENDS = REGISTRY.register(Counter(
+    "mecha_discord_sends_total", "Outbound Discord calls made through the send scheduler", ("priority",)
+))
+
+INGEST_BUDGET_BYTES = REGISTRY.register(Gauge(
+    "mecha_ingest_budget_bytes", "Memory reserved by images currently being processed"
+))
+
+GATEWAY_EVENTS = REGISTRY.register(Counter(
+    "mecha_gateway_events_total", "Gateway dispatch events received, by type", ("event",)
+))
+
+
+def stage_timer(stage: str):
+    """Context manager timing one analysis stage."""
+    return STAGE_SECONDS.time(stage)
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """Record a stage duration measured elsewhere (e.g. in a worker process)."""
+    STAGE_SECONDS.observe(seconds, stage)
+
+
+def track_cache(name: str, cache) -> None:
+    """Export a TTLCache's counters under the given cache name."""
+    previous = CACHE_EVENTS._function
+
+    def collect() -> Dict[LabelValues, float]:
+        values = previous() if previous else {}
+        stats = cache.stats()
+        values[(name, "hit")] = stats["hits"]
+        values[(name, "miss")] = stats["misses"]
+        values[(name, "eviction")] = stats["evictions"]
+        return values
+
+    CACHE_EVENTS.set_function(collect)
+
+
+# ==================== HTTP Endpoint ====================
+async def _metrics_handler(request: "web.Request") -> "web.Response":
+    from aiohttp import web
+    return web.Response(text=REGISTRY.render(), content_type="text/plain", charset="utf-8")
+
+
+async def start_metrics_server(host: str, port: int) -> "web.AppRunner":
+    """Serve /metrics on the running event loop. aiohttp.web is only imported here."""
+    from aiohttp import web
+    app = web.Application()
+    app.router.add_get("/metrics", _metrics_handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
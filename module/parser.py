@@ -5,6 +5,9 @@ Created on Sun Feb 25 20:42:17 2024
 """
 import re
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 # ==================== Regex Patterns ====================
 RE_PARAM_CODE = r'\s*([\w ]+):\s*("(?:\\.|[^\\"])+"|[^,]*)(?:,|$)'
@@ -31,9 +34,14 @@ def parse_swarmui_parameters(param_str: str) -> dict:
     try:
         data = json.loads(param_str)
     except json.JSONDecodeError as e:
-        print(f"Failed to parse SwarmUI JSON: {e}")
+        logger.warning("Failed to parse SwarmUI JSON: %s", e)
         return {}
     
+    return _parse_swarmui_data(data)
+
+
+def _parse_swarmui_data(data: dict) -> dict:
+    """Map already decoded SwarmUI metadata to WebUI field names."""
     sui_params = data.get('sui_image_params', {})
     sui_extra = data.get('sui_extra_data', {})
     sui_models = data.get('sui_models', [])
@@ -112,6 +120,68 @@ def parse_swarmui_parameters(param_str: str) -> dict:
     
     return res
 
+# ==================== NovelAI Parser ====================
+RE_NOVELAI_SOURCE = re.compile(r"^(.*?)\s+([0-9A-Fa-f]{8})$")
+
+NOVELAI_FIELDS = (
+    ("steps", "Steps"),
+    ("sampler", "Sampler"),
+    ("scale", "CFG scale"),
+    ("seed", "Seed"),
+    ("noise_schedule", "Schedule type"),
+    ("cfg_rescale", "CFG rescale"),
+)
+
+
+def _novelai_caption(value) -> str:
+    """Base caption of a NovelAI V4 prompt object."""
+    if isinstance(value, dict):
+        return value.get("caption", {}).get("base_caption", "")
+    return ""
+
+
+def parse_novelai_parameters(data: dict) -> dict:
+    """
+    Parse NovelAI metadata: the Comment JSON holds the generation settings,
+    Description the prompt and Source the model name and hash.
+    Returns a dictionary with WebUI field names.
+    """
+    comment = data.get("Comment", {})
+    if isinstance(comment, str):
+        try:
+            comment = json.loads(comment)
+        except json.JSONDecodeError as e:
+            logger.warning("Failed to parse NovelAI Comment JSON: %s", e)
+            comment = {}
+    if not isinstance(comment, dict):
+        comment = {}
+    
+    res = {}
+    prompt = comment.get("prompt") or _novelai_caption(comment.get("v4_prompt")) or data.get("Description")
+    negative_prompt = comment.get("uc") or _novelai_caption(comment.get("v4_negative_prompt"))
+    # Embed fields cannot be empty
+    if prompt:
+        res["Prompt"] = prompt
+    if negative_prompt:
+        res["Negative prompt"] = negative_prompt
+    for key, name in NOVELAI_FIELDS:
+        if comment.get(key) is not None:
+            res[name] = str(comment[key])
+    
+    if "width" in comment and "height" in comment:
+        res["Size-1"] = str(comment["width"])
+        res["Size-2"] = str(comment["height"])
+    
+    # e.g. "Stable Diffusion XL C1E1DE52"
+    source = data.get("Source")
+    if source:
+        match = RE_NOVELAI_SOURCE.match(source)
+        res["Model"] = match.group(1) if match else source
+        if match:
+            res["Model hash"] = match.group(2)
+    
+    return res
+
 # ==================== Main Parsing Function ====================
 def parse_generation_parameters(param_str: str) -> dict:
     """
@@ -125,51 +195,50 @@ def parse_generation_parameters(param_str: str) -> dict:
         try:
             data = json.loads(param_str)
             if 'sui_image_params' in data:
-                return parse_swarmui_parameters(param_str)
+                return _parse_swarmui_data(data)
         except json.JSONDecodeError:
             pass  # Fall through to WebUI parser
     
     # Original WebUI parser
     res = {}
-    prompt = ""
-    negative_prompt = ""
-    done_with_prompt = False
     
-    # Split lines and separate the last line containing key-value pairs
+    # Split lines; the last line holds the key-value pairs if it has at least 3
     *lines, lastline = param_str.strip().split("\n")
-    if len(RE_PARAM.findall(lastline)) < 3:
+    # (key, value) pairs of 'key: value, key: "quoted, value"'
+    params = RE_PARAM.findall(lastline)
+    if len(params) < 3:
         lines.append(lastline)
-        lastline = ''
+        params = []
     
-    # Parse prompt and negative prompt lines
+    # Parse prompt and negative prompt lines, collected and joined once
+    prompt_lines = []
+    negative_lines = []
+    target = prompt_lines
     for line in lines:
         line = line.strip()
         if line.startswith("Negative prompt:"):
-            done_with_prompt = True
+            target = negative_lines
             line = line[len("Negative prompt:"):].strip()
         
-        if done_with_prompt:
-            negative_prompt += ("" if negative_prompt == "" else "\n") + line
-        else:
-            prompt += ("" if prompt == "" else "\n") + line
+        # Leading empty lines are dropped
+        if line or target:
+            target.append(line)
     
-    res["Prompt"] = prompt
-    res["Negative prompt"] = negative_prompt
+    res["Prompt"] = "\n".join(prompt_lines)
+    res["Negative prompt"] = "\n".join(negative_lines)
     
-    # Parse key-value parameters from the last line
-    for k, v in RE_PARAM.findall(lastline):
-        try:
-            if v.startswith('"') and v.endswith('"'):
-                v = unquote(v)
-            
-            size_match = RE_IMAGESIZE.match(v)
-            if size_match:
-                res[f"{k}-1"] = size_match.group(1)
-                res[f"{k}-2"] = size_match.group(2)
-            else:
-                res[k] = v
-        except Exception:
-            print(f"Error parsing \"{k}: {v}\"")
+    # Key-value parameters from the last line
+    for k, v in params:
+        if v[:1] == '"' and v[-1:] == '"':
+            v = unquote(v)
+        
+        # Only values containing an "x" can be image sizes
+        size_match = RE_IMAGESIZE.match(v) if "x" in v else None
+        if size_match:
+            res[f"{k}-1"] = size_match.group(1)
+            res[f"{k}-2"] = size_match.group(2)
+        else:
+            res[k] = v
     
     # ==================== Fill in default values ====================
     res.setdefault("Clip skip", "1")  # default Clip skip
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+In-memory rendering of the fullParameters report attached to analyses.
+
+@author: seesthenight & Circle D5
+"""
+import os
+import gzip
+import json
+import pprint
+from typing import Any, Dict, Tuple
+
+# ==================== Configuration ====================
+# "pprint" (Python dict), "json" (compact JSON) or "text" (human readable)
+REPORT_FORMAT = os.environ.get("REPORT_FORMAT", "pprint")
+# Reports above this size are gzip-compressed or trimmed
+REPORT_MAX_BYTES = int(os.environ.get("REPORT_MAX_BYTES", str(512 * 1024)))
+# "gzip" or "trim"
+REPORT_OVERSIZE = os.environ.get("REPORT_OVERSIZE", "gzip")
+
+REPORT_BASENAME = "fullParameters"
+TRIM_NOTICE = b"\n\n[... report trimmed, original size %d bytes ...]\n"
+
+
+# ==================== Formatters ====================
+def _decode_json_values(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Decode values that hold JSON (ComfyUI prompt/workflow, NovelAI Comment)."""
+    decoded = {}
+    for key, value in metadata.items():
+        if isinstance(value, str) and value[:1] in ("{", "["):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                pass
+        decoded[key] = value
+    return decoded
+
+
+def _format_pprint(metadata: Dict[str, Any]) -> str:
+    return pprint.pformat(metadata, indent=4)
+
+
+def _format_json(metadata: Dict[str, Any]) -> str:
+    return json.dumps(_decode_json_values(metadata), ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _format_text(metadata: Dict[str, Any]) -> str:
+    sections = []
+    for key, value in _decode_json_values(metadata).items():
+        if not isinstance(value, str):
+            value = json.dumps(value, ensure_ascii=False, indent=2, default=str)
+        sections.append(f"{key}\n{'=' * len(key)}\n{value}")
+    return "\n\n".join(sections) + "\n"
+
+
+FORMATTERS = {
+    "pprint": (_format_pprint, "txt"),
+    "json": (_format_json, "json"),
+    "text": (_format_text, "txt"),
+}
+
+
+# ==================== Rendering ====================
+def render_report(
+    metadata: Dict[str, Any],
+    fmt: str = REPORT_FORMAT,
+    max_bytes: int = REPORT_MAX_BYTES,
+    oversize: str = REPORT_OVERSIZE
+) -> Tuple[bytes, str]:
+    """Render metadata into report bytes. Returns (content, filename)."""
+    formatter, extension = FORMATTERS.get(fmt, FORMATTERS["pprint"])
+    content = formatter(metadata).encode("utf-8")
+    filename = f"{REPORT_BASENAME}.{extension}"
+
+    if len(content) <= max_bytes:
+        return content, filename
+
+    if oversize == "trim":
+        # Cut on a character boundary: drop a multi-byte character split at max_bytes
+        head = content[:max_bytes].decode("utf-8", "ignore").encode("utf-8")
+        return head + TRIM_NOTICE % len(content), filename
+
+    return gzip.compress(content, compresslevel=6), f"{filename}.gz"
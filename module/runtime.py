@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Process-wide configuration and state shared by the bot's extensions.
+
+This module is never reloaded: caches, the send queue, the search index
+and running backfills survive a reload of the extensions in module/cogs,
+and handlers still running on the old code keep using the same objects.
+
+@author: seesthenight & Circle D5
+"""
+import os
+import asyncio
+from typing import Dict
+
+from module.analysis import CachedAnalysis
+from module.cache import TTLCache
+from module.hashindex import ModelHashes
+from module.ingest import memory_budget
+from module.sender import SendScheduler
+from module.shared_cache import SharedCache
+from module.store import ImageIndex
+from module.thumbnail import thumbnail_cache
+from module.metrics import (
+    DETECTOR_MESSAGES,
+    DISCORD_SENDS,
+    INGEST_BUDGET_BYTES,
+    SEND_QUEUE_DEPTH,
+    track_cache,
+)
+
+# ==================== Configuration ====================
+AUTO_CHANNEL_NAME = '🤖│prompts-auto-share'
+BOT_LOG_CHANNEL_ID = 1120267966731259984
+
+# Maximum number of attachments downloaded and parsed at the same time
+ANALYSIS_CONCURRENCY = 4
+
+# Analysis cache limits
+ANALYSIS_CACHE_ENTRIES = 512
+ANALYSIS_CACHE_BYTES = 64 * 1024 * 1024
+ANALYSIS_CACHE_TTL = 6 * 60 * 60
+
+MODEL_ANSWER_CACHE_TTL = 24 * 60 * 60
+
+# Search index
+INDEX_DB_PATH = os.environ.get("INDEX_DB_PATH", "./mecha_index.sqlite3")
+
+# Model and LoRA hash dump (JSON or SQLite, see module/hashindex.py)
+HASH_INDEX_PATH = os.environ.get("MECHA_HASH_INDEX")
+
+# Cluster mode: set per process by the launcher (python -m module.cluster)
+SHARED_CACHE_PATH = os.environ.get("MECHA_SHARED_CACHE")
+
+# File paths
+ASSET_SORRY = "./assets/mecha_sorry.png"
+ASSET_CONFUSED = "./assets/confused.png"
+
+# ==================== Shared State ====================
+analysis_semaphore = asyncio.Semaphore(ANALYSIS_CONCURRENCY)
+analysis_cache = TTLCache(
+    max_entries=ANALYSIS_CACHE_ENTRIES,
+    ttl=ANALYSIS_CACHE_TTL,
+    max_bytes=ANALYSIS_CACHE_BYTES,
+    sizeof=CachedAnalysis.size
+)
+model_answer_cache = TTLCache(max_entries=1024, ttl=MODEL_ANSWER_CACHE_TTL)
+detector_stats = {"checked": 0, "matched": 0}
+image_index = ImageIndex(INDEX_DB_PATH)
+backfills: Dict[int, asyncio.Task] = {}
+shared_cache = SharedCache(SHARED_CACHE_PATH) if SHARED_CACHE_PATH else None
+send_scheduler = SendScheduler()
+model_hashes = ModelHashes(HASH_INDEX_PATH)
+
+track_cache("analysis", analysis_cache)
+track_cache("model_answer", model_answer_cache)
+track_cache("thumbnail", thumbnail_cache)
+if shared_cache is not None:
+    track_cache("shared", shared_cache)
+DETECTOR_MESSAGES.set_function(
+    lambda: {("checked",): detector_stats["checked"], ("matched",): detector_stats["matched"]}
+)
+SEND_QUEUE_DEPTH.set_function(send_scheduler.pending)
+INGEST_BUDGET_BYTES.set_function(lambda: memory_budget.used)
+DISCORD_SENDS.set_function(lambda: {(name,): count for name, count in send_scheduler.sent.items()})
+
+
+def detector_match_rate() -> float:
+    """Return the fraction of checked messages that asked about a model."""
+    checked = detector_stats["checked"]
+    return detector_stats["matched"] / checked if checked else 0.0
+
+
+def invalidate_rendered() -> None:
+    """Drop results rendered by old parsers, embed builders or hash index after a reload."""
+    analysis_cache.clear()
+    model_answer_cache.clear()
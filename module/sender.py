@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Per-channel send scheduler: every outbound message goes through a queue
+per channel, paced by a token bucket and ordered by priority.
+
+Jobs submitted with a key replace a pending job with the same key, so
+repeated status edits or typing triggers collapse into one API call.
+
+@author: seesthenight & Circle D5
+"""
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# ==================== Configuration ====================
+# Discord allows roughly 5 messages per 5 seconds per channel
+SEND_RATE = 1.0
+SEND_BURST = 5
+# Channel workers exit after this long without work
+IDLE_TIMEOUT = 60.0
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_REPLY = 1
+PRIORITY_STATUS = 2
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_REPLY: "reply", PRIORITY_STATUS: "status"}
+
+SendFunc = Callable[[], Awaitable[Any]]
+
+
+# ==================== Token Bucket ====================
+class TokenBucket:
+    """Allow `rate` operations per second with bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _take(self) -> float:
+        """Take a token if available; otherwise return the wait until one is."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    async def acquire(self) -> None:
+        while True:
+            delay = self._take()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    def refund(self) -> None:
+        """Return a token taken for an operation that did not happen."""
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+
+# ==================== Scheduler ====================
+@dataclass(order=True)
+class _Job:
+    priority: int
+    sequence: int
+    send: SendFunc = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    key: Optional[str] = field(compare=False, default=None)
+
+
+@dataclass
+class _ChannelQueue:
+    bucket: TokenBucket
+    jobs: List[_Job] = field(default_factory=list)
+    keyed: Dict[str, _Job] = field(default_factory=dict)
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class SendScheduler:
+    """Queue of outbound Discord calls, one paced worker per channel."""
+
+    def __init__(self, rate: float = SEND_RATE, burst: int = SEND_BURST, idle_timeout: float = IDLE_TIMEOUT):
+        self.rate = rate
+        self.burst = burst
+        self.idle_timeout = idle_timeout
+        self._channels: Dict[int, _ChannelQueue] = {}
+        self._workers: Set[asyncio.Task] = set()
+        self._sequence = itertools.count()
+        self.sent = {name: 0 for name in PRIORITY_NAMES.values()}
+        self.coalesced = 0
+
+    def pending(self) -> int:
+        """Number of queued calls across all channels."""
+        return sum(len(state.jobs) for state in self._channels.values())
+
+    def submit(self, channel_id: int, send: SendFunc, priority: int = PRIORITY_REPLY, key: Optional[str] = None) -> asyncio.Future:
+        """Queue a call and return a future for its result."""
+        state = self._channels.get(channel_id)
+        if state is None:
+            state = self._channels[channel_id] = _ChannelQueue(TokenBucket(self.rate, self.burst))
+            worker = asyncio.create_task(self._drain(channel_id, state))
+            self._workers.add(worker)
+            worker.add_done_callback(self._workers.discard)
+
+        if key is not None and key in state.keyed:
+            # Newest call wins; earlier callers receive its result
+            job = state.keyed[key]
+            job.send = send
+            self.coalesced += 1
+            return job.future
+
+        job = _Job(priority, next(self._sequence), send, asyncio.get_running_loop().create_future(), key)
+        heapq.heappush(state.jobs, job)
+        if key is not None:
+            state.keyed[key] = job
+        state.wakeup.set()
+        return job.future
+
+    async def send(self, channel_id: int, send: SendFunc, priority: int = PRIORITY_REPLY, key: Optional[str] = None) -> Any:
+        """
+        Queue a call and wait for its result. Cancelling the caller drops the
+        call if it has not been sent yet, except keyed calls, which other
+        callers may share.
+        """
+        future = self.submit(channel_id, send, priority, key)
+        try:
+            # Shielded so the worker, not the caller, decides when the future completes
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if key is None:
+                future.cancel()
+            raise
+
+    def post(self, channel_id: int, send: SendFunc, priority: int = PRIORITY_REPLY, key: Optional[str] = None) -> None:
+        """Queue a call without waiting for it; failures are logged."""
+        self.submit(channel_id, send, priority, key).add_done_callback(_log_failure)
+
+    async def _drain(self, channel_id: int, state: _ChannelQueue) -> None:
+        while True:
+            if not state.jobs:
+                state.wakeup.clear()
+                try:
+                    await asyncio.wait_for(state.wakeup.wait(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    pass
+                if not state.jobs:
+                    if self._channels.get(channel_id) is state:
+                        del self._channels[channel_id]
+                    return
+                continue
+
+            if state.jobs[0].future.done():
+                # Abandoned by its caller; costs no token
+                job = heapq.heappop(state.jobs)
+                if state.keyed.get(job.key) is job:
+                    del state.keyed[job.key]
+                continue
+
+            await state.bucket.acquire()
+            job = heapq.heappop(state.jobs)
+            if job.key is not None:
+                state.keyed.pop(job.key, None)
+            if job.future.done():
+                # Abandoned while waiting for its token
+                state.bucket.refund()
+                continue
+
+            try:
+                result = await job.send()
+            except Exception as err:
+                if not job.future.done():
+                    job.future.set_exception(err)
+            else:
+                if not job.future.done():
+                    job.future.set_result(result)
+            name = PRIORITY_NAMES.get(job.priority, "other")
+            self.sent[name] = self.sent.get(name, 0) + 1
+
+
+def _log_failure(future: asyncio.Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning("Queued send failed: %s", future.exception())
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Analysis cache shared by the bot processes of a cluster, stored in SQLite.
+
+Entries are pickled under a content key, with attachment IDs stored as
+aliases of it. Claims let one process analyse an image while the others
+wait for its result instead of repeating the work.
+
+All methods block; call them from a worker thread.
+
+@author: seesthenight & Circle D5
+"""
+import os
+import time
+import pickle
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+# ==================== Configuration ====================
+SHARED_CACHE_TTL = 6 * 60 * 60
+SHARED_CACHE_MAX_BYTES = 512 * 1024 * 1024
+# A claim not released within this time is considered abandoned
+CLAIM_TTL = 60.0
+# Expired and excess entries are trimmed every this many writes
+TRIM_EVERY = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key         TEXT PRIMARY KEY,
+    value       BLOB NOT NULL,
+    size        INTEGER NOT NULL,
+    stored_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_stored ON entries(stored_at);
+CREATE TABLE IF NOT EXISTS aliases (
+    key         TEXT PRIMARY KEY,
+    target      TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS claims (
+    key         TEXT PRIMARY KEY,
+    owner       TEXT NOT NULL,
+    expires     REAL NOT NULL
+);
+"""
+
+
+class SharedCache:
+    """Pickled values in SQLite, readable and writable from several processes."""
+
+    def __init__(self, path: str, ttl: float = SHARED_CACHE_TTL, max_bytes: int = SHARED_CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.owner = f"{os.getpid()}"
+        self._local = threading.local()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections belong to the thread that opened them
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ---------- Entries ----------
+    def get(self, key: str) -> Optional[Any]:
+        """Return the value stored under key or one of its aliases."""
+        row = self._conn().execute(
+            "SELECT value, stored_at FROM entries "
+            "WHERE key = COALESCE((SELECT target FROM aliases WHERE key = ?), ?)",
+            (key, key)
+        ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value: Any, aliases: Iterable[str] = ()) -> None:
+        """Store value under key, make aliases point at it and release the claim on key."""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, stored_at) VALUES (?, ?, ?, ?)",
+                (key, blob, len(blob), time.time())
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO aliases (key, target) VALUES (?, ?)",
+                [(alias, key) for alias in aliases]
+            )
+            conn.execute("DELETE FROM claims WHERE key = ?", (key,))
+
+        self._writes += 1
+        if self._writes % TRIM_EVERY == 0:
+            self.trim()
+
+    def alias(self, alias: str, key: str) -> None:
+        """Point alias at an existing entry."""
+        conn = self._conn()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO aliases (key, target) VALUES (?, ?)", (alias, key))
+
+    def trim(self) -> None:
+        """Drop expired entries, then the oldest until the total size fits."""
+        conn = self._conn()
+        with conn:
+            expired = conn.execute("DELETE FROM entries WHERE stored_at < ?", (time.time() - self.ttl,))
+            self.evictions += expired.rowcount
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total > self.max_bytes:
+                excess = total - self.max_bytes
+                cutoff = conn.execute(
+                    "SELECT stored_at FROM ("
+                    "  SELECT stored_at, SUM(size) OVER (ORDER BY stored_at) AS running FROM entries"
+                    ") WHERE running >= ? ORDER BY stored_at LIMIT 1",
+                    (excess,)
+                ).fetchone()
+                if cutoff is not None:
+                    evicted = conn.execute("DELETE FROM entries WHERE stored_at <= ?", (cutoff[0],))
+                    self.evictions += evicted.rowcount
+            conn.execute("DELETE FROM aliases WHERE target NOT IN (SELECT key FROM entries)")
+
+    # ---------- Claims ----------
+    def claim(self, key: str) -> bool:
+        """Try to become the process that computes key. False if another holds it."""
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM claims WHERE key = ? AND expires < ?", (key, now))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO claims (key, owner, expires) VALUES (?, ?, ?)",
+                (key, self.owner, now + CLAIM_TTL)
+            )
+        return cursor.rowcount == 1
+
+    def release(self, key: str) -> None:
+        """Give up a claim without storing a result (e.g. after a failure)."""
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM claims WHERE key = ? AND owner = ?", (key, self.owner))
+
+    def is_claimed(self, key: str) -> bool:
+        row = self._conn().execute(
+            "SELECT 1 FROM claims WHERE key = ? AND expires >= ?", (key, time.time())
+        ).fetchone()
+        return row is not None
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Stealth pnginfo: parameters hidden in the least significant bits of the
+alpha channel (NovelAI, stealth-pnginfo extension) or of the RGB channels.
+
+Bits are read column by column (x outer, y inner): a 15-byte signature,
+a 32-bit payload length in bits, then the payload, gzip-compressed for
+the *comp signatures. Only the columns covering that many bits are
+converted to arrays, with NumPy instead of a per-pixel loop.
+
+NumPy and Pillow are imported on first use.
+
+@author: seesthenight & Circle D5
+"""
+import io
+import json
+import zlib
+import logging
+from typing import Dict, Optional
+
+from module.ingest import check_dimensions
+
+logger = logging.getLogger(__name__)
+
+# ==================== Constants ====================
+# signature -> (channels, gzip compressed)
+SIGNATURES = {
+    b"stealth_pnginfo": ("alpha", False),
+    b"stealth_pngcomp": ("alpha", True),
+    b"stealth_rgbinfo": ("rgb", False),
+    b"stealth_rgbcomp": ("rgb", True),
+}
+SIGNATURE_BITS = 15 * 8
+LENGTH_BITS = 32
+HEADER_BITS = SIGNATURE_BITS + LENGTH_BITS
+MAX_PAYLOAD_BYTES = 8 * 1024 * 1024
+
+# PNG colour types with an alpha channel: grey + alpha, RGBA
+PNG_ALPHA_COLOR_TYPES = (4, 6)
+# Lossy formats destroy the low bits
+STEALTH_FORMATS = ("PNG", "WEBP")
+
+
+# ==================== Header Check ====================
+def png_has_alpha(data: bytes) -> bool:
+    """True if the PNG IHDR declares an alpha channel, i.e. stealth info may be present."""
+    return len(data) > 25 and data[12:16] == b"IHDR" and data[25] in PNG_ALPHA_COLOR_TYPES
+
+
+# ==================== Bit Extraction ====================
+def _column_bits(image, channels: str, columns: int):
+    """LSBs of the first columns, in column-major order, as a flat uint8 array."""
+    import numpy as np
+
+    region = image.crop((0, 0, columns, image.height))
+    pixels = np.asarray(region, dtype=np.uint8)
+    if channels == "alpha":
+        planes = pixels[..., 3:4]
+    else:
+        planes = pixels[..., :3]
+    # (rows, columns, k) -> (columns, rows, k): x outer, y inner
+    return (planes.transpose(1, 0, 2) & 1).ravel()
+
+
+def _inflate_gzip(payload: bytes) -> bytes:
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    text = inflater.decompress(payload, MAX_PAYLOAD_BYTES)
+    if inflater.unconsumed_tail:
+        raise ValueError("stealth payload inflates beyond MAX_PAYLOAD_BYTES")
+    return text
+
+
+def read_stealth_text(image) -> Optional[str]:
+    """Return the stealth pnginfo text of a Pillow image, or None."""
+    import numpy as np
+
+    width, height = image.size
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    candidates = ("alpha", "rgb") if image.mode == "RGBA" else ("rgb",)
+
+    for channels in candidates:
+        bits_per_column = height * (1 if channels == "alpha" else 3)
+        columns = -(-HEADER_BITS // bits_per_column)
+        if columns > width:
+            continue
+        bits = _column_bits(image, channels, columns)
+
+        signature = np.packbits(bits[:SIGNATURE_BITS]).tobytes()
+        if SIGNATURES.get(signature, (None,))[0] != channels:
+            continue
+        compressed = SIGNATURES[signature][1]
+        length = int.from_bytes(np.packbits(bits[SIGNATURE_BITS:HEADER_BITS]).tobytes(), "big")
+        if length > MAX_PAYLOAD_BYTES * 8:
+            return None
+
+        # Stop at the last column holding payload bits
+        total = HEADER_BITS + length
+        columns = -(-total // bits_per_column)
+        if columns > width:
+            return None
+        if len(bits) < total:
+            bits = _column_bits(image, channels, columns)
+        payload = np.packbits(bits[HEADER_BITS:total]).tobytes()
+
+        if compressed:
+            payload = _inflate_gzip(payload)
+        return payload.decode("utf-8", errors="replace")
+
+    return None
+
+
+# ==================== Metadata ====================
+def _as_metadata(text: str) -> Dict[str, str]:
+    """NovelAI embeds its text chunks as JSON; other writers embed A1111 parameters."""
+    if text[:1] == "{":
+        try:
+            chunks = json.loads(text)
+        except ValueError:
+            chunks = None
+        if isinstance(chunks, dict):
+            return {
+                key: value if isinstance(value, str) else json.dumps(value)
+                for key, value in chunks.items()
+            }
+    return {"parameters": text}
+
+
+def read_stealth_metadata(data: bytes) -> Dict[str, str]:
+    """Decode image bytes and return their stealth pnginfo as metadata, if any."""
+    try:
+        import numpy  # noqa: F401
+        from PIL import Image
+    except ImportError:
+        logger.debug("NumPy or Pillow missing, stealth pnginfo skipped")
+        return {}
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.format not in STEALTH_FORMATS:
+                return {}
+            # Raises ImageRejected (a ValueError) before any pixels are decoded
+            check_dimensions(*image.size)
+            text = read_stealth_text(image)
+    except (OSError, ValueError, Image.DecompressionBombError) as err:
+        logger.debug("Stealth pnginfo not readable: %s", err)
+        return {}
+
+    return _as_metadata(text) if text else {}
@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+"""
+SQLite index of analysed images with full-text search over prompts.
+
+Writes are queued and committed in batches by a background thread; reads
+use their own connections, which WAL mode allows alongside the writer.
+
+@author: seesthenight & Circle D5
+"""
+import json
+import time
+import queue
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ==================== Configuration ====================
+BATCH_SIZE = 100
+FLUSH_INTERVAL = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    attachment_id   INTEGER PRIMARY KEY,
+    message_id      INTEGER NOT NULL,
+    channel_id      INTEGER,
+    guild_id        INTEGER,
+    jump_url        TEXT,
+    filename        TEXT,
+    ui_type         TEXT,
+    prompt          TEXT,
+    negative_prompt TEXT,
+    model           TEXT,
+    model_hash      TEXT,
+    sampler         TEXT,
+    seed            TEXT,
+    steps           TEXT,
+    cfg_scale       TEXT,
+    width           TEXT,
+    height          TEXT,
+    parameters      TEXT,
+    created_at      REAL
+);
+CREATE INDEX IF NOT EXISTS idx_images_message ON images(message_id);
+CREATE INDEX IF NOT EXISTS idx_images_model ON images(model COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_images_model_hash ON images(model_hash COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_images_sampler ON images(sampler COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_images_seed ON images(seed);
+
+CREATE TABLE IF NOT EXISTS backfill_state (
+    channel_id  INTEGER PRIMARY KEY,
+    cursor_id   INTEGER,
+    processed   INTEGER NOT NULL DEFAULT 0,
+    updated_at  REAL
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS images_fts USING fts5(
+    prompt, negative_prompt, content='images', content_rowid='attachment_id'
+);
+CREATE TRIGGER IF NOT EXISTS images_ai AFTER INSERT ON images BEGIN
+    INSERT INTO images_fts(rowid, prompt, negative_prompt)
+    VALUES (new.attachment_id, new.prompt, new.negative_prompt);
+END;
+CREATE TRIGGER IF NOT EXISTS images_ad AFTER DELETE ON images BEGIN
+    INSERT INTO images_fts(images_fts, rowid, prompt, negative_prompt)
+    VALUES ('delete', old.attachment_id, old.prompt, old.negative_prompt);
+END;
+CREATE TRIGGER IF NOT EXISTS images_au AFTER UPDATE ON images BEGIN
+    INSERT INTO images_fts(images_fts, rowid, prompt, negative_prompt)
+    VALUES ('delete', old.attachment_id, old.prompt, old.negative_prompt);
+    INSERT INTO images_fts(rowid, prompt, negative_prompt)
+    VALUES (new.attachment_id, new.prompt, new.negative_prompt);
+END;
+"""
+
+COLUMNS = (
+    "attachment_id", "message_id", "channel_id", "guild_id", "jump_url", "filename",
+    "ui_type", "prompt", "negative_prompt", "model", "model_hash", "sampler", "seed",
+    "steps", "cfg_scale", "width", "height", "parameters", "created_at",
+)
+
+UPSERT = (
+    f"INSERT INTO images ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))}) "
+    f"ON CONFLICT(attachment_id) DO UPDATE SET "
+    + ", ".join(f"{column}=excluded.{column}" for column in COLUMNS[1:])
+)
+
+
+# ==================== Records ====================
+@dataclass
+class ImageRecord:
+    """One analysed attachment as stored in the index."""
+    attachment_id: int
+    message_id: int
+    channel_id: Optional[int] = None
+    guild_id: Optional[int] = None
+    jump_url: Optional[str] = None
+    filename: Optional[str] = None
+    ui_type: Optional[str] = None
+    prompt: Optional[str] = None
+    negative_prompt: Optional[str] = None
+    model: Optional[str] = None
+    model_hash: Optional[str] = None
+    sampler: Optional[str] = None
+    seed: Optional[str] = None
+    steps: Optional[str] = None
+    cfg_scale: Optional[str] = None
+    width: Optional[str] = None
+    height: Optional[str] = None
+    parameters: Optional[str] = None
+    created_at: float = 0.0
+
+    @classmethod
+    def from_parameters(cls, parameters: Dict[str, Any], **ids: Any) -> "ImageRecord":
+        """Build a record from the dict returned by parse_parameters."""
+        def field(key: str) -> Optional[str]:
+            value = parameters.get(key)
+            return None if value is None or value == "" else str(value)
+
+        stored = {key: value for key, value in parameters.items() if key != "ComfyUI AI Params"}
+        return cls(
+            ui_type=field("ui_type"),
+            prompt=field("Prompt"),
+            negative_prompt=field("Negative prompt"),
+            model=field("Model"),
+            model_hash=field("Model hash"),
+            sampler=field("Sampler"),
+            seed=field("Seed"),
+            steps=field("Steps"),
+            cfg_scale=field("CFG scale"),
+            width=field("Size-1"),
+            height=field("Size-2"),
+            parameters=json.dumps(stored, ensure_ascii=False, default=str),
+            created_at=time.time(),
+            **ids,
+        )
+
+    def row(self) -> Tuple:
+        values = asdict(self)
+        return tuple(values[column] for column in COLUMNS)
+
+
+@dataclass
+class BackfillCursor:
+    """Resume point of a channel history backfill."""
+    channel_id: int
+    cursor_id: Optional[int]
+    processed: int = 0
+
+
+SAVE_CURSOR = (
+    "INSERT INTO backfill_state (channel_id, cursor_id, processed, updated_at) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(channel_id) DO UPDATE SET cursor_id=excluded.cursor_id, "
+    "processed=excluded.processed, updated_at=excluded.updated_at"
+)
+
+
+def fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query matching all words as literals."""
+    return " ".join('"' + token.replace('"', '""') + '"' for token in text.split())
+
+
+def like_prefix(text: str) -> str:
+    """Turn text into a LIKE pattern matching it literally as a prefix (ESCAPE '\\')."""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+# ==================== Index ====================
+class ImageIndex:
+    """SQLite store of analysed images with a batched background writer."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._writer_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _ensure_schema(self) -> None:
+        with self._lock:
+            if self._schema_ready:
+                return
+            conn = self._connect()
+            try:
+                conn.executescript(SCHEMA)
+                conn.commit()
+            finally:
+                conn.close()
+            self._schema_ready = True
+
+    # ---------- Writing ----------
+    def start(self) -> None:
+        """Start the background writer if it is not running. The writer creates the schema."""
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name="image-index-writer", daemon=True)
+                self._writer.start()
+
+    def add(self, record: ImageRecord) -> None:
+        """Queue a record; never blocks the caller on disk I/O."""
+        if self._writer is None or not self._writer.is_alive():
+            self.start()
+        self._queue.put(record)
+
+    def save_cursor(self, cursor: BackfillCursor) -> None:
+        """
+        Queue a backfill cursor. It is committed in order after the records
+        queued before it, so a resumed crawl never skips unsaved records.
+        """
+        if self._writer is None or not self._writer.is_alive():
+            self.start()
+        self._queue.put(cursor)
+
+    def close(self) -> None:
+        """Flush pending records and stop the writer."""
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        self._writer = None
+
+    def _write_loop(self) -> None:
+        try:
+            self._ensure_schema()
+            conn = self._connect()
+        except Exception:
+            # Queued items wait; the next add() or save_cursor() starts a new writer
+            logger.exception("Image index: writer could not open %s", self.path)
+            return
+        try:
+            running = True
+            while running:
+                batch: List[Any] = []
+                try:
+                    item = self._queue.get(timeout=FLUSH_INTERVAL)
+                except queue.Empty:
+                    continue
+                deadline = time.monotonic() + FLUSH_INTERVAL
+                while item is not None:
+                    batch.append(item)
+                    if len(batch) >= BATCH_SIZE:
+                        break
+                    try:
+                        item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                else:
+                    running = False
+
+                if batch:
+                    conn = self._write_batch(conn, batch)
+        finally:
+            conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: List[Any]) -> sqlite3.Connection:
+        """
+        Commit one batch and return the connection to use for the next.
+        A failed batch is logged and dropped, so the writer keeps running;
+        a later backfill re-indexes its records, since the cursors went with them.
+        """
+        records = [item.row() for item in batch if isinstance(item, ImageRecord)]
+        cursors = [
+            (item.channel_id, item.cursor_id, item.processed, time.time())
+            for item in batch if isinstance(item, BackfillCursor)
+        ]
+        try:
+            with conn:
+                conn.executemany(UPSERT, records)
+                conn.executemany(SAVE_CURSOR, cursors)
+        except Exception:
+            logger.exception("Image index: dropped a batch of %d records and %d cursors", len(records), len(cursors))
+            # The connection may be what broke; start the next batch on a fresh one
+            conn.close()
+            conn = self._connect()
+        return conn
+
+    # ---------- Reading ----------
+    def load_cursor(self, channel_id: int) -> BackfillCursor:
+        """Return the saved backfill cursor for a channel. Blocking."""
+        self._ensure_schema()
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT cursor_id, processed FROM backfill_state WHERE channel_id = ?", (channel_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return BackfillCursor(channel_id, None, 0)
+        return BackfillCursor(channel_id, row["cursor_id"], row["processed"])
+
+    def indexed_ids(self, attachment_ids: List[int]) -> Set[int]:
+        """Return which of the attachment IDs are already indexed. Blocking."""
+        if not attachment_ids:
+            return set()
+        self._ensure_schema()
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f"SELECT attachment_id FROM images WHERE attachment_id IN ({', '.join('?' * len(attachment_ids))})",
+                attachment_ids
+            ).fetchall()
+        finally:
+            conn.close()
+        return {row[0] for row in rows}
+
+    def search(
+        self,
+        query: str = "",
+        model: Optional[str] = None,
+        seed: Optional[str] = None,
+        sampler: Optional[str] = None,
+        limit: int = 5,
+        offset: int = 0
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Return (rows, total matches). Blocking; call from a worker thread."""
+        self._ensure_schema()
+        joins = ""
+        conditions = []
+        params: List[Any] = []
+
+        if query.strip():
+            joins = "JOIN images_fts ON images_fts.rowid = images.attachment_id"
+            conditions.append("images_fts MATCH ?")
+            params.append(fts_query(query))
+        if model:
+            # Model name or hash prefixes; a leading wildcard could not use their indexes
+            conditions.append("(images.model LIKE ? ESCAPE '\\' OR images.model_hash LIKE ? ESCAPE '\\')")
+            params.extend([like_prefix(model)] * 2)
+        if seed:
+            conditions.append("images.seed = ?")
+            params.append(seed)
+        if sampler:
+            conditions.append("images.sampler = ? COLLATE NOCASE")
+            params.append(sampler)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        conn = self._connect()
+        try:
+            total = conn.execute(f"SELECT count(*) FROM images {joins} {where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT images.* FROM images {joins} {where} "
+                f"ORDER BY images.created_at DESC LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        finally:
+            conn.close()
+        return [dict(row) for row in rows], total
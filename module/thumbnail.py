@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+In-memory thumbnail rendering for analysis embeds. Pillow is imported on
+first render, which happens in the worker pool.
+
+@author: seesthenight & Circle D5
+"""
+import io
+import hashlib
+from typing import Optional
+
+from module.cache import TTLCache
+from module.ingest import check_dimensions
+
+# ==================== Configuration ====================
+THUMBNAIL_SIZE = (160, 160)
+THUMBNAIL_FORMAT = "WEBP"
+THUMBNAIL_FILENAME = "thumbnail.webp"
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_CACHE_SIZE = 256
+THUMBNAIL_CACHE_TTL = 6 * 60 * 60
+
+thumbnail_cache = TTLCache(max_entries=THUMBNAIL_CACHE_SIZE, ttl=THUMBNAIL_CACHE_TTL)
+
+# ==================== Thumbnail Rendering ====================
+def content_hash(data: bytes) -> str:
+    """Return the hash used to identify identical uploads."""
+    return hashlib.sha1(data).hexdigest()
+
+
+def render_thumbnail(data: bytes) -> bytes:
+    """Downscale image bytes into a small encoded thumbnail."""
+    from PIL import Image
+    with Image.open(io.BytesIO(data)) as image:
+        # Checked on the opened image, so Pillow's process-wide limit stays untouched
+        check_dimensions(*image.size)
+        # JPEG can decode at 1/2..1/8 scale directly; other formats ignore this
+        image.draft("RGB", THUMBNAIL_SIZE)
+        # reducing_gap makes Pillow use the cheap reduce() before resampling
+        image.thumbnail(THUMBNAIL_SIZE, reducing_gap=2.0)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+
+        output = io.BytesIO()
+        image.save(output, THUMBNAIL_FORMAT, quality=THUMBNAIL_QUALITY)
+        return output.getvalue()
+
+
+# ==================== Thumbnail Cache ====================
+def get_cached_thumbnail(key: str) -> Optional[bytes]:
+    """Return the cached thumbnail for a content hash, if any."""
+    return thumbnail_cache.get(key)
+
+
+def cache_thumbnail(key: str, thumbnail: bytes) -> None:
+    """Store a rendered thumbnail under its content hash."""
+    thumbnail_cache.set(key, thumbnail)
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Worker pool that keeps CPU-bound analysis off the event loop.
+
+@author: seesthenight & Circle D5
+"""
+import os
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+# ==================== Configuration ====================
+# "process" for a ProcessPoolExecutor, "thread" for a ThreadPoolExecutor
+EXECUTOR_KIND = os.environ.get("MECHA_EXECUTOR", "process")
+MAX_WORKERS = int(os.environ.get("MECHA_WORKERS", min(4, os.cpu_count() or 1)))
+JOB_TIMEOUT = float(os.environ.get("MECHA_JOB_TIMEOUT", "30"))
+
+_executor: Optional[Executor] = None
+
+# ==================== Executor Handling ====================
+def get_executor() -> Executor:
+    """Return the shared executor, creating it on first use."""
+    global _executor
+    if _executor is None:
+        if EXECUTOR_KIND == "thread":
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="mecha-worker")
+        else:
+            _executor = ProcessPoolExecutor(max_workers=MAX_WORKERS)
+    return _executor
+
+
+def shutdown_executor(wait: bool = False) -> None:
+    """Shut the executor down; a new one is created on the next job."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=wait, cancel_futures=True)
+    _executor = None
+
+
+def recycle_executor() -> None:
+    """
+    Start new jobs on a fresh executor, whose workers import the current
+    code. The old one finishes the jobs already submitted to it, then exits.
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=False)
+    _executor = None
+
+
+async def run_in_worker(func: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+    """
+    Run func(*args) in the worker pool and await its result.
+    Raises asyncio.TimeoutError if the job exceeds the timeout. A timed out
+    job keeps its worker until it finishes, which MAX_WORKERS bounds.
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_executor()
+    future = loop.run_in_executor(executor, func, *args)
+    try:
+        return await asyncio.wait_for(future, timeout or JOB_TIMEOUT)
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM); start fresh for the next job, unless
+        # this was a pool already retired by recycle_executor
+        if executor is _executor:
+            shutdown_executor()
+        raise
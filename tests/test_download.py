@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Ranged metadata downloads (module/download.py) against a local aiohttp
+server that honours Range headers and records the ones it was sent.
+
+Run from the repository root: python -m pytest tests
+
+@author: seesthenight & Circle D5
+"""
+import random
+import asyncio
+from typing import List, Optional, Tuple
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from module import download
+from module.ingest import ImageRejected
+from benchmarks.corpus import WEBUI_PARAMETERS, make_png
+
+KB = 1024
+MB = 1024 * KB
+
+
+# ==================== Stand-in CDN ====================
+async def _serve_and_read(data: bytes, status: int = 200, honour_range: bool = True):
+    """Serve data at /image.png and read its metadata; returns (result, Range headers seen)."""
+    ranges: List[Optional[str]] = []
+
+    async def handler(request: web.Request) -> web.Response:
+        ranges.append(request.headers.get("Range"))
+        if status != 200:
+            return web.Response(status=status)
+        byte_range = request.http_range
+        if byte_range.start is None or not honour_range:
+            return web.Response(body=data)
+        body = data[byte_range]
+        return web.Response(status=206, body=body)
+
+    app = web.Application()
+    app.router.add_get("/image.png", handler)
+    async with TestServer(app) as server:
+        url = str(server.make_url("/image.png"))
+        try:
+            result = await download.read_attachment_metadata(_Attachment(url, len(data), data))
+        finally:
+            await download.close_session()
+    return result, ranges
+
+
+class _Attachment:
+    """The attributes of discord.Attachment that read_attachment_metadata uses."""
+
+    def __init__(self, url: str, size: int, data: bytes):
+        self.url = url
+        self.size = size
+        self._data = data
+
+    async def read(self) -> bytes:
+        return self._data
+
+
+def _read(data: bytes, status: int = 200, honour_range: bool = True) -> Tuple[Tuple[bytes, bool], List[Optional[str]]]:
+    return asyncio.run(_serve_and_read(data, status, honour_range))
+
+
+def _png(width: int, height: int, text: dict) -> bytes:
+    return make_png(width, height, text, rng=random.Random(width * height))
+
+
+# ==================== Range Growth ====================
+def test_first_request_is_the_initial_range():
+    data = _png(512, 512, {"parameters": WEBUI_PARAMETERS})
+
+    (body, complete), ranges = _read(data)
+
+    assert ranges == [f"bytes=0-{64 * KB - 1}"]
+    assert not complete
+    assert body == data[:64 * KB]
+
+
+def test_range_grows_by_the_growth_factor():
+    data = _png(512, 512, {"parameters": WEBUI_PARAMETERS + " " * (100 * KB)})
+
+    (body, complete), ranges = _read(data)
+
+    assert download.RANGE_GROWTH_FACTOR == 4
+    assert ranges == [f"bytes=0-{64 * KB - 1}", f"bytes={64 * KB}-{256 * KB - 1}"]
+    assert not complete
+    assert body == data[:256 * KB]
+
+
+def test_metadata_past_the_cap_is_rejected():
+    data = _png(16, 16, {"parameters": " " * (33 * MB)})
+
+    assert download.MAX_METADATA_BYTES == 32 * MB
+    with pytest.raises(ImageRejected):
+        _read(data)
+
+
+# ==================== Whole-File Paths ====================
+def test_alpha_png_without_text_is_read_in_full():
+    # make_png writes RGBA, so stealth pnginfo may hide in the pixels
+    data = _png(512, 512, {})
+
+    (body, complete), ranges = _read(data)
+
+    assert ranges == [f"bytes=0-{64 * KB - 1}", f"bytes={64 * KB}-"]
+    assert complete
+    assert body == data
+
+
+def test_small_file_is_complete():
+    data = _png(8, 8, {"parameters": WEBUI_PARAMETERS})
+
+    (body, complete), ranges = _read(data)
+
+    assert ranges == ["bytes=0-"]
+    assert complete
+    assert body == data
+
+
+# ==================== Fallback ====================
+def test_server_ignoring_range_gives_the_whole_file():
+    data = _png(512, 512, {"parameters": WEBUI_PARAMETERS})
+
+    (body, complete), ranges = _read(data, honour_range=False)
+
+    # A 200 answer to the first range is the whole file; nothing more is requested
+    assert ranges == [f"bytes=0-{64 * KB - 1}"]
+    assert complete
+    assert body == data
+
+
+def test_client_error_falls_back_to_attachment_read():
+    data = _png(8, 8, {"parameters": WEBUI_PARAMETERS})
+
+    (body, complete), ranges = _read(data, status=500)
+
+    # The server sent nothing usable; the bytes came from attachment.read()
+    assert len(ranges) == 1
+    assert complete
+    assert body == data